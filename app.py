@@ -5,97 +5,329 @@ Funcionalidades principales:
 - Inicialización del objeto Flask y configuración de las plantillas.
 - Configuración del logging y uso de un Facade (CineFacade) para la lógica del negocio.
 - Endpoints:
-    • '/' : Renderiza la página principal con la cartelera y menú de opciones.
+    • '/' : Renderiza la página principal con la cartelera paginada ('?pagina=') y el menú (cacheada).
+    • '/api/menu' : Menú de combos en JSON (pre-serializado).
+    • '/api/funciones' : Consulta del catálogo de funciones (filtros, rangos y paginación).
     • '/comprar/<asiento>' : Procesa la compra de una entrada regular.
     • '/sala/<sala_id>' : Muestra la vista de compra para una sala específica.
     • '/procesar_compra' : Procesa la compra de entradas, validando datos y emitiendo tickets.
-    • '/asientos-ocupados/<sala_id>' : Consulta los asientos ocupados de una sala.
+    • '/procesar_compra_lote' : Procesa en bloque muchas órdenes (ventas corporativas y de grupos).
+    • '/asientos-ocupados/<sala_id>' : Consulta los asientos vendidos y retenidos de una sala
+      (ETag/304, '?since=<version>' para deltas y '&wait=<s>' para long-poll).
+    • '/asientos-ocupados/<sala_id>/stream' : Stream SSE con los cambios de asientos.
+    • '/api/cotizar' : Precios de una selección de asientos o de una cuadrícula de funciones (motor de precios).
+    • '/mejores-asientos/<sala_id>' : Los '?cantidad=' mejores asientos libres contiguos de una función.
+    • '/retener' : Retiene asientos temporalmente, elegidos o los mejores por 'cantidad'
+      (extender: '/retener/<id>/extender', liberar: DELETE '/retener/<id>').
     • '/comprar-combo' : Procesa la compra de combos.
-    • Rutas para archivos estáticos y manejo de errores (404 y 500).
+    • '/api/ventas/reporte' : Ocupación e ingresos por función, sala o combo ('?por=', 'desde', 'hasta').
+    • '/api/ventas/exportar' : Exportación de las ventas en CSV o NDJSON ('?formato='), en streaming.
+    • '/metrics' : Métricas en formato de texto de Prometheus (latencias, ventas, caches).
+    • '/static/<ruta>' : Archivos estáticos con huella en el nombre, gzip, ETag y cache de un año
+      (ver controller/activos.py).
+    • Manejo de errores (404 y 500).
+
+Las rutas de compra y de asientos pasan por el control de admisión (429/503 con Retry-After al
+exceder la tasa por cliente, las compras en curso por función o los clientes esperando cambios de
+asientos por proceso, CINE_OBSERVADORES).
+Las rutas de compra aceptan el encabezado 'Idempotency-Key' para que los reintentos sean seguros,
+y un campo 'entregas' (canal -> destino, p. ej. {"correo": "ana@mail.co"}) para enviar además los
+tickets por los canales en cola (correo, sms, kiosco) sin demorar la respuesta.
 """
 
-from flask import Flask, render_template, jsonify, request, url_for
+from flask import Flask, Response, g, render_template, jsonify, request, url_for
+from models.cache import CacheVersionado
+from models.catalogo import POR_PAGINA
+from models.diario import DiarioVentas
 from models.facade import CineFacade
+from models.inventario_compartido import InventarioCompartido
+from models.metricas import metricas
+from models.ventas import FORMATOS_EXPORTACION
+from controller.activos import ManifiestoActivos
+from controller.admision import LimitadorTasa, LimiteConcurrencia, LimiteObservadores, admitir, rechazar_observador
 from controller.cine_controller import cine_controller  # Actualizar import
+from controller.idempotencia import CacheIdempotencia, idempotente
+from datetime import date, datetime
+import json
 import logging
+import os
+import random
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config['TEMPLATES_AUTO_RELOAD'] = True
+# Initialize Flask app. Los estáticos los sirve el manifiesto de activos (ver '/static/<ruta>')
+app = Flask(__name__, static_folder=None)
 
-# Initialize Facade
+# Initialize Facade. Con CINE_ESTADO_COMPARTIDO (ruta de una base SQLite) los asientos, las
+# ventas de los reportes y las existencias de la confitería son comunes a todos los workers; si no, las ventas se persisten en el diario de CINE_DIARIO_DIR,
+# que se abre al arrancar la aplicación (ver abrir_diario) y no al importar este módulo.
 try:
-    facade = CineFacade()
+    if os.environ.get('CINE_ESTADO_COMPARTIDO'):
+        facade = CineFacade(inventario=InventarioCompartido(os.environ['CINE_ESTADO_COMPARTIDO']))
+    else:
+        facade = CineFacade()
 except Exception as e:
-    logger.error(f"Error initializing CineFacade: {e}")
+    logger.error("Error initializing CineFacade: %s", e)
     facade = None
 
-# Agregar un set para mantener registro de asientos ocupados
-asientos_ocupados = set()
+def abrir_diario(directorio: str | None = None):
+    """
+    Abre el diario de ventas (por defecto CINE_DIARIO_DIR o ./datos) y recupera sus ventas.
+
+    Lo llaman los lanzadores (python app.py, servidor.py) antes de atender solicitudes; con
+    estado compartido las ventas ya se guardan en la base común.
+    """
+    if facade is None or facade.diario is not None or os.environ.get('CINE_ESTADO_COMPARTIDO'):
+        return
+    directorio = directorio or os.environ.get('CINE_DIARIO_DIR', os.path.join(app.root_path, 'datos'))
+    facade.adjuntar_diario(DiarioVentas(directorio))
+
+# Activos estáticos con huella y gzip, cargados una sola vez al arrancar
+activos = ManifiestoActivos(os.path.join(app.root_path, 'static'))
+
+@app.url_defaults
+def url_con_huella(endpoint, values):
+    # url_for('static', filename='css/styles.css') -> '/static/css/styles.<huella>.css'
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = activos.nombre(values['filename'])
+
+# Respuestas pre-renderizadas (bytes) de la página principal y el menú
+respuestas = CacheVersionado("paginas")
+
+# Respuestas de compra por Idempotency-Key, para que los reintentos sean seguros
+compras_idempotentes = CacheIdempotencia()
+
+# Control de admisión en ventas masivas (ver controller/admision.py); una tasa o un máximo en 0
+# desactiva ese límite. Las compras comparten un token bucket por cliente y tienen un máximo de
+# solicitudes en curso por función; las consultas de asientos tienen su propio bucket.
+tasa_compras = LimitadorTasa(float(os.environ.get('CINE_TASA_CLIENTE', '5')),
+                             float(os.environ.get('CINE_RAFAGA_CLIENTE', '10')))
+tasa_consultas = LimitadorTasa(float(os.environ.get('CINE_TASA_CONSULTAS', '20')),
+                               float(os.environ.get('CINE_RAFAGA_CONSULTAS', '40')))
+compras_por_funcion = LimiteConcurrencia(int(os.environ.get('CINE_COMPRAS_POR_FUNCION', '16')),
+                                         int(os.environ.get('CINE_COLA_POR_FUNCION', '32')))
+# Long-polls y streams de asientos en espera por proceso: cada uno ocupa un hilo del servidor,
+# así que el máximo debe dejar libres la mayoría de los hilos (64 en servidor.py) para las compras
+observadores = LimiteObservadores(int(os.environ.get('CINE_OBSERVADORES', '16')))
+
+def _es_texto_opcional(valor) -> bool:
+    return valor is None or isinstance(valor, str)
+
+def funcion_de_solicitud(**_) -> tuple[str, str]:
+    """
+    Función (sala, horario) a la que apunta una compra o retención, según su cuerpo JSON.
+
+    Raises:
+        ValueError: Si el cuerpo no es un objeto o 'sala', 'funcion' o 'retencion_id' no son
+            texto (admitir responde 400).
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ValueError("Datos inválidos")
+    if not all(_es_texto_opcional(data.get(campo)) for campo in ('sala', 'funcion', 'retencion_id')):
+        raise ValueError("'sala', 'funcion' y 'retencion_id' deben ser texto")
+    if facade is None:
+        return data.get('sala') or '', data.get('funcion') or ''
+    if data.get('retencion_id'):
+        retencion = facade.retenciones.obtener(data['retencion_id'])
+        if retencion is not None:
+            return retencion.sala_id, retencion.funcion
+    return facade._resolver_funcion(data.get('sala'), data.get('funcion'))
+
+# Métricas por ruta y log de acceso muestreado (fracción de solicitudes que se registran)
+duracion_solicitudes = metricas.histograma(
+    "cine_http_duracion_segundos", "Duración de las solicitudes HTTP por ruta.", ("ruta", "metodo", "codigo"))
+MUESTREO_LOG = float(os.environ.get('CINE_LOG_MUESTREO', '0.01'))
+
+@app.before_request
+def iniciar_cronometro():
+    g.inicio = time.perf_counter()
+
+@app.after_request
+def registrar_solicitud(respuesta):
+    inicio = g.pop('inicio', None)
+    if inicio is not None:
+        duracion = time.perf_counter() - inicio
+        # La regla ('/sala/<sala_id>') y no la URL, para acotar el número de series
+        ruta = request.url_rule.rule if request.url_rule is not None else "desconocida"
+        duracion_solicitudes.observar(duracion, ruta, request.method, respuesta.status_code)
+        if random.random() < MUESTREO_LOG:
+            logger.info("%s %s %s %.1fms", request.method, request.path, respuesta.status_code, duracion * 1000)
+    return respuesta
+
+@app.route('/metrics')
+def metrics():
+    return Response(metricas.exponer(), mimetype='text/plain; version=0.0.4')
+
+# Actualizaciones de asientos: long-poll y stream de eventos (segundos)
+ESPERA_MAXIMA = 25
+DURACION_STREAM = 60  # Al terminar, el navegador se reconecta y el lugar se reparte de nuevo
+INTERVALO_PING = 15
 
 @app.route('/')
 def index():
     if facade is None:
         return "Error: Sistema no disponible", 500
     try:
-        menu_data = cine_controller.get_menu()
-        logger.info(f"Menu data: {menu_data}")
-        if not isinstance(menu_data, dict):
-            menu_data = {}
-        return render_template('index.html', 
-                            cartelera_html=facade.generar_cartelera_html(),
-                            menu=menu_data)
+        # Páginas fuera de rango se acotan para no llenar la cache con páginas vacías
+        paginas = max(1, -(-len(facade.catalogo) // POR_PAGINA))
+        pagina = min(max(request.args.get('pagina', 1, type=int), 1), paginas)
+        version = (facade.version_cartelera, facade.catalogo.version, cine_controller.version_menu)
+        html = respuestas.obtener(("index", pagina), version, lambda: _renderizar_index(pagina))
+        return Response(html, mimetype='text/html')
     except Exception as e:
-        logger.error(f"Error loading menu: {str(e)}")
+        logger.error("Error loading menu: %s", e)
         return render_template('index.html',
                             cartelera_html=facade.generar_cartelera_html(),
                             menu={})
 
+def _renderizar_index(pagina: int = 1) -> bytes:
+    menu_data = cine_controller.get_menu()
+    logger.debug("Menu data: %s", menu_data)
+    if not isinstance(menu_data, dict):
+        menu_data = {}
+    return render_template('index.html',
+                           cartelera_html=facade.generar_cartelera_html(pagina),
+                           menu=menu_data).encode('utf-8')
+
+@app.route('/api/funciones')
+def listar_funciones():
+    """
+    Consulta el catálogo de funciones. Filtros opcionales: pelicula, sala, tipo, fecha
+    (AAAA-MM-DD), desde/hasta (ISO 8601), proximas_horas=<h> o esta_noche=1; paginación con
+    pagina y por_pagina.
+    """
+    if facade is None:
+        return jsonify({"error": "Sistema no disponible"}), 500
+    try:
+        filtros = {
+            "pelicula": request.args.get('pelicula'),
+            "sala_id": request.args.get('sala'),
+            "tipo": request.args.get('tipo'),
+            "fecha": date.fromisoformat(request.args['fecha']) if request.args.get('fecha') else None,
+        }
+        filtros = {clave: valor for clave, valor in filtros.items() if valor is not None}
+        desde = datetime.fromisoformat(request.args['desde']) if request.args.get('desde') else None
+        hasta = datetime.fromisoformat(request.args['hasta']) if request.args.get('hasta') else None
+    except ValueError as e:
+        return jsonify({"error": f"Parámetro inválido: {e}"}), 400
+
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    por_pagina = min(max(request.args.get('por_pagina', POR_PAGINA, type=int), 1), 500)
+    if request.args.get('proximas_horas'):
+        funciones = facade.catalogo.proximas(request.args.get('proximas_horas', type=float) or 0, desde, **filtros)
+    elif request.args.get('esta_noche'):
+        funciones = facade.catalogo.esta_noche(desde, **filtros)
+    elif hasta is not None:
+        funciones = facade.buscar_funciones(desde, hasta, **filtros)
+    else:
+        funciones, total = facade.catalogo.pagina(pagina, por_pagina, desde, **filtros)
+        return jsonify({"total": total, "pagina": pagina, "funciones": [f.a_dict() for f in funciones]})
+    inicio = (pagina - 1) * por_pagina
+    return jsonify({"total": len(funciones), "pagina": pagina,
+                    "funciones": [f.a_dict() for f in funciones[inicio:inicio + por_pagina]]})
+
+@app.route('/api/menu')
+def menu_json():
+    cuerpo = respuestas.obtener("menu_json", cine_controller.version_menu,
+                                lambda: json.dumps(cine_controller.get_menu()).encode('utf-8'))
+    return Response(cuerpo, mimetype='application/json')
+
+def _periodo_ventas() -> tuple[datetime | None, datetime | None]:
+    desde = datetime.fromisoformat(request.args['desde']) if request.args.get('desde') else None
+    hasta = datetime.fromisoformat(request.args['hasta']) if request.args.get('hasta') else None
+    return desde, hasta
+
+@app.route('/api/ventas/reporte')
+def reporte_ventas():
+    """Ocupación e ingresos de las ventas; por=funcion|sala|combo y periodo desde/hasta (ISO 8601)."""
+    if facade is None:
+        return jsonify({"error": "Sistema no disponible"}), 500
+    try:
+        desde, hasta = _periodo_ventas()
+    except ValueError as e:
+        return jsonify({"error": f"Parámetro inválido: {e}"}), 400
+    ok, error, reporte = facade.reporte_ventas(request.args.get('por', 'funcion'), desde, hasta)
+    if not ok:
+        return jsonify({"error": error}), 400
+    return jsonify(reporte)
+
+@app.route('/api/ventas/exportar')
+def exportar_ventas():
+    """Todas las ventas del periodo desde/hasta, una por línea (formato=csv|ndjson), en streaming."""
+    if facade is None:
+        return jsonify({"error": "Sistema no disponible"}), 500
+    formato = request.args.get('formato', 'csv')
+    try:
+        desde, hasta = _periodo_ventas()
+    except ValueError as e:
+        return jsonify({"error": f"Parámetro inválido: {e}"}), 400
+    ok, error, fragmentos = facade.exportar_ventas(formato, desde, hasta)
+    if not ok:
+        return jsonify({"error": error}), 400
+    return Response(fragmentos, mimetype=FORMATOS_EXPORTACION[formato],
+                    headers={'Content-Disposition': f'attachment; filename=ventas.{formato}'})
+
 @app.route('/comprar/<asiento>')
 def comprar(asiento):
     if facade is None:
         return jsonify({"error": "Sistema no disponible"}), 500
     try:
-        ticket_html = facade.comprar_entrada(asiento, "regular")
+        ticket_html = facade.comprar_entrada(asiento, request.args.get('tipo_venta', 'regular'))
         return jsonify({"ticket": ticket_html})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error processing purchase: {e}")
+        logger.error("Error processing purchase: %s", e)
         return jsonify({"error": "Error processing purchase"}), 500
 
 @app.route('/sala/<sala_id>')
 def sala(sala_id):
-    logger.info(f"Accediendo a sala: {sala_id}")
+    logger.debug("Accediendo a sala: %s", sala_id)
     if facade is None:
         logger.error("Sistema no disponible al intentar acceder a sala")
         return "Error: Sistema no disponible", 500
     try:
-        logger.info(f"Renderizando sala {sala_id}")
-        return render_template('compra.html', sala_id=sala_id)
+        logger.debug("Renderizando sala %s", sala_id)
+        return render_template('compra.html', sala_id=sala_id, funcion=request.args.get('funcion', ''))
     except Exception as e:
-        logger.error(f"Error al renderizar sala {sala_id}: {e}")
+        logger.error("Error al renderizar sala %s: %s", sala_id, e)
         return "Error: No se pudo cargar la sala", 500
 
 @app.route('/procesar_compra', methods=['POST'])  # Cambiar ruta de /comprar a /procesar_compra
+@admitir(tasa_compras, compras_por_funcion, funcion_de_solicitud)
+@idempotente(compras_idempotentes)
 def procesar_compra():
     if facade is None:
         return jsonify({"success": False, "error": "Sistema no disponible"}), 500
     try:
         data = request.get_json()
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({"success": False, "error": "Datos inválidos"}), 400
             
         asientos = data.get('asientos', [])
         payment_data = data.get('payment_data', {})
+        sala_id = data.get('sala')
+        funcion = data.get('funcion')
+        retencion_id = data.get('retencion_id')
+        formato = data.get('formato', 'html')  # "html", "lote" o "json"
+        entregas = data.get('entregas')  # Canales en cola y destino, p. ej. {"correo": "ana@mail.co"}
+        tipo_venta = data.get('tipo_venta', 'regular')
         
-        if not asientos:
+        if retencion_id:
+            # Convertir en venta los asientos retenidos durante la selección
+            success, error, tickets = facade.confirmar_retencion(retencion_id, payment_data, formato, entregas)
+        elif not asientos:
             return jsonify({"success": False, "error": "No se seleccionaron asientos"}), 400
-        
-        # Procesar la compra usando el facade
-        success, error, tickets = facade.procesar_compra(asientos, payment_data)
+        else:
+            # Procesar la compra usando el facade
+            success, error, tickets = facade.procesar_compra(asientos, payment_data, sala_id, funcion, formato,
+                                                             entregas, tipo_venta)
         
         if not success:
             return jsonify({"success": False, "error": error}), 400
@@ -106,32 +338,216 @@ def procesar_compra():
         })
         
     except Exception as e:
-        logger.error(f"Error processing purchase: {str(e)}")
+        logger.error("Error processing purchase: %s", e)
+        return jsonify({"success": False, "error": "Error en el procesamiento de la compra"}), 500
+
+@app.route('/procesar_compra_lote', methods=['POST'])
+@admitir(tasa_compras)
+@idempotente(compras_idempotentes)
+def procesar_compra_lote():
+    if facade is None:
+        return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+    try:
+        data = request.get_json()
+        if (not isinstance(data, dict) or not isinstance(data.get('ordenes'), list)
+                or not all(isinstance(orden, dict) for orden in data['ordenes'])):
+            return jsonify({"success": False, "error": "Datos inválidos"}), 400
+
+        # Los datos de pago pueden venir por orden o una sola vez para todo el lote
+        pago_comun = data.get('payment_data', {})
+        ordenes = [dict(orden, payment_data=orden.get('payment_data', pago_comun)) for orden in data['ordenes']]
+        resultados = facade.procesar_compra_lote(ordenes, data.get('formato', 'json'))
+        exitosas = sum(1 for resultado in resultados if resultado["success"])
+        return jsonify({
+            "success": exitosas == len(resultados),
+            "exitosas": exitosas,
+            "fallidas": len(resultados) - exitosas,
+            "resultados": resultados
+        })
+    except Exception as e:
+        logger.error("Error processing bulk purchase: %s", e)
         return jsonify({"success": False, "error": "Error en el procesamiento de la compra"}), 500
 
 @app.route('/asientos-ocupados/<sala_id>')
+@admitir(tasa_consultas)
 def obtener_asientos_ocupados(sala_id):
-    logger.info(f"Consultando asientos ocupados para sala: {sala_id}")
+    logger.debug("Consultando asientos ocupados para sala: %s", sala_id)
     try:
         if facade is None:
-            return jsonify([]), 500
-        # Usar el estado de asientos del facade
-        asientos = list(facade.obtener_asientos_ocupados().keys())
-        logger.info(f"Asientos ocupados en {sala_id}: {asientos}")
-        return jsonify(asientos)
+            return jsonify({"ocupados": [], "retenidos": []}), 500
+        # Usar el inventario del facade para la función solicitada
+        funcion = request.args.get('funcion')
+        desde = request.args.get('since', type=int)
+        espera = min(request.args.get('wait', 0, type=float), ESPERA_MAXIMA)
+        if desde is not None and espera > 0:
+            # Long-poll: responder apenas cambie algo o al vencer la espera
+            if not observadores.entrar():
+                return rechazar_observador()
+            try:
+                facade.esperar_cambios_asientos(sala_id, funcion, desde, espera)
+            finally:
+                observadores.salir()
+
+        estado = facade.estado_asientos(sala_id, funcion, desde)
+        if estado.get("cambios", True) == {}:
+            return "", 304
+        respuesta = jsonify(estado)
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        if desde is None:
+            respuesta.set_etag(f"{sala_id}:{funcion or ''}:{estado['version']}")
+            respuesta = respuesta.make_conditional(request)
+        return respuesta
+    except Exception as e:
+        logger.error("Error obteniendo asientos ocupados para %s: %s", sala_id, e)
+        return jsonify({"ocupados": [], "retenidos": []}), 500
+
+@app.route('/asientos-ocupados/<sala_id>/stream')
+@admitir(tasa_consultas)
+def stream_asientos_ocupados(sala_id):
+    """Server-Sent Events: envía el estado inicial y luego solo los cambios de la función."""
+    if facade is None:
+        return "Error: Sistema no disponible", 500
+    funcion = request.args.get('funcion')
+    desde = request.headers.get('Last-Event-ID', type=int)
+    if not observadores.entrar():
+        return rechazar_observador()
+
+    def eventos():
+        version = desde
+        fin = time.monotonic() + DURACION_STREAM
+        yield "retry: 3000\n\n"
+        while time.monotonic() < fin:
+            estado = facade.estado_asientos(sala_id, funcion, version)
+            if estado.get("cambios", True) == {}:
+                yield ": ping\n\n"
+            else:
+                version = estado["version"]
+                yield f"id: {version}\ndata: {json.dumps(estado)}\n\n"
+            facade.esperar_cambios_asientos(sala_id, funcion, version, INTERVALO_PING)
+
+    respuesta = Response(eventos(), mimetype='text/event-stream',
+                         headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # El lugar se libera al cerrar la respuesta, aunque el cliente se desconecte antes del primer evento
+    respuesta.call_on_close(observadores.salir)
+    return respuesta
+
+@app.route('/retener', methods=['POST'])
+@admitir(tasa_compras, compras_por_funcion, funcion_de_solicitud)
+def retener_asientos():
+    if facade is None:
+        return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data, dict):
+            return jsonify({"success": False, "error": "Datos inválidos"}), 400
+
+        asientos = data.get('asientos', [])
+        tipo_venta = data.get('tipo_venta', 'regular')
+        if data.get('cantidad') is not None:
+            # Taquilla/kiosco: retener los mejores asientos contiguos en lugar de unos elegidos
+            try:
+                cantidad = int(data['cantidad'])
+            except (TypeError, ValueError):
+                return jsonify({"success": False, "error": "Cantidad inválida"}), 400
+            ok, error, retencion_id, asientos, precios = facade.retener_mejores_asientos(
+                cantidad, data.get('sala'), data.get('funcion'), data.get('ttl'), tipo_venta)
+        else:
+            ok, error, retencion_id, precios = facade.retener_asientos(
+                asientos, data.get('sala'), data.get('funcion'), data.get('ttl'), tipo_venta)
+        if not ok:
+            return jsonify({"success": False, "error": error}), 409
+        # Precios fijos de la retención: son los que se cobran al confirmarla
+        return jsonify({"success": True, "retencion_id": retencion_id, "asientos": asientos,
+                        "precios": precios, "total": sum(precios)})
+    except Exception as e:
+        logger.error("Error reteniendo asientos: %s", e)
+        return jsonify({"success": False, "error": "Error reteniendo los asientos"}), 500
+
+@app.route('/api/cotizar', methods=['POST'])
+@admitir(tasa_consultas)
+def cotizar():
+    """
+    Cotiza en una sola llamada una selección de asientos ('asientos', 'sala', 'funcion') o una
+    cuadrícula de funciones ('funciones': [{"sala": ..., "funcion": ...}]), con 'tipo_venta'.
+    """
+    if facade is None:
+        return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({"success": False, "error": "Datos inválidos"}), 400
+        tipo_venta = data.get('tipo_venta', 'regular')
+        if not isinstance(tipo_venta, str):
+            return jsonify({"success": False, "error": "Tipo de venta inválido"}), 400
+        if 'funciones' in data:
+            pedidas = data['funciones'] or []
+            if not isinstance(pedidas, list) or not all(
+                    isinstance(pedida, dict) and _es_texto_opcional(pedida.get('sala'))
+                    and _es_texto_opcional(pedida.get('funcion')) for pedida in pedidas):
+                return jsonify({"success": False, "error": "Funciones inválidas"}), 400
+            funciones = []
+            for pedida in pedidas:
+                funcion = facade.catalogo.obtener(*facade._resolver_funcion(pedida.get('sala'), pedida.get('funcion')))
+                if funcion is None:
+                    return jsonify({"success": False, "error": f"Función no encontrada: {pedida}"}), 404
+                funciones.append(funcion)
+            ok, error, cotizacion = facade.cotizar_funciones(funciones, tipo_venta)
+            if not ok:
+                return jsonify({"success": False, "error": error}), 400
+            return jsonify({"success": True, "funciones": cotizacion})
+        asientos = data.get('asientos') or []
+        if not isinstance(asientos, list) or not _es_texto_opcional(data.get('sala')) \
+                or not _es_texto_opcional(data.get('funcion')):
+            return jsonify({"success": False, "error": "Datos inválidos"}), 400
+        ok, error, cotizacion = facade.cotizar_asientos(asientos, data.get('sala'), data.get('funcion'), tipo_venta)
+        if not ok:
+            return jsonify({"success": False, "error": error}), 400
+        return jsonify(dict(cotizacion, success=True))
     except Exception as e:
-        logger.error(f"Error obteniendo asientos ocupados para {sala_id}: {e}")
-        return jsonify([]), 500
+        logger.error("Error cotizando: %s", e)
+        return jsonify({"success": False, "error": "Error cotizando"}), 500
 
-@app.route('/static/<path:filename>')
+@app.route('/mejores-asientos/<sala_id>')
+@admitir(tasa_consultas)
+def mejores_asientos(sala_id):
+    if facade is None:
+        return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+    cantidad = request.args.get('cantidad', 1, type=int)
+    ok, error, asientos = facade.mejores_asientos(cantidad, sala_id, request.args.get('funcion') or None)
+    if not ok:
+        return jsonify({"success": False, "error": error}), 409
+    return jsonify({"success": True, "asientos": asientos})
+
+@app.route('/retener/<retencion_id>/extender', methods=['POST'])
+def extender_retencion(retencion_id):
+    if facade is None:
+        return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+    data = request.get_json(silent=True) or {}
+    ok, error = facade.extender_retencion(retencion_id, data.get('ttl'))
+    if not ok:
+        return jsonify({"success": False, "error": error}), 404
+    return jsonify({"success": True})
+
+@app.route('/retener/<retencion_id>', methods=['DELETE'])
+def liberar_retencion(retencion_id):
+    if facade is None:
+        return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+    ok, error = facade.liberar_retencion(retencion_id)
+    if not ok:
+        return jsonify({"success": False, "error": error}), 404
+    return jsonify({"success": True})
+
+@app.route('/static/<path:filename>', endpoint='static')
 def static_files(filename):
-    return app.send_static_file(filename)
+    return activos.responder(filename)
 
 @app.route("/comprar-combo", methods=["POST"])  # Nueva ruta para combos
+@admitir(tasa_compras)
+@idempotente(compras_idempotentes)
 def comprar_combo():
     try:
         data = request.get_json()
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({"success": False, "error": "Datos inválidos"}), 400
 
         combo = data.get('combo')
@@ -140,25 +556,30 @@ def comprar_combo():
         if not combo or not payment_data:
             return jsonify({"success": False, "error": "Datos incompletos"}), 400
 
-        ok, resultado = cine_controller.comprar_combo(combo, payment_data)
+        if facade is None:
+            return jsonify({"success": False, "error": "Sistema no disponible"}), 500
+        ok, resultado = facade.comprar_combo(combo, payment_data, data.get('entregas'),
+                                             data.get('sala'), data.get('funcion'))
         if ok:
             return jsonify({"success": True, "ticket": resultado})
         else:
             return jsonify({"success": False, "error": resultado}), 400
     except Exception as e:
-        logger.error(f"Error comprando combo: {str(e)}")
+        logger.error("Error comprando combo: %s", e)
         return jsonify({"success": False, "error": "Error procesando la compra"}), 500
 
 @app.errorhandler(404)
 def not_found_error(error):
-    logger.error(f"Página no encontrada: {request.url}")
+    logger.error("Página no encontrada: %s", request.url)
     return render_template('404.html'), 404
 
 @app.errorhandler(500)
 def internal_error(error):
-    logger.error(f"Error interno del servidor: {error}")
+    logger.error("Error interno del servidor: %s", error)
     return render_template('500.html'), 500
 
 if __name__ == '__main__':
+    # Modo desarrollo (debug y recarga de plantillas); en producción usar servidor.py
     # Disable reloader for Python 3.13 compatibility
+    abrir_diario()
     app.run(debug=True, use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+Benchmark de carga de los endpoints de app.py: latencia p50/p95/p99 y throughput.
+
+Mide `/`, `/sala/<id>`, `/asientos-ocupados/<id>`, `/procesar_compra` y `/comprar-combo` de
+dos formas:
+    cliente   Flask test client en el mismo proceso (costo de la aplicación, sin red).
+    servidor  Servidor WSGI local con hilos y clientes HTTP concurrentes.
+
+Las compras usan una función distinta cada pocas solicitudes para que todas tengan asientos
+libres; el escenario con contención está en bench_estreno.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_endpoints [--modo ambos] [--solicitudes 500] [--concurrencia 8]
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+from models.pagos import TARJETA_PRUEBA
+
+from .medicion import cargar_app, guardar, registrar_funciones, resumir
+
+SALA = "Sala_IMAX"
+
+
+def solicitudes(capacidad: int, ronda: str) -> dict:
+    """
+    Retorna, por endpoint, una función que recibe el número de solicitud y produce
+    (método, ruta, cuerpo JSON o None, códigos esperados). `ronda` separa las funciones
+    usadas por las compras de cada modo.
+    """
+    pares = capacidad // 2
+
+    def compra(i: int):
+        n = 2 * (i % pares) + 1
+        return ("POST", "/procesar_compra", {
+            "asientos": [f"{SALA}-{n}", f"{SALA}-{n + 1}"],
+            "funcion": f"bench-{ronda}-{i // pares}",
+            "formato": "json",
+            "payment_data": TARJETA_PRUEBA,
+        }, (200,))
+
+    return {
+        "/": lambda i: ("GET", "/", None, (200,)),
+        "/sala/<id>": lambda i: ("GET", f"/sala/{SALA}", None, (200,)),
+        "/asientos-ocupados/<id>": lambda i: ("GET", f"/asientos-ocupados/{SALA}", None, (200,)),
+        "/procesar_compra": compra,
+        "/comprar-combo": lambda i: ("POST", "/comprar-combo",
+                                     {"combo": "combo1", "payment_data": TARJETA_PRUEBA}, (200,)),
+    }
+
+
+def medir(enviar, generar, total: int, concurrencia: int) -> dict:
+    """
+    Ejecuta `total` solicitudes repartidas entre `concurrencia` hilos.
+
+    Args:
+        enviar: Función (método, ruta, cuerpo) -> código HTTP.
+        generar: Función número de solicitud -> (método, ruta, cuerpo, códigos esperados).
+    """
+    contador = itertools.count()
+    latencias: list[float] = []
+    errores = 0
+    registro = threading.Lock()
+
+    def trabajador():
+        nonlocal errores
+        propias, fallidas = [], 0
+        while (i := next(contador)) < total:
+            metodo, ruta, cuerpo, esperados = generar(i)
+            t0 = time.perf_counter()
+            estado = enviar(metodo, ruta, cuerpo)
+            propias.append(time.perf_counter() - t0)
+            if estado not in esperados:
+                fallidas += 1
+        with registro:
+            latencias.extend(propias)
+            errores += fallidas
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        for _ in range(concurrencia):
+            pool.submit(trabajador)
+    resultado = resumir(latencias, time.perf_counter() - t0)
+    resultado["errores"] = errores
+    return resultado
+
+
+def enviar_cliente(flask_app):
+    local = threading.local()
+
+    def enviar(metodo: str, ruta: str, cuerpo: dict | None) -> int:
+        cliente = getattr(local, "cliente", None)
+        if cliente is None:
+            cliente = local.cliente = flask_app.test_client()
+        return cliente.open(ruta, method=metodo, json=cuerpo).status_code
+    return enviar
+
+
+def enviar_http(puerto: int):
+    def enviar(metodo: str, ruta: str, cuerpo: dict | None) -> int:
+        conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=30)
+        try:
+            datos = None if cuerpo is None else json.dumps(cuerpo).encode("utf-8")
+            conexion.request(metodo, ruta, body=datos, headers={"Content-Type": "application/json"})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            return respuesta.status
+        finally:
+            conexion.close()
+    return enviar
+
+
+def iniciar_servidor(flask_app):
+    """Inicia un servidor WSGI con hilos en un puerto libre; retorna (servidor, puerto)."""
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    servidor = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, servidor.server_port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modo", default="ambos", choices=["cliente", "servidor", "ambos"])
+    parser.add_argument("--solicitudes", type=int, default=500, help="solicitudes por endpoint")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--salida", default=None, help="directorio de resultados")
+    args = parser.parse_args()
+
+    modulo_app = cargar_app()
+    modos = ["cliente", "servidor"] if args.modo == "ambos" else [args.modo]
+
+    resultados = {"solicitudes": args.solicitudes, "concurrencia": args.concurrencia}
+    for modo in modos:
+        servidor = None
+        if modo == "cliente":
+            enviar = enviar_cliente(modulo_app.app)
+        else:
+            servidor, puerto = iniciar_servidor(modulo_app.app)
+            enviar = enviar_http(puerto)
+        generadores = solicitudes(modulo_app.facade.inventario.capacidad, modo)
+        pares = modulo_app.facade.inventario.capacidad // 2
+        registrar_funciones(modulo_app.facade, [f"bench-{modo}-{i}" for i in range(-(-args.solicitudes // pares))])
+        # Existencias suficientes para que ninguna compra de combo falle por agotado
+        concesion = modulo_app.facade.concesion
+        for item in ("Crispetas Medianas", "Gaseosa 16oz"):
+            concesion.reponer(item, args.solicitudes)
+        resultados[modo] = {}
+        print(f"[{modo}]")
+        print(f"  {'endpoint':<26}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}")
+        for endpoint, generar in generadores.items():
+            medicion = medir(enviar, generar, args.solicitudes, args.concurrencia)
+            resultados[modo][endpoint] = medicion
+            print(f"  {endpoint:<26}{medicion['por_segundo']:>10.0f}{medicion['p50_ms']:>10.2f}"
+                  f"{medicion['p95_ms']:>10.2f}{medicion['p99_ms']:>10.2f}{medicion['errores']:>9}")
+        if servidor is not None:
+            servidor.shutdown()
+
+    print(f"resultados: {guardar('endpoints', resultados, args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Escenario "noche de estreno": muchos clientes compiten por los mismos asientos.
+
+Cada cliente (un hilo) consulta el estado de la sala, elige los asientos libres más cercanos al
+centro (los más disputados), los retiene con POST /retener y paga con /procesar_compra. Si
+otro cliente se los ganó (409) vuelve a consultar y reintenta, hasta comprar o hasta que la
+función se agote. Se repite por varias funciones y se reporta la latencia de cada paso, los
+conflictos, los rechazos del control de admisión (429/503, que se reintentan tras el
+Retry-After) y el tiempo hasta agotar la sala. Al final se comprueba que ningún asiento se vendió
+dos veces.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_estreno [--clientes 64] [--rondas 5] [--modo servidor]
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+
+from models.pagos import TARJETA_PRUEBA
+
+from .bench_endpoints import iniciar_servidor
+from .medicion import cargar_app, guardar, registrar_funciones, resumir
+
+SALA = "Sala_IMAX"
+RECHAZOS = (429, 503)
+
+rechazos = {"total": 0}
+_candado_rechazos = threading.Lock()
+
+
+def _reintentar(enviar_una_vez):
+    """Reintenta las solicitudes rechazadas por el control de admisión tras su Retry-After."""
+    def enviar(metodo: str, ruta: str, cuerpo: dict | None = None) -> tuple[int, dict]:
+        while True:
+            codigo, contenido, reintento = enviar_una_vez(metodo, ruta, cuerpo)
+            if codigo not in RECHAZOS:
+                return codigo, contenido
+            with _candado_rechazos:
+                rechazos["total"] += 1
+            time.sleep(float(reintento or 1))
+    return enviar
+
+
+def cliente_http(puerto: int):
+    def enviar(metodo: str, ruta: str, cuerpo: dict | None = None) -> tuple[int, dict, str | None]:
+        conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=30)
+        try:
+            datos = None if cuerpo is None else json.dumps(cuerpo).encode("utf-8")
+            conexion.request(metodo, ruta, body=datos, headers={"Content-Type": "application/json"})
+            respuesta = conexion.getresponse()
+            contenido = respuesta.read()
+            return (respuesta.status, json.loads(contenido) if contenido else {},
+                    respuesta.getheader("Retry-After"))
+        finally:
+            conexion.close()
+    return _reintentar(enviar)
+
+
+def cliente_flask(flask_app):
+    local = threading.local()
+
+    def enviar(metodo: str, ruta: str, cuerpo: dict | None = None) -> tuple[int, dict, str | None]:
+        cliente = getattr(local, "cliente", None)
+        if cliente is None:
+            cliente = local.cliente = flask_app.test_client()
+        respuesta = cliente.open(ruta, method=metodo, json=cuerpo)
+        return respuesta.status_code, respuesta.get_json(silent=True) or {}, respuesta.headers.get("Retry-After")
+    return _reintentar(enviar)
+
+
+def preferencia(capacidad: int) -> list[int]:
+    """Asientos ordenados del más deseado (centro de la sala) al menos deseado."""
+    centro = (capacidad + 1) / 2
+    return sorted(range(1, capacidad + 1), key=lambda n: (abs(n - centro), n))
+
+
+def ronda(enviar, funcion: str, clientes: int, capacidad: int, semilla: int) -> dict:
+    """Ejecuta un estreno sobre `funcion` y retorna sus mediciones."""
+    orden = preferencia(capacidad)
+    latencias = {"estado": [], "retener": [], "comprar": []}
+    comprados: list[int] = []
+    conflictos = 0
+    agotado = None
+    registro = threading.Lock()
+    inicio = threading.Barrier(clientes + 1)
+    consulta = f"/asientos-ocupados/{SALA}?funcion={funcion}"
+
+    def cliente(i: int):
+        nonlocal conflictos, agotado
+        azar = random.Random(semilla * 1000 + i)
+        cantidad = azar.randint(1, 4)
+        propias = {clave: [] for clave in latencias}
+        choques = 0
+        inicio.wait()
+        while True:
+            t0 = time.perf_counter()
+            _, estado = enviar("GET", consulta)
+            propias["estado"].append(time.perf_counter() - t0)
+            ocupados = {int(a.rsplit("-", 1)[1]) for a in estado.get("ocupados", []) + estado.get("retenidos", [])}
+            libres = [n for n in orden if n not in ocupados]
+            if len(libres) < cantidad:
+                break
+            # Los mejores asientos libres, con algo de azar entre los primeros
+            elegidos = sorted(azar.sample(libres[:cantidad * 2], cantidad))
+            asientos = [f"{SALA}-{n}" for n in elegidos]
+
+            t0 = time.perf_counter()
+            codigo, retencion = enviar("POST", "/retener", {"asientos": asientos, "funcion": funcion})
+            propias["retener"].append(time.perf_counter() - t0)
+            if codigo != 200:
+                choques += 1
+                continue
+
+            t0 = time.perf_counter()
+            codigo, _ = enviar("POST", "/procesar_compra", {"retencion_id": retencion["retencion_id"],
+                                                           "payment_data": TARJETA_PRUEBA, "formato": "json"})
+            propias["comprar"].append(time.perf_counter() - t0)
+            if codigo == 200:
+                with registro:
+                    comprados.extend(elegidos)
+            break
+        with registro:
+            for clave, valores in propias.items():
+                latencias[clave].extend(valores)
+            conflictos += choques
+            agotado = time.perf_counter()
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    inicio.wait()
+    t0 = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    segundos = (agotado or time.perf_counter()) - t0
+    return {
+        "segundos": segundos,
+        "asientos_vendidos": len(comprados),
+        "dobles": len(comprados) - len(set(comprados)),
+        "conflictos": conflictos,
+        "comprados": comprados,
+        "latencias": latencias,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=64)
+    parser.add_argument("--rondas", type=int, default=5)
+    parser.add_argument("--modo", default="servidor", choices=["cliente", "servidor"])
+    parser.add_argument("--salida", default=None, help="directorio de resultados")
+    args = parser.parse_args()
+
+    modulo_app = cargar_app()
+    facade = modulo_app.facade
+    if args.modo == "servidor":
+        servidor, puerto = iniciar_servidor(modulo_app.app)
+        enviar = cliente_http(puerto)
+    else:
+        servidor, enviar = None, cliente_flask(modulo_app.app)
+
+    latencias = {"estado": [], "retener": [], "comprar": []}
+    rondas = []
+    prefijo = time.strftime("estreno-%H%M%S")
+    registrar_funciones(facade, [f"{prefijo}-{r}" for r in range(args.rondas)])
+    for r in range(args.rondas):
+        funcion = f"{prefijo}-{r}"
+        resultado = ronda(enviar, funcion, args.clientes, facade.inventario.capacidad, r)
+        vendidos = {int(a.rsplit("-", 1)[1]) for a in facade.listar_asientos_ocupados(SALA, funcion)}
+        assert resultado["dobles"] == 0, f"{resultado['dobles']} asientos vendidos dos veces"
+        assert vendidos == set(resultado["comprados"]), "el inventario no coincide con las compras"
+        for clave, valores in resultado.pop("latencias").items():
+            latencias[clave].extend(valores)
+        del resultado["comprados"]
+        rondas.append(resultado)
+        print(f"ronda {r}: {resultado['asientos_vendidos']} asientos en {resultado['segundos'] * 1000:.0f} ms, "
+              f"{resultado['conflictos']} conflictos")
+    if servidor is not None:
+        servidor.shutdown()
+
+    total = sum(r["segundos"] for r in rondas)
+    print(f"rechazos del control de admisión (reintentados): {rechazos['total']}")
+    resultados = {"clientes": args.clientes, "modo": args.modo, "rondas": rondas, "rechazos": rechazos["total"],
+                  "pasos": {clave: resumir(valores, total) for clave, valores in latencias.items()}}
+    print(f"  {'paso':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for clave, medicion in resultados["pasos"].items():
+        print(f"  {clave:<10}{medicion['por_segundo']:>10.0f}{medicion['p50_ms']:>10.2f}"
+              f"{medicion['p95_ms']:>10.2f}{medicion['p99_ms']:>10.2f}")
+    print(f"resultados: {guardar('estreno', resultados, args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark de ventas en bloque: compara procesar_compra_lote contra un ciclo de procesar_compra.
+
+Genera órdenes de 2 asientos repartidas en muchas funciones y mide asientos vendidos por
+segundo con cada camino sobre un CineFacade nuevo.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_lote [--funciones 500] [--formato json]
+"""
+
+import argparse
+import time
+
+from models.facade import CineFacade
+
+from .medicion import registrar_funciones
+
+PAGO_PRUEBA = {"cardNumber": "4242424242424242", "cardExpiry": "12/25", "cardCvv": "123"}
+
+
+def generar_ordenes(facade: CineFacade, num_funciones: int) -> list[dict]:
+    ordenes = []
+    registrar_funciones(facade, [f"F{f}" for f in range(num_funciones)])
+    for f in range(num_funciones):
+        funcion = f"F{f}"
+        for n in range(1, facade.inventario.capacidad + 1, 2):
+            ordenes.append({
+                "asientos": [f"{facade.sala_id}-{n}", f"{facade.sala_id}-{n + 1}"],
+                "sala": facade.sala_id,
+                "funcion": funcion,
+                "payment_data": PAGO_PRUEBA,
+            })
+    return ordenes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--funciones", type=int, default=500)
+    parser.add_argument("--formato", default="json", choices=["html", "lote", "json"])
+    args = parser.parse_args()
+
+    facade = CineFacade()
+    ordenes = generar_ordenes(facade, args.funciones)
+    asientos = sum(len(o["asientos"]) for o in ordenes)
+
+    t0 = time.perf_counter()
+    for orden in ordenes:
+        facade.procesar_compra(orden["asientos"], orden["payment_data"], orden["sala"], orden["funcion"],
+                               args.formato)
+    ciclo = time.perf_counter() - t0
+
+    facade = CineFacade()
+    registrar_funciones(facade, {orden["funcion"] for orden in ordenes})
+    t0 = time.perf_counter()
+    resultados = facade.procesar_compra_lote(ordenes, args.formato)
+    lote = time.perf_counter() - t0
+    assert all(r["success"] for r in resultados)
+
+    print(f"órdenes: {len(ordenes)}  asientos: {asientos}")
+    print(f"ciclo procesar_compra:  {asientos / ciclo:>12.0f} asientos/s")
+    print(f"procesar_compra_lote:   {asientos / lote:>12.0f} asientos/s  (x{ciclo / lote:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Micro-benchmarks de las rutas calientes de los modelos.
+
+Mide, en nanosegundos por operación (mejor de varias repeticiones):
+    - FoodCombo.get_price con el precio memoizado y recalculado tras invalidar un ítem.
+    - Renderizado de tickets (uno por asiento, lote y JSON) para una compra de 4 asientos.
+    - Verificación de asientos: numero_asiento, esta_libre y verificar_disponibilidad.
+    - Cotización de 4 asientos: la tabla de precios sola y con la consulta de la función.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_micro [--repeticiones 5]
+"""
+
+import argparse
+import timeit
+
+from models.facade import CineFacade
+from models.precios import PRECIO_BASE
+from models.tickets import renderizador
+
+from .medicion import guardar
+
+
+def casos(facade: CineFacade) -> dict:
+    """Retorna, por nombre, la función a medir."""
+    combo_max = facade.menu_combos[-1]
+    hotdog = combo_max.items[-1]
+    sala_id, funcion = facade.sala_id, facade.hora
+    asientos = [f"{sala_id}-{n}" for n in range(13, 17)]
+    numeros = list(range(13, 17))
+    inicio = facade.catalogo.obtener(sala_id, funcion).inicio
+    facade.inventario.reservar(sala_id, funcion, [1, 2, 3])
+
+    def precio_recalculado():
+        hotdog.price = hotdog.price  # Invalida la memoización de toda la cadena de combos
+        return combo_max.get_price()
+
+    return {
+        "combo.get_price (memoizado)": combo_max.get_price,
+        "combo.get_price (recalculado)": precio_recalculado,
+        "ticket html x4": lambda: renderizador.entradas(asientos, PRECIO_BASE, "html", sala_id, funcion),
+        "ticket lote x4": lambda: renderizador.entradas(asientos, PRECIO_BASE, "lote", sala_id, funcion),
+        "ticket json x4": lambda: renderizador.entradas(asientos, PRECIO_BASE, "json", sala_id, funcion),
+        "inventario.numero_asiento": lambda: facade.inventario.numero_asiento(sala_id, asientos[0]),
+        "inventario.esta_libre": lambda: facade.inventario.esta_libre(sala_id, funcion, 13),
+        "verificar_disponibilidad x4": lambda: facade.verificar_disponibilidad(asientos, sala_id, funcion),
+        "precios.cotizar x4": lambda: facade.precios.cotizar("IMAX", inicio, 3, numeros),
+        "precios_asientos x4": lambda: facade.precios_asientos(sala_id, funcion, numeros),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default=None, help="directorio de resultados")
+    args = parser.parse_args()
+
+    resultados = {}
+    for nombre, funcion in casos(CineFacade()).items():
+        temporizador = timeit.Timer(funcion)
+        numero, _ = temporizador.autorange()
+        mejor = min(temporizador.repeat(repeat=args.repeticiones, number=numero)) / numero
+        resultados[nombre] = {"ns_por_op": mejor * 1e9, "ops_por_segundo": 1 / mejor}
+        print(f"{nombre:<34}{mejor * 1e9:>12.0f} ns/op")
+
+    print(f"resultados: {guardar('micro', resultados, args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark del inventario compartido: throughput con 1 proceso contra N procesos.
+
+Cada proceso abre su propio CineFacade sobre la misma base SQLite (como los workers de
+gunicorn) e intenta comprar pares de asientos al azar en un conjunto de funciones. Al final
+se comprueba que ningún asiento se vendió dos veces: los asientos vendidos en la base deben
+coincidir exactamente con la suma de las compras exitosas de todos los procesos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_multiproceso [--procesos 4] [--intentos 2000] [--funciones 50]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from models.facade import CineFacade
+from models.inventario_compartido import InventarioCompartido
+from models.pagos import TARJETA_PRUEBA
+
+from .medicion import registrar_funciones
+
+
+def trabajador(ruta: str, intentos: int, funciones: int, semilla: int, salida):
+    facade = CineFacade(inventario=InventarioCompartido(ruta))
+    registrar_funciones(facade, [f"F{f}" for f in range(funciones)])
+    azar = random.Random(semilla)
+    capacidad = facade.inventario.capacidad
+    vendidos = 0
+    for _ in range(intentos):
+        n = azar.randint(1, capacidad - 1)
+        asientos = [f"{facade.sala_id}-{n}", f"{facade.sala_id}-{n + 1}"]
+        ok, _, _ = facade.procesar_compra(asientos, TARJETA_PRUEBA, funcion=f"F{azar.randrange(funciones)}",
+                                          formato="json")
+        if ok:
+            vendidos += len(asientos)
+    salida.put(vendidos)
+
+
+def medir(procesos: int, intentos: int, funciones: int) -> tuple[float, int, int]:
+    """Retorna (intentos por segundo, asientos vendidos según los procesos, según la base)."""
+    directorio = tempfile.mkdtemp(prefix="bench_multiproceso_")
+    ruta = os.path.join(directorio, "estado.db")
+    inventario = InventarioCompartido(ruta)  # Crea el esquema antes de lanzar los procesos
+
+    salida = multiprocessing.Queue()
+    por_proceso = intentos // procesos
+    hijos = [multiprocessing.Process(target=trabajador, args=(ruta, por_proceso, funciones, i, salida))
+             for i in range(procesos)]
+    t0 = time.perf_counter()
+    for hijo in hijos:
+        hijo.start()
+    vendidos = sum(salida.get() for _ in hijos)
+    for hijo in hijos:
+        hijo.join()
+    segundos = time.perf_counter() - t0
+
+    en_base = sum(len(inventario.ocupados(sala, funcion)) for sala, funcion, _ in inventario.exportar())
+    return por_proceso * procesos / segundos, vendidos, en_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--intentos", type=int, default=2000)
+    parser.add_argument("--funciones", type=int, default=50)
+    args = parser.parse_args()
+
+    base = None
+    for procesos in sorted({1, args.procesos}):
+        por_segundo, vendidos, en_base = medir(procesos, args.intentos, args.funciones)
+        assert vendidos == en_base, f"doble venta: {vendidos} vendidos, {en_base} en la base"
+        base = base or por_segundo
+        print(f"{procesos:>3} procesos: {por_segundo:>10.0f} compras/s  (x{por_segundo / base:.2f})  "
+              f"asientos vendidos: {en_base}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark de estrés para las reservas de asientos de CineFacade.
+
+Lanza muchos hilos que compiten por los mismos asientos repartidos en un número variable
+de funciones en venta a la vez y verifica que ningún asiento se venda dos veces. Reporta las
+compras exitosas por segundo para cada número de funciones, con los candados por franjas y con
+un solo candado para todo el inventario (línea base), de modo que se vea el efecto de las
+franjas.
+
+Todas las configuraciones venden lo mismo: el plan tiene `hilos * intentos` compras de
+asientos distintos, y cada compra la intentan dos hilos (uno la consigue y el otro encuentra
+el asiento vendido). Con pocas funciones en venta, cuando una se agota sale a la venta la
+siguiente en su lugar, así que ninguna configuración gana throughput con rechazos rápidos de
+funciones agotadas.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_reservas [--hilos 32] [--intentos 1000]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from models.facade import CineFacade
+from models.inventario import InventarioAsientos
+from models.pagos import TARJETA_PRUEBA
+
+from .medicion import registrar_funciones
+
+
+def planificar(num_funciones: int, compras: int, asientos_por_compra: int, capacidad: int,
+               semilla: int = 0) -> list[tuple[str, list[int]]]:
+    """
+    Plan de `compras` compras (función, números) sin asientos repetidos.
+
+    La compra j va a la franja de venta j % num_funciones; cada franja vende sus funciones una
+    tras otra, en grupos de asientos al azar, hasta agotarlas.
+    """
+    rnd = random.Random(semilla)
+    por_funcion = capacidad // asientos_por_compra
+    plan = []
+    grupos: dict[str, list[list[int]]] = {}
+    for j in range(compras):
+        venta, turno = j % num_funciones, j // num_funciones
+        funcion = f"f{venta}-{turno // por_funcion}"
+        if funcion not in grupos:
+            numeros = rnd.sample(range(1, capacidad + 1), por_funcion * asientos_por_compra)
+            grupos[funcion] = [numeros[i:i + asientos_por_compra] for i in range(0, len(numeros), asientos_por_compra)]
+        plan.append((funcion, grupos[funcion][turno % por_funcion]))
+    return plan
+
+
+def ejecutar(num_funciones: int, hilos: int, intentos: int, asientos_por_compra: int,
+             franjas: int | None = None) -> dict:
+    """
+    Ejecuta una ronda del benchmark.
+
+    Args:
+        franjas: Candados del inventario (None = los de InventarioAsientos; 1 = un solo candado).
+
+    Returns:
+        Diccionario con compras exitosas, asientos vendidos, ventas dobles y throughput.
+    """
+    inventario = InventarioAsientos() if franjas is None else InventarioAsientos(franjas=franjas)
+    facade = CineFacade(inventario=inventario)
+    plan = planificar(num_funciones, hilos * intentos, asientos_por_compra, inventario.capacidad)
+    registrar_funciones(facade, {funcion for funcion, _ in plan})
+    vendidos: dict[tuple[str, str], int] = {}
+    exitosas = [0] * hilos
+    registro = threading.Lock()
+    inicio = threading.Barrier(hilos + 1)
+
+    def comprador(hilo: int):
+        # Cada paso intenta la compra propia y la del hilo anterior, que suele llegar antes
+        inicio.wait()
+        for k in range(intentos):
+            for j in (k * hilos + hilo, k * hilos + (hilo - 1) % hilos):
+                funcion, numeros = plan[j]
+                asientos = [f"{facade.sala_id}-{n}" for n in numeros]
+                ok, _, _ = facade.procesar_compra(asientos, TARJETA_PRUEBA, facade.sala_id, funcion)
+                if ok:
+                    exitosas[hilo] += 1
+                    with registro:
+                        for asiento in asientos:
+                            vendidos[(funcion, asiento)] = vendidos.get((funcion, asiento), 0) + 1
+
+    trabajadores = [threading.Thread(target=comprador, args=(i,)) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    inicio.wait()
+    t0 = time.perf_counter()
+    for t in trabajadores:
+        t.join()
+    duracion = time.perf_counter() - t0
+
+    dobles = sum(1 for veces in vendidos.values() if veces > 1)
+    # El inventario debe coincidir exactamente con lo que los compradores creen haber comprado
+    en_inventario = sum(len(facade.listar_asientos_ocupados(facade.sala_id, f)) for f in {funcion for funcion, _ in plan})
+    return {
+        "funciones": num_funciones,
+        "intentos": 2 * hilos * intentos,
+        "compras_exitosas": sum(exitosas),
+        "asientos_vendidos": len(vendidos),
+        "asientos_en_inventario": en_inventario,
+        "ventas_dobles": dobles,
+        "compras_por_segundo": sum(exitosas) / duracion,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--intentos", type=int, default=1000, help="compras del plan por hilo")
+    parser.add_argument("--asientos", type=int, default=2, help="asientos por compra")
+    parser.add_argument("--funciones", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    print(f"{'funciones':>10} {'intentos':>10} {'exitosas':>10} {'dobles':>8} {'compras/s':>12} "
+          f"{'1 candado':>12} {'franjas/1':>10}")
+    fallas = 0
+    for num_funciones in args.funciones:
+        r = ejecutar(num_funciones, args.hilos, args.intentos, args.asientos)
+        base = ejecutar(num_funciones, args.hilos, args.intentos, args.asientos, franjas=1)
+        print(f"{r['funciones']:>10} {r['intentos']:>10} {r['compras_exitosas']:>10} "
+              f"{r['ventas_dobles'] + base['ventas_dobles']:>8} {r['compras_por_segundo']:>12.0f} "
+              f"{base['compras_por_segundo']:>12.0f} {r['compras_por_segundo'] / base['compras_por_segundo']:>9.2f}x")
+        for resultado in (r, base):
+            if (resultado["ventas_dobles"] or resultado["asientos_vendidos"] != resultado["asientos_en_inventario"]
+                    or resultado["compras_exitosas"] != args.hilos * args.intentos):
+                fallas += 1
+    if fallas:
+        raise SystemExit("Se detectaron ventas dobles o inconsistencias en el inventario")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Reportes de ventas sobre un registro con millones de filas.
+
+Llena un RegistroVentas con ventas sintéticas (entradas de muchas funciones y salas, combos y
+algunas reversiones) y mide el tiempo de cada reporte (por función, por sala, por combo y
+resumen, con y sin filtro de periodo) y el throughput de la exportación CSV y NDJSON.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_ventas [--filas 2000000] [--funciones 2000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from models.inventario import ASIENTOS_POR_SALA
+from models.precios import PRECIO_BASE
+from models.ventas import RegistroVentas
+
+from .medicion import guardar
+
+SALAS = 12
+COMBOS = ("combo1", "combo2", "combo3")
+PRECIOS_COMBO = (28000, 45000, 65000)
+POR_COMPRA = 4  # Asientos por compra sintética
+
+
+def llenar(registro: RegistroVentas, filas: int, funciones: int, semilla: int = 0) -> float:
+    """Registra unas `filas` ventas sintéticas y retorna los segundos que tomó."""
+    azar = np.random.default_rng(semilla)
+    instante = time.time() - 30 * 86400
+    paso = 30 * 86400 * POR_COMPRA / filas  # Ventas repartidas en los últimos 30 días
+    t0 = time.perf_counter()
+    registradas = 0
+    while registradas < filas:
+        codigo = int(azar.integers(funciones))
+        sala, funcion = f"Sala_{codigo % SALAS}", f"funcion-{codigo}"
+        if azar.random() < 0.2:
+            combo = int(azar.integers(len(COMBOS)))
+            registro.registrar_combo(COMBOS[combo], PRECIOS_COMBO[combo], sala, funcion, instante=instante)
+            registradas += 1
+        else:
+            numeros = azar.integers(1, ASIENTOS_POR_SALA + 1, POR_COMPRA)
+            unidades = -1 if azar.random() < 0.01 else 1
+            registro.registrar_entradas(sala, funcion, numeros, PRECIO_BASE, unidades, instante=instante)
+            registradas += POR_COMPRA
+        instante += paso
+    return time.perf_counter() - t0
+
+
+def mejor_de(funcion, repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filas", type=int, default=2_000_000)
+    parser.add_argument("--funciones", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", default=None, help="directorio de resultados")
+    args = parser.parse_args()
+
+    registro = RegistroVentas(ASIENTOS_POR_SALA)
+    segundos = llenar(registro, args.filas, args.funciones)
+    print(f"{len(registro)} filas registradas en {segundos:.1f} s ({len(registro) / segundos:.0f} filas/s)")
+
+    mitad = time.time() - 15 * 86400
+    reportes = {
+        "por_funcion": registro.por_funcion,
+        "por_sala": registro.por_sala,
+        "por_combo": registro.por_combo,
+        "resumen": registro.resumen,
+        "por_funcion (periodo)": lambda: registro.por_funcion(desde=mitad),
+    }
+    resultados = {"filas": len(registro), "reportes_ms": {}, "exportacion": {}}
+    for nombre, reporte in reportes.items():
+        ms = mejor_de(reporte, args.repeticiones) * 1000
+        resultados["reportes_ms"][nombre] = ms
+        print(f"  {nombre:<24}{ms:>10.1f} ms")
+
+    for formato in ("csv", "ndjson"):
+        t0 = time.perf_counter()
+        total = sum(len(fragmento) for fragmento in registro.exportar(formato))
+        segundos = time.perf_counter() - t0
+        resultados["exportacion"][formato] = {"segundos": segundos, "filas_por_segundo": len(registro) / segundos,
+                                              "megabytes": total / 1e6}
+        print(f"  exportar {formato:<15}{segundos:>10.2f} s ({len(registro) / segundos:.0f} filas/s, "
+              f"{total / 1e6:.0f} MB)")
+
+    print(f"resultados: {guardar('ventas', resultados, args.salida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compara dos archivos de resultados de la suite y señala las regresiones.
+
+Recorre ambos JSON y compara cada métrica numérica con el mismo camino: las latencias
+(`*_ms`, `ns_por_op`) empeoran si suben y los throughputs (`por_segundo`, `ops_por_segundo`)
+si bajan. Termina con código 1 si alguna métrica empeoró más que el umbral.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.comparar anterior.json actual.json [--umbral 10]
+"""
+
+import argparse
+import json
+import sys
+
+MAYOR_ES_PEOR = ("_ms", "ns_por_op")
+MENOR_ES_PEOR = ("por_segundo",)
+
+
+def metricas(datos, camino: str = "") -> dict[str, float]:
+    """Aplana los resultados en {camino: valor} con solo las métricas comparables."""
+    planas = {}
+    if isinstance(datos, dict):
+        for clave, valor in datos.items():
+            planas.update(metricas(valor, f"{camino}/{clave}" if camino else str(clave)))
+    elif isinstance(datos, list):
+        for indice, valor in enumerate(datos):
+            planas.update(metricas(valor, f"{camino}[{indice}]"))
+    elif isinstance(datos, (int, float)) and camino.endswith(MAYOR_ES_PEOR + MENOR_ES_PEOR):
+        planas[camino] = float(datos)
+    return planas
+
+
+def comparar(anterior: dict, actual: dict, umbral: float) -> list[tuple[str, float, float, float]]:
+    """Retorna (métrica, antes, ahora, % de empeoramiento) de las métricas que superan el umbral."""
+    antes, ahora = metricas(anterior["resultados"]), metricas(actual["resultados"])
+    regresiones = []
+    for camino in sorted(antes.keys() & ahora.keys()):
+        if antes[camino] <= 0:
+            continue
+        cambio = (ahora[camino] - antes[camino]) / antes[camino] * 100
+        empeora = cambio if camino.endswith(MAYOR_ES_PEOR) else -cambio
+        if empeora > umbral:
+            regresiones.append((camino, antes[camino], ahora[camino], empeora))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("anterior")
+    parser.add_argument("actual")
+    parser.add_argument("--umbral", type=float, default=10.0, help="porcentaje tolerado")
+    args = parser.parse_args()
+
+    with open(args.anterior, encoding="utf-8") as archivo:
+        anterior = json.load(archivo)
+    with open(args.actual, encoding="utf-8") as archivo:
+        actual = json.load(archivo)
+    if anterior.get("benchmark") != actual.get("benchmark"):
+        sys.exit(f"Los archivos son de benchmarks distintos: {anterior.get('benchmark')} y {actual.get('benchmark')}")
+
+    regresiones = comparar(anterior, actual, args.umbral)
+    print(f"{anterior.get('commit')} -> {actual.get('commit')}: {len(regresiones)} regresiones (umbral {args.umbral:.0f}%)")
+    for camino, antes, ahora, empeora in regresiones:
+        print(f"  {camino:<50}{antes:>12.2f}{ahora:>12.2f}   +{empeora:.0f}%")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Utilidades comunes de los benchmarks: percentiles de latencia, aplicación Flask aislada y
+archivos de resultados en JSON.
+
+Cada benchmark de la suite guarda un archivo `<nombre>-<fecha>.json` con la fecha, la versión
+de Python, la plataforma, el commit de git (si está disponible) y sus mediciones, para poder
+compararlos entre versiones con `python -m benchmarks.comparar`.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+
+
+def percentil(ordenados: list[float], p: float) -> float:
+    """Percentil `p` (0-100) de una lista ya ordenada, por el método del rango más cercano."""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias: list[float], segundos: float) -> dict:
+    """
+    Resume una serie de latencias (en segundos) medidas durante `segundos` de reloj.
+
+    Returns:
+        Diccionario con cantidad, throughput y p50/p95/p99/máximo/media en milisegundos.
+    """
+    ordenadas = sorted(latencias)
+    return {
+        "solicitudes": len(ordenadas),
+        "por_segundo": len(ordenadas) / segundos if segundos > 0 else 0.0,
+        "p50_ms": percentil(ordenadas, 50) * 1000,
+        "p95_ms": percentil(ordenadas, 95) * 1000,
+        "p99_ms": percentil(ordenadas, 99) * 1000,
+        "max_ms": (ordenadas[-1] if ordenadas else 0.0) * 1000,
+        "media_ms": (sum(ordenadas) / len(ordenadas) if ordenadas else 0.0) * 1000,
+    }
+
+
+def cargar_app():
+    """
+    Importa la aplicación Flask con su diario de ventas en un directorio temporal, para que
+    las compras del benchmark no queden en ./datos.
+    """
+    # Todos los clientes simulados comparten 127.0.0.1: sin límite de tasa por cliente
+    os.environ.setdefault("CINE_TASA_CLIENTE", "0")
+    os.environ.setdefault("CINE_TASA_CONSULTAS", "0")
+    import app as modulo_app
+    modulo_app.abrir_diario(os.environ.get("CINE_DIARIO_DIR") or tempfile.mkdtemp(prefix="bench_diario_"))
+    modulo_app.app.logger.disabled = True
+    modulo_app.logger.disabled = True
+    return modulo_app
+
+
+def registrar_funciones(facade, claves):
+    """
+    Agrega a la cartelera del facade las funciones `claves` de su sala, a la hora de la función
+    por defecto: el facade solo vende funciones que están en la cartelera.
+    """
+    inicio = facade.catalogo.obtener(facade.sala_id, facade.hora).inicio
+    for clave in claves:
+        facade.agregar_funcion(facade.pelicula, facade.sala, inicio, id=clave)
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(DIRECTORIO_RESULTADOS)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def guardar(nombre: str, resultados: dict, directorio: str | None = None) -> str:
+    """Guarda los resultados con sus metadatos y retorna la ruta del archivo."""
+    directorio = directorio or DIRECTORIO_RESULTADOS
+    os.makedirs(directorio, exist_ok=True)
+    marca = time.strftime("%Y%m%dT%H%M%S")
+    ruta = os.path.join(directorio, f"{nombre}-{marca}.json")
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({
+            "benchmark": nombre,
+            "fecha": marca,
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "resultados": resultados,
+        }, archivo, indent=2, ensure_ascii=False)
+    return ruta
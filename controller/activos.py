@@ -0,0 +1,173 @@
+"""
+Módulo activos:
+Canal de archivos estáticos para producción: nombres con huella, variantes gzip precalculadas,
+cache de larga duración y solicitudes condicionales.
+
+Al arrancar se leen todos los archivos de `static/` una sola vez. Cada uno recibe una huella
+(prefijo del SHA-256 de su contenido) que se agrega al nombre (`css/styles.<huella>.css`);
+como el nombre cambia cuando cambia el contenido, esas URLs se sirven con
+`Cache-Control: immutable` por un año y un visitante que regresa no vuelve a descargarlas. Las
+referencias `/static/...` dentro de las hojas de estilo se reescriben a sus nombres con huella
+antes de calcular la huella de la hoja. Los formatos de texto se comprimen con gzip una sola vez
+y se entrega esa variante a los clientes que la aceptan.
+
+Servir un archivo es una búsqueda en un diccionario y una respuesta con bytes en memoria, con
+ETag fuerte (la huella) y respuesta 304 si el cliente ya tiene esa versión. Las URLs sin huella
+siguen funcionando, pero con `no-cache` para que el navegador revalide.
+
+También puede generarse el directorio de activos para un servidor web o CDN delante de la
+aplicación (archivos con huella, sus .gz y manifest.json):
+    python -m controller.activos [--salida static_build]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Response, abort, request
+
+LARGO_HUELLA = 12
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+COMPRIMIBLES = {".css", ".js", ".html", ".svg", ".json", ".txt", ".map"}
+MINIMO_GZIP = 256  # Bytes; los archivos más pequeños no ganan nada comprimidos
+REFERENCIA_CSS = re.compile(r"""url\(\s*(['"]?)/static/([^'")?#]+)\1\s*\)""")
+
+
+class _Activo:
+    __slots__ = ("ruta", "contenido", "gzip", "huella", "tipo")
+
+    def __init__(self, ruta: str, contenido: bytes):
+        self.ruta = ruta  # Ruta lógica, p. ej. 'css/styles.css'
+        self.contenido = contenido
+        self.huella = hashlib.sha256(contenido).hexdigest()[:LARGO_HUELLA]
+        self.tipo = mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+        self.gzip: bytes | None = None
+        if os.path.splitext(ruta)[1] in COMPRIMIBLES and len(contenido) >= MINIMO_GZIP:
+            comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+            if len(comprimido) < len(contenido):
+                self.gzip = comprimido
+
+    @property
+    def ruta_con_huella(self) -> str:
+        base, extension = os.path.splitext(self.ruta)
+        return f"{base}.{self.huella}{extension}"
+
+
+class ManifiestoActivos:
+    """
+    Activos estáticos de un directorio, indexados por ruta lógica y por ruta con huella.
+
+    Args:
+        directorio: Directorio de archivos estáticos (p. ej. app.static_folder).
+        prefijo: Prefijo de URL con el que se sirven.
+    """
+
+    def __init__(self, directorio: str, prefijo: str = "/static"):
+        self.directorio = directorio
+        self.prefijo = prefijo.rstrip("/")
+        self._logicos: dict[str, _Activo] = {}
+        self._con_huella: dict[str, _Activo] = {}
+        self._cargar()
+
+    def _cargar(self):
+        archivos = {}
+        for raiz, _, nombres in os.walk(self.directorio):
+            for nombre in nombres:
+                if nombre.startswith("."):
+                    continue
+                camino = os.path.join(raiz, nombre)
+                with open(camino, "rb") as archivo:
+                    archivos[os.path.relpath(camino, self.directorio).replace(os.sep, "/")] = archivo.read()
+
+        # Primero los archivos que no son hojas de estilo, para que estas apunten a sus huellas
+        hojas = sorted(ruta for ruta in archivos if ruta.endswith(".css"))
+        for ruta in sorted(archivos):
+            if not ruta.endswith(".css"):
+                self._registrar(_Activo(ruta, archivos[ruta]))
+        for ruta in hojas:
+            texto = archivos[ruta].decode("utf-8")
+            self._registrar(_Activo(ruta, REFERENCIA_CSS.sub(self._reescribir, texto).encode("utf-8")))
+
+    def _reescribir(self, coincidencia: re.Match) -> str:
+        comilla, ruta = coincidencia.groups()
+        return f"url({comilla}{self.url(ruta)}{comilla})"
+
+    def _registrar(self, activo: _Activo):
+        self._logicos[activo.ruta] = activo
+        self._con_huella[activo.ruta_con_huella] = activo
+
+    def __len__(self) -> int:
+        return len(self._logicos)
+
+    def nombre(self, ruta: str) -> str:
+        """Ruta con huella de un activo (la misma ruta si no existe)."""
+        activo = self._logicos.get(ruta)
+        return ruta if activo is None else activo.ruta_con_huella
+
+    def url(self, ruta: str) -> str:
+        return f"{self.prefijo}/{self.nombre(ruta)}"
+
+    def responder(self, ruta: str) -> Response:
+        """
+        Respuesta para `<prefijo>/<ruta>` de la solicitud actual.
+
+        Las rutas con huella se cachean por un año; las lógicas se revalidan con su ETag.
+        """
+        activo = self._con_huella.get(ruta)
+        inmutable = activo is not None
+        if activo is None:
+            activo = self._logicos.get(ruta)
+            if activo is None:
+                abort(404)
+
+        usar_gzip = activo.gzip is not None and "gzip" in request.headers.get("Accept-Encoding", "")
+        etiqueta = f"{activo.huella}-gz" if usar_gzip else activo.huella
+        respuesta = Response(mimetype=activo.tipo)
+        respuesta.set_etag(etiqueta)
+        respuesta.headers["Cache-Control"] = CACHE_INMUTABLE if inmutable else CACHE_REVALIDAR
+        if activo.gzip is not None:
+            respuesta.vary.add("Accept-Encoding")
+        if request.if_none_match.contains(etiqueta):
+            respuesta.status_code = 304
+            return respuesta
+        respuesta.set_data(activo.gzip if usar_gzip else activo.contenido)
+        if usar_gzip:
+            respuesta.content_encoding = "gzip"
+        return respuesta
+
+    def exportar(self, salida: str) -> int:
+        """
+        Escribe los activos con huella, sus variantes .gz y manifest.json (ruta lógica -> ruta
+        con huella) en `salida`. Retorna el número de activos.
+        """
+        for activo in self._logicos.values():
+            destino = os.path.join(salida, activo.ruta_con_huella)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            with open(destino, "wb") as archivo:
+                archivo.write(activo.contenido)
+            if activo.gzip is not None:
+                with open(destino + ".gz", "wb") as archivo:
+                    archivo.write(activo.gzip)
+        with open(os.path.join(salida, "manifest.json"), "w", encoding="utf-8") as archivo:
+            json.dump({ruta: activo.ruta_con_huella for ruta, activo in sorted(self._logicos.items())},
+                      archivo, indent=2)
+        return len(self._logicos)
+
+
+def main():
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Genera los activos estáticos con huella y gzip.")
+    parser.add_argument("--origen", default=os.path.join(raiz, "static"))
+    parser.add_argument("--salida", default=os.path.join(raiz, "static_build"))
+    args = parser.parse_args()
+    total = ManifiestoActivos(args.origen).exportar(args.salida)
+    print(f"{total} activos en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
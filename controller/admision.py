@@ -0,0 +1,223 @@
+"""
+Módulo admision:
+Control de admisión para las rutas de compra y de estado de asientos en las ventas masivas.
+
+Tres filtros, antes de hacer cualquier trabajo:
+    - LimitadorTasa: un token bucket por cliente (dirección IP). Cada cliente acumula hasta
+      `rafaga` permisos que se recargan a `tasa` por segundo; sin permisos la solicitud se
+      rechaza con 429 y un Retry-After con el tiempo hasta el siguiente permiso.
+    - LimiteConcurrencia: un máximo de solicitudes en curso por función, más una cola corta de
+      espera. Con la cola llena, o si la espera vence, la solicitud se rechaza con 503 y
+      Retry-After.
+    - LimiteObservadores: un máximo de clientes por proceso esperando cambios de asientos
+      (long-poll y streams). Cada uno ocupa un hilo del servidor mientras espera; por encima
+      del máximo se rechazan con 503 y Retry-After para que no dejen sin hilos a las compras.
+Así, cuando la demanda supera la capacidad, los compradores admitidos conservan una latencia
+estable y el resto recibe de inmediato una respuesta para reintentar, en lugar de que todas
+las solicitudes esperen hasta que los workers agoten su tiempo.
+
+Las direcciones se toman de `request.remote_addr`: detrás de un proxy, la aplicación debe
+envolverse con werkzeug.middleware.proxy_fix.ProxyFix para ver la IP real del cliente.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Hashable
+
+from flask import jsonify, request
+
+from models.metricas import metricas
+
+CLIENTES = 100000        # Buckets que se conservan (los menos recientes se descartan)
+ESPERA_COLA = 2.0        # Segundos máximos en la cola de una función
+REINTENTO_SATURADO = 1   # Retry-After (segundos) cuando una función está saturada
+REINTENTO_OBSERVADORES = 5  # Retry-After (segundos) cuando hay demasiados clientes esperando cambios
+
+rechazos_admision = metricas.contador(
+    "cine_admision_rechazos_total", "Solicitudes rechazadas por el control de admisión.", ("ruta", "motivo"))
+
+
+class LimitadorTasa:
+    """
+    Token bucket por cliente.
+
+    Args:
+        tasa: Permisos por segundo que recupera cada cliente (0 desactiva el límite).
+        rafaga: Permisos máximos acumulados.
+    """
+
+    def __init__(self, tasa: float, rafaga: float, capacidad: int = CLIENTES, reloj=time.monotonic):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.capacidad = capacidad
+        self._reloj = reloj
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()  # cliente -> [permisos, instante]
+        self._candado = threading.Lock()
+
+    def consumir(self, cliente: str) -> float:
+        """Toma un permiso; retorna 0 si lo hubo o los segundos hasta el siguiente permiso."""
+        if self.tasa <= 0:
+            return 0.0
+        ahora = self._reloj()
+        with self._candado:
+            bucket = self._buckets.get(cliente)
+            if bucket is None:
+                bucket = self._buckets[cliente] = [self.rafaga, ahora]
+                if len(self._buckets) > self.capacidad:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(cliente)
+                bucket[0] = min(self.rafaga, bucket[0] + (ahora - bucket[1]) * self.tasa)
+                bucket[1] = ahora
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.tasa
+
+
+class _Funcion:
+    __slots__ = ("condicion", "en_curso", "esperando")
+
+    def __init__(self, candado: threading.Lock):
+        self.condicion = threading.Condition(candado)
+        self.en_curso = 0
+        self.esperando = 0
+
+
+class LimiteConcurrencia:
+    """
+    Solicitudes en curso por función, con una cola de espera acotada.
+
+    Args:
+        maximo: Solicitudes simultáneas por función (0 desactiva el límite).
+        cola: Solicitudes que pueden esperar un lugar; las demás se rechazan de inmediato.
+        espera: Segundos máximos en la cola.
+    """
+
+    def __init__(self, maximo: int, cola: int, espera: float = ESPERA_COLA):
+        self.maximo = maximo
+        self.cola = cola
+        self.espera = espera
+        self._funciones: dict[Hashable, _Funcion] = {}
+        self._candado = threading.Lock()
+
+    def entrar(self, clave) -> bool:
+        """Ocupa un lugar de la función; retorna False si no lo consigue (cola llena o espera vencida)."""
+        if self.maximo <= 0:
+            return True
+        with self._candado:
+            estado = self._funciones.get(clave)
+            if estado is None:
+                estado = self._funciones[clave] = _Funcion(self._candado)
+            if estado.en_curso < self.maximo:
+                estado.en_curso += 1
+                return True
+            if estado.esperando >= self.cola:
+                return False
+            estado.esperando += 1
+            try:
+                fin = time.monotonic() + self.espera
+                while estado.en_curso >= self.maximo:
+                    restante = fin - time.monotonic()
+                    if restante <= 0:
+                        return False
+                    estado.condicion.wait(restante)
+                estado.en_curso += 1
+                return True
+            finally:
+                estado.esperando -= 1
+
+    def salir(self, clave):
+        if self.maximo <= 0:
+            return
+        with self._candado:
+            estado = self._funciones[clave]
+            estado.en_curso -= 1
+            if estado.esperando:
+                estado.condicion.notify()
+            elif not estado.en_curso:
+                del self._funciones[clave]  # Solo se conservan las funciones con actividad
+
+    def en_curso(self, clave) -> int:
+        estado = self._funciones.get(clave)
+        return 0 if estado is None else estado.en_curso
+
+
+class LimiteObservadores:
+    """
+    Clientes que esperan cambios a la vez en el proceso, sin cola.
+
+    Args:
+        maximo: Clientes simultáneos (0 desactiva el límite).
+    """
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self.en_curso = 0
+        self._candado = threading.Lock()
+
+    def entrar(self) -> bool:
+        """Ocupa un lugar; retorna False de inmediato si no hay."""
+        with self._candado:
+            if 0 < self.maximo <= self.en_curso:
+                return False
+            self.en_curso += 1
+            return True
+
+    def salir(self):
+        with self._candado:
+            self.en_curso -= 1
+
+
+def rechazar_observador():
+    """Respuesta 503 para un cliente que no consiguió lugar en LimiteObservadores."""
+    return _rechazar(503, "Demasiados clientes esperando cambios, intente de nuevo", REINTENTO_OBSERVADORES,
+                     "observadores")
+
+
+def _rechazar(codigo: int, error: str, segundos: float, motivo: str):
+    rechazos_admision.incrementar(request.url_rule.rule if request.url_rule else request.path, motivo)
+    respuesta = jsonify({"success": False, "error": error})
+    respuesta.status_code = codigo
+    respuesta.headers["Retry-After"] = str(max(1, math.ceil(segundos)))
+    return respuesta
+
+
+def admitir(limitador: LimitadorTasa | None = None, concurrencia: LimiteConcurrencia | None = None,
+            funcion: Callable[..., Hashable] | None = None):
+    """
+    Decorador de rutas Flask que aplica el control de admisión.
+
+    Args:
+        limitador: Límite de tasa por cliente (429 al excederlo).
+        concurrencia: Límite de solicitudes en curso por función (503 con la cola llena).
+        funcion: Recibe los argumentos de la ruta y retorna la clave de la función
+            (p. ej. (sala, horario)); requerido si se indica `concurrencia`. Si lanza
+            ValueError (solicitud mal formada) se responde 400 con su mensaje.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if limitador is not None:
+                espera = limitador.consumir(request.remote_addr or "")
+                if espera:
+                    return _rechazar(429, "Demasiadas solicitudes, intente de nuevo en unos segundos",
+                                     espera, "tasa")
+            if concurrencia is None:
+                return vista(*args, **kwargs)
+            try:
+                clave = funcion(*args, **kwargs)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            if not concurrencia.entrar(clave):
+                return _rechazar(503, "La función tiene demasiadas compras en curso, intente de nuevo",
+                                 REINTENTO_SATURADO, "saturado")
+            try:
+                return vista(*args, **kwargs)
+            finally:
+                concurrencia.salir(clave)
+        return envoltura
+    return decorador
@@ -0,0 +1,141 @@
+"""
+Módulo idempotencia:
+Hace seguros los reintentos de los endpoints de compra mediante el encabezado
+'Idempotency-Key'.
+
+La primera respuesta a una clave se guarda en una cache LRU acotada con vencimiento (TTL) y
+se repite tal cual en los reintentos. Si llega un duplicado mientras el primer intento sigue
+en curso, espera su resultado en lugar de volver a ejecutar la compra.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable
+
+from flask import jsonify, make_response, request
+
+CAPACIDAD = 10000
+TTL = 24 * 3600  # Segundos que se conserva una respuesta
+ESPERA_DUPLICADO = 30  # Segundos que un duplicado espera al intento original
+
+
+class _Entrada:
+    __slots__ = ("huella", "evento", "valor", "vence")
+
+    def __init__(self, huella: str):
+        self.huella = huella
+        self.evento = threading.Event()
+        self.valor = None
+        self.vence = float("inf")  # En curso: no vence hasta completarse
+
+
+class CacheIdempotencia:
+    """Cache LRU + TTL de resultados por clave de idempotencia."""
+
+    def __init__(self, capacidad: int = CAPACIDAD, ttl: float = TTL, reloj=time.monotonic):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._reloj = reloj
+        self._entradas: OrderedDict[str, _Entrada] = OrderedDict()
+        self._candado = threading.Lock()
+
+    def ejecutar(self, clave: str, huella: str, funcion: Callable[[], object],
+                 guardar: Callable[[object], bool] = lambda _: True) -> tuple[bool, object]:
+        """
+        Ejecuta `funcion` una sola vez por clave y reutiliza su resultado.
+
+        Args:
+            clave: Clave de idempotencia.
+            huella: Resumen de la solicitud; una misma clave con otra huella es un error.
+            funcion: Trabajo a ejecutar en el primer intento.
+            guardar: Indica si un resultado debe conservarse (p. ej. no guardar errores 5xx).
+
+        Returns:
+            Tupla (repetido, resultado). `resultado` es None si la clave se reutilizó con otra
+            solicitud o si el intento original no terminó dentro de ESPERA_DUPLICADO.
+        """
+        with self._candado:
+            ahora = self._reloj()
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.vence <= ahora:
+                del self._entradas[clave]
+                entrada = None
+            if entrada is None:
+                entrada = _Entrada(huella)
+                self._entradas[clave] = entrada
+                self._desalojar()
+                propia = True
+            else:
+                self._entradas.move_to_end(clave)
+                propia = False
+
+        if not propia:
+            if entrada.huella != huella:
+                return True, None
+            if not entrada.evento.wait(ESPERA_DUPLICADO):
+                return True, None
+            if entrada.valor is None:
+                # El intento original falló sin guardar resultado: este reintento lo repite
+                return self.ejecutar(clave, huella, funcion, guardar)
+            return True, entrada.valor
+
+        try:
+            valor = funcion()
+        except Exception:
+            self._descartar(clave, entrada)
+            raise
+        if guardar(valor):
+            entrada.valor = valor
+            entrada.vence = self._reloj() + self.ttl
+            entrada.evento.set()
+        else:
+            self._descartar(clave, entrada)
+        return False, valor
+
+    def _descartar(self, clave: str, entrada: _Entrada):
+        with self._candado:
+            if self._entradas.get(clave) is entrada:
+                del self._entradas[clave]
+        entrada.evento.set()
+
+    def _desalojar(self):
+        # Debe llamarse con el candado tomado. Una entrada en curso desalojada
+        # sigue siendo completada por su dueño.
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+
+def idempotente(cache: CacheIdempotencia):
+    """
+    Decorador para rutas Flask: si la solicitud trae 'Idempotency-Key', la respuesta se
+    calcula una sola vez y se repite en los reintentos (con 'Idempotent-Replayed: true').
+    Las respuestas 5xx no se guardan, para que un reintento pueda tener éxito.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            clave = request.headers.get('Idempotency-Key')
+            if not clave:
+                return vista(*args, **kwargs)
+
+            def ejecutar_vista():
+                respuesta = make_response(vista(*args, **kwargs))
+                return respuesta.get_data(), respuesta.status_code, respuesta.mimetype
+
+            huella = hashlib.sha256(request.get_data()).hexdigest()
+            repetido, resultado = cache.ejecutar(f"{request.path}:{clave}", huella, ejecutar_vista,
+                                                 guardar=lambda r: r[1] < 500)
+            if resultado is None:
+                return jsonify({"success": False,
+                                "error": "Idempotency-Key en uso por otra solicitud"}), 409
+            cuerpo, estado, mimetype = resultado
+            respuesta = make_response(cuerpo, estado)
+            respuesta.mimetype = mimetype
+            if repetido:
+                respuesta.headers['Idempotent-Replayed'] = 'true'
+            return respuesta
+        return envoltura
+    return decorador
@@ -2,9 +2,33 @@
 Módulo bridge:
 Implementa el patrón Bridge para separar la abstracción de la emisión de tickets (ventas)
 de la implementación de canales de venta.
+
+Los canales se obtienen de un registro que crea cada uno una sola vez y lo reutiliza en
+todas las ventas. Además del canal web (síncrono: retorna el HTML del ticket), hay canales
+de entrega en cola (correo, SMS, impresora de kiosco): emitir un ticket por ellos solo lo
+agrega a una cola local, y un hilo por canal lo entrega en segundo plano junto con los demás
+tickets pendientes. Así una compra responde apenas la venta queda confirmada, sin esperar a
+ninguna entrega. Los canales en cola de este módulo son sustitutos locales: registran los
+mensajes en lugar de enviarlos a un proveedor real.
 """
 
+import logging
+import queue
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable
+
+from .metricas import tickets_entregados
+from .tickets import formatear_precio, renderizador
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 50        # Tickets máximos por entrega
+ESPERA_LOTE = 0.05      # Segundos que se espera a completar un lote antes de entregarlo
+CAPACIDAD_COLA = 10000  # Tickets pendientes por canal; con la cola llena, los nuevos se descartan
+HISTORIAL_ENVIOS = 100  # Últimos mensajes que conserva cada canal sustituto
 
 class CanalVenta(ABC):
     @abstractmethod
@@ -14,24 +38,197 @@ class CanalVenta(ABC):
 class WebApp(CanalVenta):
     def emitir_ticket(self, datos: dict) -> str:
         if 'combo' in datos:
-            return f"""
-            <div class='ticket-web'>
-                <h3>🍔 Combo Comprado</h3>
-                <p><strong>{datos['combo']}</strong></p>
-                <p>Incluye: {datos['descripcion']}</p>
-                <p>Precio: ${datos['precio']}</p>
-                <img src='/static/qr.png' width='100'>
-            </div>
-            """
+            return renderizador.combo(datos)
         else:
-            return f"""
-            <div class='ticket-web'>
-                <h3>🎟️ Ticket Virtual</h3>
-                <p>Asiento: {datos['asiento']}</p>
-                <p>Precio: ${datos['precio']}</p>
-                <img src='/static/qr.png' width='100'>
-            </div>
-            """
+            return renderizador.entrada(datos)
+
+class CanalEnCola(CanalVenta):
+    """
+    Canal que entrega los tickets en segundo plano y por lotes.
+
+    emitir_ticket encola el ticket y retorna de inmediato; el hilo del canal (creado con el
+    primer ticket) junta hasta `tamano_lote` tickets, o los que lleguen en `espera_lote`
+    segundos, y los entrega con una sola llamada a entregar_lote.
+    """
+
+    nombre = "cola"
+
+    def __init__(self, tamano_lote: int = TAMANO_LOTE, espera_lote: float = ESPERA_LOTE,
+                 capacidad: int = CAPACIDAD_COLA):
+        self.tamano_lote = tamano_lote
+        self.espera_lote = espera_lote
+        self._cola: queue.Queue[dict] = queue.Queue(capacidad)
+        self._hilo: threading.Thread | None = None
+        self._detenido = False
+        self._candado = threading.Lock()
+        self._vacia = threading.Condition(self._candado)
+        self._pendientes = 0  # Tickets encolados y aún no entregados
+        self.enviados: deque[str] = deque(maxlen=HISTORIAL_ENVIOS)
+
+    @abstractmethod
+    def entregar_lote(self, lote: list[dict]):
+        """Entrega un lote de tickets; cada uno trae 'destino' y los datos de la venta."""
+        pass
+
+    def emitir_ticket(self, datos: dict) -> str:
+        """Encola el ticket para entregarlo en segundo plano; retorna un acuse (vacío si se descartó)."""
+        with self._candado:
+            if self._detenido:
+                tickets_entregados.incrementar(self.nombre, "descartado")
+                return ""
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name=f"canal-{self.nombre}", daemon=True)
+                self._hilo.start()
+            try:
+                self._cola.put_nowait(datos)
+            except queue.Full:
+                logger.warning("Cola del canal %s llena, ticket descartado", self.nombre)
+                tickets_entregados.incrementar(self.nombre, "descartado")
+                return ""
+            self._pendientes += 1
+        return f"Ticket en cola para {self.nombre}"
+
+    def pendientes(self) -> int:
+        return self._pendientes
+
+    def esperar(self, timeout: float | None = None) -> bool:
+        """Espera a que se entreguen todos los tickets encolados; retorna False si vence el timeout."""
+        fin = None if timeout is None else time.monotonic() + timeout
+        with self._vacia:
+            while self._pendientes:
+                restante = None if fin is None else fin - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._vacia.wait(restante)
+        return True
+
+    def detener(self, timeout: float | None = None) -> bool:
+        """Deja de aceptar tickets y espera a que se entreguen los pendientes."""
+        with self._candado:
+            self._detenido = True
+        return self.esperar(timeout)
+
+    def _trabajar(self):
+        while True:
+            lote = [self._cola.get()]
+            fin = time.monotonic() + self.espera_lote
+            while len(lote) < self.tamano_lote:
+                restante = fin - time.monotonic()
+                try:
+                    lote.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.entregar_lote(lote)
+                tickets_entregados.incrementar(self.nombre, "entregado", cantidad=len(lote))
+            except Exception as e:
+                logger.error("Error entregando %s tickets por %s: %s", len(lote), self.nombre, e)
+                tickets_entregados.incrementar(self.nombre, "fallido", cantidad=len(lote))
+            with self._vacia:
+                self._pendientes -= len(lote)
+                if not self._pendientes:
+                    self._vacia.notify_all()
+
+    @staticmethod
+    def _agrupar(lote: list[dict]) -> dict[str, list[dict]]:
+        """Agrupa los tickets del lote por destino, conservando el orden de llegada."""
+        grupos: dict[str, list[dict]] = {}
+        for datos in lote:
+            grupos.setdefault(str(datos.get("destino", "")), []).append(datos)
+        return grupos
+
+    @staticmethod
+    def _resumen(datos: dict) -> str:
+        """Texto breve de una venta (entradas o combo)."""
+        if "combo" in datos:
+            return f"{datos['combo']} ${formatear_precio(datos['precio'])}"
+        asientos = ", ".join(datos["asientos"])
+        return f"{datos['sala']} {datos['funcion']}: {asientos} ${formatear_precio(datos['total'])}"
+
+class CorreoElectronico(CanalEnCola):
+    """Sustituto de un proveedor de correo: un mensaje HTML por destinatario y lote."""
+
+    nombre = "correo"
+
+    def entregar_lote(self, lote: list[dict]):
+        for destino, ventas in self._agrupar(lote).items():
+            cuerpo = "".join(self._html(datos) for datos in ventas)
+            self.enviados.append(f"{destino}: {cuerpo}")
+            logger.debug("Correo a %s con %s tickets (%s bytes)", destino, len(ventas), len(cuerpo))
+
+    @staticmethod
+    def _html(datos: dict) -> str:
+        if "combo" in datos:
+            return renderizador.combo(datos)
+        return renderizador.entradas(datos["asientos"], datos["precio"], "lote", datos["sala"], datos["funcion"])[0]
+
+class MensajeSMS(CanalEnCola):
+    """Sustituto de una pasarela de SMS: un mensaje de texto corto por venta."""
+
+    nombre = "sms"
+
+    def entregar_lote(self, lote: list[dict]):
+        for datos in lote:
+            mensaje = f"CinemaEstructurales - {self._resumen(datos)}"
+            self.enviados.append(f"{datos.get('destino', '')}: {mensaje}")
+        logger.debug("Lote de %s SMS enviado", len(lote))
+
+class ImpresoraKiosco(CanalEnCola):
+    """Sustituto de la impresora de un kiosco: un comprobante de texto por venta."""
+
+    nombre = "kiosco"
+
+    def entregar_lote(self, lote: list[dict]):
+        for destino, ventas in self._agrupar(lote).items():
+            comprobantes = "\n".join(f"*** {self._resumen(datos)} ***" for datos in ventas)
+            self.enviados.append(f"{destino}: {comprobantes}")
+            logger.debug("Kiosco %s imprimió %s comprobantes", destino, len(ventas))
+
+class RegistroCanales:
+    """
+    Registro de canales de venta por nombre.
+
+    Cada canal se crea con su fábrica la primera vez que se pide y luego se reutiliza.
+    """
+
+    def __init__(self):
+        self._fabricas: dict[str, Callable[[], CanalVenta]] = {}
+        self._canales: dict[str, CanalVenta] = {}
+        self._candado = threading.Lock()
+
+    def registrar(self, nombre: str, fabrica: Callable[[], CanalVenta]):
+        """Registra (o reemplaza) la fábrica de un canal."""
+        with self._candado:
+            self._fabricas[nombre] = fabrica
+            self._canales.pop(nombre, None)
+
+    def nombres(self) -> list[str]:
+        return list(self._fabricas)
+
+    def obtener(self, nombre: str) -> CanalVenta:
+        """
+        Retorna la instancia compartida del canal, creándola si aún no existe.
+
+        Raises:
+            KeyError: Si no hay un canal registrado con ese nombre.
+        """
+        canal = self._canales.get(nombre)
+        if canal is None:
+            with self._candado:
+                canal = self._canales.get(nombre)
+                if canal is None:
+                    canal = self._canales[nombre] = self._fabricas[nombre]()
+        return canal
+
+    def es_en_cola(self, nombre: str) -> bool:
+        """Indica si el canal está registrado y entrega en segundo plano."""
+        return nombre in self._fabricas and isinstance(self.obtener(nombre), CanalEnCola)
+
+    def esperar(self, timeout: float | None = None) -> bool:
+        """Espera a que todos los canales en cola entreguen sus tickets pendientes."""
+        with self._candado:
+            canales = list(self._canales.values())
+        return all([canal.esperar(timeout) for canal in canales if isinstance(canal, CanalEnCola)])
 
 class VentaAbstract:
     def __init__(self, canal: CanalVenta):
@@ -42,3 +239,11 @@ class VentaAbstract:
         Realiza la venta delegando la emisión del ticket al canal.
         """
         return self.canal.emitir_ticket(datos)
+
+
+# Registro compartido: canal web síncrono y canales de entrega en cola
+canales = RegistroCanales()
+canales.registrar("web", WebApp)
+canales.registrar("correo", CorreoElectronico)
+canales.registrar("sms", MensajeSMS)
+canales.registrar("kiosco", ImpresoraKiosco)
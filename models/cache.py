@@ -0,0 +1,55 @@
+"""
+Módulo cache:
+Cache de respuestas pre-generadas (HTML renderizado, JSON serializado) para datos que cambian
+poco, como la cartelera o el menú.
+
+Cada entrada se guarda junto con la versión de los datos de los que se generó. Quien modifica
+esos datos incrementa su versión (invalidación explícita) y la siguiente consulta regenera la
+entrada; mientras tanto, servir la respuesta es una búsqueda en un diccionario.
+"""
+
+import threading
+from typing import Callable, Hashable, TypeVar
+
+from .metricas import consultas_cache
+
+T = TypeVar("T")
+
+
+class CacheVersionado:
+    def __init__(self, nombre: str = "respuestas"):
+        self.nombre = nombre  # Etiqueta en cine_cache_consultas_total
+        self._entradas: dict[Hashable, tuple[Hashable, object]] = {}
+        self._candado = threading.Lock()
+
+    def obtener(self, clave: Hashable, version: Hashable, generar: Callable[[], T]) -> T:
+        """
+        Retorna el valor de `clave` generado para `version`, generándolo si hace falta.
+
+        Args:
+            clave: Identificador de la respuesta (p. ej. "index").
+            version: Versión de los datos de origen; cualquier valor comparable por igualdad.
+            generar: Función sin argumentos que produce el valor.
+        """
+        entrada = self._entradas.get(clave)
+        if entrada is not None and entrada[0] == version:
+            consultas_cache.incrementar(self.nombre, "acierto")
+            return entrada[1]
+        with self._candado:
+            # Otro hilo pudo generarlo mientras esperábamos el candado
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] == version:
+                consultas_cache.incrementar(self.nombre, "acierto")
+                return entrada[1]
+            consultas_cache.incrementar(self.nombre, "fallo")
+            valor = generar()
+            self._entradas[clave] = (version, valor)
+            return valor
+
+    def invalidar(self, clave: Hashable | None = None):
+        """Descarta una entrada, o todas si no se indica clave."""
+        with self._candado:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
@@ -0,0 +1,191 @@
+"""
+Módulo catalogo:
+Catálogo de funciones (película + sala + fecha y hora de inicio) con índices para la cartelera.
+
+Cada índice (todas, por película, por sala, por tipo de sala y por fecha) es una lista ordenada
+por hora de inicio, así que una consulta por rango ("las próximas 3 horas", "todo IMAX esta
+noche") es una búsqueda binaria sobre el índice más selectivo más el recorrido de los
+resultados, sin revisar todo el catálogo. Una página sin filtros de atributos se obtiene
+recortando directamente el índice.
+
+Cada función lleva una versión propia para cachear su fragmento HTML, y el catálogo una versión
+global que cambia con cualquier alta o baja.
+"""
+
+import bisect
+import threading
+from datetime import date, datetime, time, timedelta
+
+POR_PAGINA = 20
+NOCHE_DESDE = time(18, 0)   # "Esta noche": desde las 18:00...
+NOCHE_HASTA = time(3, 0)    # ...hasta las 03:00 del día siguiente
+TIPOS_SALA = ("IMAX", "4DX", "VIP", "3D")  # Se detectan en el nombre de la sala; si no, "2D"
+
+Entrada = tuple[datetime, str, str]  # (inicio, sala_id, id) en los índices
+
+
+def tipo_de_sala(sala: str) -> str:
+    """Deduce el tipo de sala a partir de su nombre (p. ej. "Sala IMAX" -> "IMAX")."""
+    nombre = sala.upper()
+    return next((tipo for tipo in TIPOS_SALA if tipo in nombre), "2D")
+
+
+class Funcion:
+    """Una proyección de una película en una sala a una hora."""
+
+    __slots__ = ("id", "pelicula", "sala", "sala_id", "tipo", "inicio", "version")
+
+    def __init__(self, id: str, pelicula: str, sala: str, inicio: datetime, tipo: str | None = None):
+        self.id = id  # Clave de la función en el inventario de asientos
+        self.pelicula = pelicula
+        self.sala = sala
+        self.sala_id = sala.replace(" ", "_")
+        self.tipo = tipo or tipo_de_sala(sala)
+        self.inicio = inicio
+        self.version = 0
+
+    def a_dict(self) -> dict:
+        return {"id": self.id, "pelicula": self.pelicula, "sala": self.sala, "sala_id": self.sala_id,
+                "tipo": self.tipo, "inicio": self.inicio.isoformat(timespec="minutes")}
+
+
+class CatalogoFunciones:
+    def __init__(self):
+        # Una función se identifica por su sala y su clave (varias salas comparten horario)
+        self._funciones: dict[tuple[str, str], Funcion] = {}
+        # Índices: listas ordenadas de (inicio, sala_id, id)
+        self._todas: list[Entrada] = []
+        self._por_pelicula: dict[str, list[Entrada]] = {}
+        self._por_sala: dict[str, list[Entrada]] = {}
+        self._por_tipo: dict[str, list[Entrada]] = {}
+        self._por_fecha: dict[date, list[Entrada]] = {}
+        self._candado = threading.Lock()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._funciones)
+
+    def _indices(self, funcion: Funcion) -> list[list[Entrada]]:
+        return [
+            self._todas,
+            self._por_pelicula.setdefault(funcion.pelicula, []),
+            self._por_sala.setdefault(funcion.sala_id, []),
+            self._por_tipo.setdefault(funcion.tipo, []),
+            self._por_fecha.setdefault(funcion.inicio.date(), []),
+        ]
+
+    def agregar(self, pelicula: str, sala: str, inicio: datetime, id: str | None = None,
+                tipo: str | None = None) -> Funcion:
+        """
+        Agrega una función al catálogo (o reemplaza la de la misma sala con el mismo id).
+
+        Args:
+            id: Clave de la función en el inventario; por defecto "<AAAA-MM-DD HH:MM>".
+        """
+        funcion = Funcion(id or inicio.strftime("%Y-%m-%d %H:%M"), pelicula, sala, inicio, tipo)
+        with self._candado:
+            anterior = self._funciones.get((funcion.sala_id, funcion.id))
+            if anterior is not None:
+                self._quitar(anterior)
+                funcion.version = anterior.version + 1
+            self._funciones[(funcion.sala_id, funcion.id)] = funcion
+            entrada = (funcion.inicio, funcion.sala_id, funcion.id)
+            for indice in self._indices(funcion):
+                bisect.insort(indice, entrada)
+            self.version += 1
+        return funcion
+
+    def _quitar(self, funcion: Funcion):
+        # Debe llamarse con el candado tomado
+        entrada = (funcion.inicio, funcion.sala_id, funcion.id)
+        for indice in self._indices(funcion):
+            posicion = bisect.bisect_left(indice, entrada)
+            if posicion < len(indice) and indice[posicion] == entrada:
+                del indice[posicion]
+        del self._funciones[(funcion.sala_id, funcion.id)]
+
+    def quitar(self, sala_id: str, funcion_id: str) -> bool:
+        with self._candado:
+            funcion = self._funciones.get((sala_id, funcion_id))
+            if funcion is None:
+                return False
+            self._quitar(funcion)
+            self.version += 1
+            return True
+
+    def obtener(self, sala_id: str, funcion_id: str) -> Funcion | None:
+        return self._funciones.get((sala_id, funcion_id))
+
+    def _indice(self, pelicula: str | None, sala_id: str | None, tipo: str | None,
+                fecha: date | None) -> list[Entrada]:
+        """El índice más pequeño entre los que aplican a los filtros."""
+        candidatos = [self._todas]
+        for filtro, indices in ((pelicula, self._por_pelicula), (sala_id, self._por_sala),
+                                (tipo, self._por_tipo), (fecha, self._por_fecha)):
+            if filtro is not None:
+                candidatos.append(indices.get(filtro, []))
+        return min(candidatos, key=len)
+
+    def _rango(self, indice: list[Entrada], desde: datetime | None,
+               hasta: datetime | None) -> tuple[int, int]:
+        inicio = 0 if desde is None else bisect.bisect_left(indice, (desde,))
+        fin = len(indice) if hasta is None else bisect.bisect_left(indice, (hasta,))
+        return inicio, max(inicio, fin)
+
+    def buscar(self, desde: datetime | None = None, hasta: datetime | None = None,
+               pelicula: str | None = None, sala_id: str | None = None, tipo: str | None = None,
+               fecha: date | None = None) -> list[Funcion]:
+        """
+        Retorna las funciones que cumplen todos los filtros, ordenadas por hora de inicio.
+
+        Args:
+            desde: Inicio mínimo (incluido).
+            hasta: Inicio máximo (excluido).
+            pelicula, sala_id, tipo, fecha: Filtros exactos por atributo.
+        """
+        indice = self._indice(pelicula, sala_id, tipo, fecha)
+        inicio, fin = self._rango(indice, desde, hasta)
+        resultado = []
+        for _, sala, funcion_id in indice[inicio:fin]:
+            funcion = self._funciones.get((sala, funcion_id))
+            if funcion is None:
+                continue
+            if ((pelicula is None or funcion.pelicula == pelicula)
+                    and (sala_id is None or funcion.sala_id == sala_id)
+                    and (tipo is None or funcion.tipo == tipo)
+                    and (fecha is None or funcion.inicio.date() == fecha)):
+                resultado.append(funcion)
+        return resultado
+
+    def pagina(self, numero: int = 1, por_pagina: int = POR_PAGINA, desde: datetime | None = None,
+               **filtros) -> tuple[list[Funcion], int]:
+        """
+        Retorna las funciones de la página `numero` (desde 1) y el total de funciones.
+
+        Sin filtros de atributos la página se recorta directamente del índice por hora de
+        inicio (O(log n + por_pagina)).
+        """
+        filtros = {clave: valor for clave, valor in filtros.items() if valor is not None}
+        saltar = (max(numero, 1) - 1) * por_pagina
+        if filtros:
+            funciones = self.buscar(desde=desde, **filtros)
+            return funciones[saltar:saltar + por_pagina], len(funciones)
+        indice = self._todas
+        inicio, fin = self._rango(indice, desde, None)
+        entradas = indice[inicio + saltar:min(inicio + saltar + por_pagina, fin)]
+        funciones = [funcion for _, sala, funcion_id in entradas
+                     if (funcion := self._funciones.get((sala, funcion_id))) is not None]
+        return funciones, fin - inicio
+
+    def proximas(self, horas: float = 3, ahora: datetime | None = None, **filtros) -> list[Funcion]:
+        """Funciones que empiezan en las próximas `horas`."""
+        ahora = ahora or datetime.now()
+        return self.buscar(desde=ahora, hasta=ahora + timedelta(hours=horas), **filtros)
+
+    def esta_noche(self, ahora: datetime | None = None, **filtros) -> list[Funcion]:
+        """Funciones que aún no empiezan entre NOCHE_DESDE de hoy y NOCHE_HASTA de mañana."""
+        ahora = ahora or datetime.now()
+        hoy = ahora.date() if ahora.time() >= NOCHE_HASTA else ahora.date() - timedelta(days=1)
+        desde = max(ahora, datetime.combine(hoy, NOCHE_DESDE))
+        hasta = datetime.combine(hoy + timedelta(days=1), NOCHE_HASTA)
+        return self.buscar(desde=desde, hasta=hasta, **filtros)
@@ -2,11 +2,17 @@
 Módulo composite:
 Implementa el patrón Composite para manejar ítems individuales y combos de alimentos.
 Cada clase provee métodos para obtener precio y descripción.
+
+Los combos memorizan su precio y descripción; cualquier cambio en un nodo (agregar un ítem o
+cambiar un precio) invalida la memoria de ese nodo y de todos sus ancestros.
 """
 
 from abc import ABC, abstractmethod
 
 class MenuItem(ABC):
+    def __init__(self):
+        self._padres: list["FoodCombo"] = []
+
     @abstractmethod
     def get_price(self) -> float:
         pass
@@ -15,35 +21,77 @@ class MenuItem(ABC):
     def get_description(self) -> str:
         pass
 
+    def _invalidar(self):
+        """Propaga el cambio a los combos que contienen este ítem."""
+        for padre in self._padres:
+            padre._invalidar()
+
 class IndividualItem(MenuItem):
     def __init__(self, name: str, price: float):
+        super().__init__()
         self.name = name
-        self.price = price
+        self._price = price
+
+    @property
+    def price(self) -> float:
+        return self._price
+
+    @price.setter
+    def price(self, value: float):
+        self._price = value
+        self._invalidar()
 
     def get_price(self) -> float:
-        return self.price
+        return self._price
 
     def get_description(self) -> str:
         return self.name
 
 class FoodCombo(MenuItem):
     def __init__(self, name: str, base_price_adjustment: float = 0.0):
+        super().__init__()
         self.name = name
-        self.base_price_adjustment = base_price_adjustment
+        self._base_price_adjustment = base_price_adjustment
         self.items: list[MenuItem] = []
+        self._precio: float | None = None
+        self._descripcion: str | None = None
+
+    @property
+    def base_price_adjustment(self) -> float:
+        return self._base_price_adjustment
+
+    @base_price_adjustment.setter
+    def base_price_adjustment(self, value: float):
+        self._base_price_adjustment = value
+        self._invalidar()
 
     def add_item(self, item: MenuItem):
         self.items.append(item)
+        item._padres.append(self)
+        self._invalidar()
+
+    def _invalidar(self):
+        # Si el nodo ya estaba invalidado, sus ancestros también lo están
+        if self._precio is None and self._descripcion is None:
+            return
+        self._precio = None
+        self._descripcion = None
+        super()._invalidar()
 
     def get_price(self) -> float:
-        total_price = self.base_price_adjustment
-        for item in self.items:
-            total_price += item.get_price()
-        return total_price
+        if self._precio is None:
+            total_price = self.base_price_adjustment
+            for item in self.items:
+                total_price += item.get_price()
+            self._precio = total_price
+        return self._precio
 
     def get_description(self) -> str:
-        if not self.items:
-            return f"{self.name} (vacío)"
-        components = [item.get_description() for item in self.items]
-        adjustment_str = f" (ajuste: ${self.base_price_adjustment:.2f})" if self.base_price_adjustment != 0 else ""
-        return f"{self.name}{adjustment_str} [Contiene: {', '.join(components)}]"
+        if self._descripcion is None:
+            if not self.items:
+                self._descripcion = f"{self.name} (vacío)"
+            else:
+                components = [item.get_description() for item in self.items]
+                adjustment_str = f" (ajuste: ${self.base_price_adjustment:.2f})" if self.base_price_adjustment != 0 else ""
+                self._descripcion = f"{self.name}{adjustment_str} [Contiene: {', '.join(components)}]"
+        return self._descripcion
@@ -0,0 +1,261 @@
+"""
+Módulo concesion:
+Catálogo único de la confitería: ítems individuales con existencias y combos (árboles del
+patrón Composite) identificados por id.
+
+Al registrar un combo su árbol se aplana en una tabla de requisitos (ítem -> unidades por
+combo), de modo que vender un combo descuenta todo su árbol con un solo paso sobre esa tabla
+y bajo un candado: o se descuentan todas las unidades o ninguna. El catálogo mantiene además
+el conjunto de combos agotados, recalculado solo para los combos que usan los ítems que
+cambiaron, así que responder "agotado" no recorre el árbol ni toma el candado. La versión del
+catálogo cambia cuando cambia ese conjunto (no con cada venta), para invalidar el menú cacheado.
+
+Las existencias son por proceso y se cargan de EXISTENCIAS al arrancar (el conteo del día).
+Con varios workers (compartir_existencias) viven en la base compartida: cada venta las
+descuenta en una transacción y el catálogo guarda una copia local para el menú, que se
+actualiza con cada venta del proceso y, como mucho cada INTERVALO_SINCRONIZACION segundos, con
+las de los demás. Sobreviven a los reinicios; el conteo de un día nuevo se carga con reponer.
+"""
+
+import threading
+import time
+
+from .composite import FoodCombo, IndividualItem, MenuItem
+from .inventario_compartido import ExistenciasCompartidas
+
+# Unidades disponibles al abrir la confitería, por ítem
+EXISTENCIAS = {
+    "Crispetas Medianas": 300,
+    "Crispetas Grandes": 400,
+    "Gaseosa 16oz": 1200,
+    "Chocolatina Jet": 400,
+    "Nachos con Queso": 150,
+}
+
+INTERVALO_SINCRONIZACION = 1.0  # Segundos entre lecturas de las existencias compartidas para el menú
+
+
+class CatalogoConcesion:
+    def __init__(self):
+        self._items: dict[str, IndividualItem] = {}
+        self._combos: dict[str, FoodCombo] = {}       # id -> combo
+        self._ids: dict[str, str] = {}                # nombre del combo -> id
+        self._existencias: dict[str, int] = {}        # ítem -> unidades (ítems sin entrada: ilimitados)
+        self._requisitos: dict[str, dict[str, int]] = {}  # id del combo -> ítem -> unidades por combo
+        self._dependientes: dict[str, set[str]] = {}  # ítem -> ids de los combos que lo usan
+        self._agotados: set[str] = set()
+        self._candado = threading.Lock()
+        self._almacen: ExistenciasCompartidas | None = None
+        self._sincronizado = 0.0
+        self.version = 0
+
+    def agregar_item(self, item: IndividualItem, existencias: int | None = None) -> IndividualItem:
+        """Registra un ítem; sin `existencias` se vende sin límite."""
+        with self._candado:
+            self._items[item.name] = item
+            if existencias is None:
+                self._existencias.pop(item.name, None)
+            elif self._almacen is not None:
+                self._existencias.update(self._almacen.sembrar({item.name: existencias}))
+            else:
+                self._existencias[item.name] = existencias
+            self._actualizar_agotados([item.name])
+        return item
+
+    def compartir_existencias(self, almacen: ExistenciasCompartidas):
+        """
+        Guarda las existencias en la base compartida: los ítems que aún no están en ella se
+        agregan con las unidades actuales del catálogo, y el catálogo toma las de la base.
+        """
+        with self._candado:
+            self._almacen = almacen
+            self._existencias.update(almacen.sembrar(self._existencias))
+            self._sincronizado = time.monotonic()
+            self._actualizar_agotados(list(self._existencias))
+
+    def sincronizar(self):
+        """Actualiza la copia local de las existencias compartidas (a lo sumo una vez por intervalo)."""
+        if self._almacen is None or time.monotonic() - self._sincronizado < INTERVALO_SINCRONIZACION:
+            return
+        self._sincronizado = time.monotonic()
+        unidades = self._almacen.leer()
+        with self._candado:
+            self._existencias.update({item: unidades[item] for item in self._existencias if item in unidades})
+            self._actualizar_agotados(list(self._existencias))
+
+    def _mover(self, cambios: dict[str, int]) -> str | None:
+        """Suma `cambios` a las existencias, todos o ninguno; retorna el ítem que no alcanza, o None."""
+        cambios = {item: unidades for item, unidades in cambios.items() if item in self._existencias}
+        if self._almacen is not None:
+            faltante, unidades = self._almacen.mover(cambios)
+            with self._candado:
+                self._existencias.update(unidades)
+                self._actualizar_agotados(list(unidades))
+            return faltante
+        with self._candado:
+            for item, unidades in cambios.items():
+                if self._existencias[item] + unidades < 0:
+                    return item
+            for item, unidades in cambios.items():
+                self._existencias[item] += unidades
+            self._actualizar_agotados(list(cambios))
+        return None
+
+    def agregar_combo(self, combo_id: str, combo: FoodCombo) -> FoodCombo:
+        """
+        Registra (o vuelve a registrar) un combo con su id.
+
+        Los requisitos se calculan al registrar: si luego se agregan ítems a su árbol, el combo
+        debe registrarse de nuevo.
+        """
+        requisitos: dict[str, int] = {}
+        self._contar(combo, 1, requisitos)
+        with self._candado:
+            anterior = self._combos.get(combo_id)
+            if anterior is not None:
+                self._ids.pop(anterior.name, None)
+                for item in self._requisitos[combo_id]:
+                    self._dependientes[item].discard(combo_id)
+            self._combos[combo_id] = combo
+            self._ids[combo.name] = combo_id
+            self._requisitos[combo_id] = requisitos
+            for item in requisitos:
+                self._dependientes.setdefault(item, set()).add(combo_id)
+            self._actualizar_agotados(list(requisitos), cambio=True)
+        return combo
+
+    def _contar(self, item: MenuItem, veces: int, requisitos: dict[str, int]):
+        if isinstance(item, FoodCombo):
+            for hijo in item.items:
+                self._contar(hijo, veces, requisitos)
+        else:
+            requisitos[item.name] = requisitos.get(item.name, 0) + veces
+
+    def _actualizar_agotados(self, items: list[str], cambio: bool = False):
+        # Debe llamarse con el candado tomado
+        for combo_id in set().union(*(self._dependientes.get(item, ()) for item in items)):
+            agotado = any(self._existencias.get(item, unidades) < unidades
+                          for item, unidades in self._requisitos[combo_id].items())
+            if agotado != (combo_id in self._agotados):
+                cambio = True
+                if agotado:
+                    self._agotados.add(combo_id)
+                else:
+                    self._agotados.discard(combo_id)
+        if cambio:
+            self.version += 1
+
+    def resolver(self, clave: str) -> str | None:
+        """Id del combo con ese id o nombre, o None si no existe."""
+        return clave if clave in self._combos else self._ids.get(clave)
+
+    def obtener(self, clave: str) -> FoodCombo | None:
+        """Combo por id o por nombre (O(1))."""
+        combo_id = self.resolver(clave)
+        return None if combo_id is None else self._combos[combo_id]
+
+    def combos(self) -> list[tuple[str, FoodCombo]]:
+        return list(self._combos.items())
+
+    def agotado(self, clave: str) -> bool:
+        return self.resolver(clave) in self._agotados
+
+    def existencias(self, item: str) -> int | None:
+        """Unidades disponibles del ítem, o None si no se lleva su conteo."""
+        return self._existencias.get(item)
+
+    def reservar(self, clave: str, cantidad: int = 1) -> tuple[bool, str]:
+        """
+        Descuenta de forma atómica las existencias de todo el árbol de `cantidad` combos.
+
+        Returns:
+            Tupla con un booleano de éxito y un mensaje de error.
+        """
+        combo_id = self.resolver(clave)
+        if combo_id is None:
+            return False, f"Combo '{clave}' no disponible."
+        nombre = self._combos[combo_id].name
+        # Con existencias compartidas la copia local puede estar atrasada: decide la base
+        if self._almacen is None and combo_id in self._agotados:
+            return False, f"{nombre} está agotado"
+        faltante = self._mover({item: -unidades * cantidad for item, unidades in self._requisitos[combo_id].items()})
+        if faltante is not None:
+            return False, f"No hay suficientes unidades de {faltante} para {nombre}"
+        return True, ""
+
+    def devolver(self, clave: str, cantidad: int = 1):
+        """Reintegra las existencias de `cantidad` combos reservados (p. ej. si el pago falla)."""
+        combo_id = self.resolver(clave)
+        if combo_id is None:
+            return
+        self._mover({item: unidades * cantidad for item, unidades in self._requisitos[combo_id].items()})
+
+    def reponer(self, item: str, unidades: int):
+        """Suma unidades a las existencias de un ítem con conteo."""
+        self._mover({item: unidades})
+
+    def detalle(self, clave: str) -> dict | None:
+        """
+        Datos de un combo para el menú y los tickets: 'nombre', 'precio', 'descripcion',
+        'items' (con cantidades) y 'agotado'.
+        """
+        combo_id = self.resolver(clave)
+        if combo_id is None:
+            return None
+        combo = self._combos[combo_id]
+        return {
+            "nombre": combo.name,
+            "precio": combo.get_price(),
+            "descripcion": combo.get_description(),
+            "items": [item if unidades == 1 else f"{unidades} {item}"
+                      for item, unidades in self._requisitos[combo_id].items()],
+            "agotado": combo_id in self._agotados,
+        }
+
+    def menu(self) -> dict[str, dict]:
+        """Detalle de todos los combos por id; quien lo sirve debe cachearlo con la versión del catálogo."""
+        return {combo_id: self.detalle(combo_id) for combo_id in list(self._combos)}
+
+
+def crear_concesion(existencias: dict[str, int] | None = None) -> CatalogoConcesion:
+    """
+    Crea el catálogo de la confitería con su menú de combos (patrón Composite), en COP.
+
+    Genera:
+        - combo1, Combo Personal: crispetas medianas y gaseosa.
+        - combo2, Combo Pareja: crispetas grandes, dos gaseosas y chocolatina.
+        - combo3, Combo Familiar: dos Combos Pareja y nachos.
+    """
+    existencias = EXISTENCIAS if existencias is None else existencias
+    catalogo = CatalogoConcesion()
+    crispetas_medianas = IndividualItem("Crispetas Medianas", 20000)
+    crispetas_grandes = IndividualItem("Crispetas Grandes", 24000)
+    gaseosa = IndividualItem("Gaseosa 16oz", 10000)
+    chocolatina = IndividualItem("Chocolatina Jet", 5000)
+    nachos = IndividualItem("Nachos con Queso", 16000)
+    for item in (crispetas_medianas, crispetas_grandes, gaseosa, chocolatina, nachos):
+        catalogo.agregar_item(item, existencias.get(item.name))
+
+    personal = FoodCombo("Combo Personal", -2000)
+    personal.add_item(crispetas_medianas)
+    personal.add_item(gaseosa)
+
+    pareja = FoodCombo("Combo Pareja", -4000)
+    pareja.add_item(crispetas_grandes)
+    pareja.add_item(gaseosa)
+    pareja.add_item(gaseosa)
+    pareja.add_item(chocolatina)
+
+    familiar = FoodCombo("Combo Familiar", -41000)
+    familiar.add_item(pareja)
+    familiar.add_item(pareja)
+    familiar.add_item(nachos)
+
+    catalogo.agregar_combo("combo1", personal)
+    catalogo.agregar_combo("combo2", pareja)
+    catalogo.agregar_combo("combo3", familiar)
+    return catalogo
+
+
+# Catálogo compartido por el facade y el controlador
+concesion = crear_concesion()
@@ -0,0 +1,178 @@
+"""
+Módulo diario:
+Diario de ventas durable (append-only) para que el estado del cine sobreviva a reinicios.
+
+Cada venta de asientos o combos se agrega como una línea JSON. Las escrituras concurrentes se
+agrupan (group commit): el primer hilo que encuentra el diario libre escribe y hace fsync de
+todas las líneas pendientes, y los demás esperan esa misma escritura, de modo que una ráfaga
+de compras cuesta un solo fsync.
+
+Cada cierto número de eventos se guarda una fotografía compacta del estado (snapshot) y se
+empieza un diario nuevo; al arrancar basta con cargar la fotografía y reproducir la cola del
+diario actual. El cambio de estado de cada evento (`aplicar`) se hace solo después de que su
+escritura se sincroniza, con el diario tomado: la memoria nunca tiene una venta que el diario no
+tiene, y la fotografía incluye exactamente los eventos escritos en el diario que reemplaza (los
+que siguen en cola van al diario nuevo).
+
+Archivos en el directorio del diario:
+    snapshot.json          Estado compacto y generación del diario que lo continúa.
+    ventas.<generacion>.log  Eventos posteriores a la fotografía.
+"""
+
+import json
+import os
+import threading
+from typing import Callable
+
+EVENTOS_POR_SNAPSHOT = 10000
+
+
+class DiarioVentas:
+    def __init__(self, directorio: str, eventos_por_snapshot: int = EVENTOS_POR_SNAPSHOT):
+        self.directorio = directorio
+        self.eventos_por_snapshot = eventos_por_snapshot
+        # Función que retorna el estado completo (serializable a JSON) para la fotografía
+        self.capturar: Callable[[], dict] | None = None
+        os.makedirs(directorio, exist_ok=True)
+        # Un solo proceso escribe el diario: un worker creado con fork después de abrirlo no debe
+        # escribir ni compactar el mismo archivo que otros workers
+        self._pid = os.getpid()
+
+        self._ruta_snapshot = os.path.join(directorio, "snapshot.json")
+        snapshot = self._leer_snapshot()
+        self.generacion = snapshot.get("generacion", 0) if snapshot else 0
+        self._archivo = open(self._ruta_log(self.generacion), "ab")
+
+        self._cond = threading.Condition()
+        # Eventos en cola: (secuencia, línea, cambio del estado a aplicar al escribirla)
+        self._pendientes: list[tuple[int, bytes, Callable[[], None] | None]] = []
+        self._fallos: dict[int, Exception] = {}  # Cambios de estado que fallaron, por secuencia
+        self._secuencia = 0   # Último evento recibido
+        self._confirmada = 0  # Último evento escrito y sincronizado en disco
+        self._escribiendo = False
+        self._desde_snapshot = 0
+
+    def _ruta_log(self, generacion: int) -> str:
+        return os.path.join(self.directorio, f"ventas.{generacion}.log")
+
+    def _leer_snapshot(self) -> dict | None:
+        try:
+            with open(self._ruta_snapshot, "r", encoding="utf-8") as archivo:
+                return json.load(archivo)
+        except FileNotFoundError:
+            return None
+
+    def recuperar(self) -> tuple[dict | None, list[dict]]:
+        """
+        Retorna la última fotografía (o None) y los eventos registrados después de ella.
+
+        Una última línea incompleta (escritura interrumpida por una caída) se ignora.
+        """
+        snapshot = self._leer_snapshot()
+        eventos = []
+        with open(self._ruta_log(self.generacion), "rb") as archivo:
+            for linea in archivo:
+                try:
+                    eventos.append(json.loads(linea))
+                except ValueError:
+                    break
+        return snapshot, eventos
+
+    def registrar(self, evento: dict, aplicar: Callable[[], None] | None = None):
+        """
+        Agrega un evento y retorna cuando está sincronizado en disco.
+
+        Args:
+            aplicar: Cambio del estado que captura la fotografía (p. ej. el registro de ventas);
+                se ejecuta con el diario tomado y solo si el evento quedó escrito, así ninguna
+                fotografía ve el cambio sin el evento.
+
+        Raises:
+            El error de la escritura si el evento no se pudo escribir: no quedó registrado ni
+            se aplicó.
+        """
+        self._verificar_proceso()
+        linea = (json.dumps(evento, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._cond:
+            self._secuencia += 1
+            propia = self._secuencia
+            self._pendientes.append((propia, linea, aplicar))
+            while self._confirmada < propia:
+                if self._escribiendo:
+                    self._cond.wait()
+                else:
+                    self._escribir_pendientes(propia)
+            error = self._fallos.pop(propia, None)
+        if error is not None:
+            raise error
+
+    def _verificar_proceso(self):
+        if os.getpid() != self._pid:
+            raise RuntimeError(f"El diario de ventas de {self.directorio} se abrió en otro proceso "
+                               f"({self._pid}); con varios procesos use estado compartido")
+
+    def _escribir_pendientes(self, propia: int):
+        # Debe llamarse con la condición tomada; la suelta mientras escribe en disco
+        lote, self._pendientes = self._pendientes, []
+        self._escribiendo = True
+        self._cond.release()
+        try:
+            self._archivo.write(b"".join(linea for _, linea, _ in lote))
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+        except Exception:
+            # El evento propio se descarta (quien lo registró recibe el error); los de los demás
+            # vuelven a la cola y los escribe el siguiente hilo
+            self._cond.acquire()
+            self._pendientes[:0] = [pendiente for pendiente in lote if pendiente[0] != propia]
+            self._escribiendo = False
+            self._cond.notify_all()
+            raise
+        self._cond.acquire()
+        self._escribiendo = False
+        self._confirmada = lote[-1][0]
+        for secuencia, _, aplicar in lote:
+            if aplicar is not None:
+                try:
+                    aplicar()
+                except Exception as e:
+                    self._fallos[secuencia] = e
+        self._desde_snapshot += len(lote)
+        if self.capturar is not None and self._desde_snapshot >= self.eventos_por_snapshot:
+            self._compactar()
+        self._cond.notify_all()
+
+    def _compactar(self):
+        # Debe llamarse con la condición tomada y sin escritura en curso: el estado capturado
+        # tiene aplicados todos los eventos escritos, y los que siguen en cola (aún sin aplicar)
+        # se escribirán en el diario nuevo.
+        estado = dict(self.capturar(), generacion=self.generacion + 1)
+        temporal = self._ruta_snapshot + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(estado, archivo, separators=(",", ":"), ensure_ascii=False)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self._ruta_snapshot)
+
+        anterior = self._ruta_log(self.generacion)
+        self.generacion += 1
+        self._archivo.close()
+        self._archivo = open(self._ruta_log(self.generacion), "ab")
+        os.remove(anterior)
+        self._desde_snapshot = 0
+
+    def compactar(self):
+        """Fuerza una fotografía del estado y reinicia el diario."""
+        self._verificar_proceso()
+        with self._cond:
+            while self._escribiendo:
+                self._cond.wait()
+            if self.capturar is not None:
+                self._compactar()
+                self._cond.notify_all()
+
+    def cerrar(self):
+        with self._cond:
+            while self._escribiendo:
+                self._cond.wait()
+            self._archivo.close()
@@ -0,0 +1,114 @@
+"""
+Módulo distribucion:
+Distribución de una sala en filas y columnas y búsqueda de los mejores asientos contiguos.
+
+Los asientos se numeran por filas desde 1 (fila A = asientos 1..columnas, fila B = siguientes,
+etc.), igual que en la vista de la sala. Cada fila se representa con una máscara de asientos
+libres (bit c = columna c); de la máscara se obtienen, con tablas precalculadas, la corrida
+libre más larga de la fila y el mejor bloque de N asientos juntos. Así, encontrar los mejores
+N asientos de una función cuesta O(filas).
+
+El puntaje de un bloque es su distancia al centro de la sala: horizontal (centro del bloque
+contra el centro de la fila) y vertical (contra la fila preferida, un poco detrás de la mitad).
+Menor es mejor.
+"""
+
+import threading
+
+FILAS = 4
+COLUMNAS = 8  # Ver static/js/scripts.js
+PESO_FILA = 1.5  # Cuánto pesa alejarse de la fila preferida frente a alejarse del centro de la fila
+
+
+class DistribucionSala:
+    def __init__(self, filas: int = FILAS, columnas: int = COLUMNAS, fila_preferida: int | None = None):
+        self.filas = filas
+        self.columnas = columnas
+        self.capacidad = filas * columnas
+        # Por defecto, la fila ubicada a unos 3/5 de la sala desde la pantalla
+        self.fila_preferida = round((filas - 1) * 3 / 5) if fila_preferida is None else fila_preferida
+        self.mascara_completa = (1 << columnas) - 1
+        self._corridas = [self._calcular_corrida(m) for m in range(1 << columnas)] if columnas <= 16 else None
+        self._mejores: dict[tuple[int, int], int | None] = {}
+        self._candado = threading.Lock()
+
+    @classmethod
+    def para(cls, capacidad: int) -> "DistribucionSala":
+        """Distribución con COLUMNAS asientos por fila para la capacidad indicada."""
+        if capacidad == FILAS * COLUMNAS:
+            return DISTRIBUCION
+        columnas = min(COLUMNAS, capacidad)
+        return cls(-(-capacidad // columnas), columnas)
+
+    def fila_columna(self, numero: int) -> tuple[int, int]:
+        """Fila y columna (desde 0) del asiento `numero`."""
+        return divmod(numero - 1, self.columnas)
+
+    def numero(self, fila: int, columna: int) -> int:
+        return fila * self.columnas + columna + 1
+
+    def etiqueta(self, numero: int) -> str:
+        """Nombre del asiento para el público, p. ej. 'B4'."""
+        fila, columna = self.fila_columna(numero)
+        return f"{chr(ord('A') + fila)}{columna + 1}"
+
+    def _calcular_corrida(self, mascara: int) -> int:
+        mejor = actual = 0
+        for columna in range(self.columnas):
+            actual = actual + 1 if mascara >> columna & 1 else 0
+            mejor = max(mejor, actual)
+        return mejor
+
+    def corrida_maxima(self, mascara: int) -> int:
+        """Longitud de la corrida más larga de asientos libres de una fila."""
+        if self._corridas is not None:
+            return self._corridas[mascara]
+        return self._calcular_corrida(mascara)
+
+    def puntaje(self, fila: int, columna: int, cantidad: int) -> float:
+        """Distancia al centro de un bloque de `cantidad` asientos que empieza en (fila, columna)."""
+        horizontal = abs(columna + (cantidad - 1) / 2 - (self.columnas - 1) / 2)
+        return PESO_FILA * abs(fila - self.fila_preferida) + horizontal
+
+    def mejor_columna(self, mascara: int, cantidad: int) -> int | None:
+        """
+        Columna inicial del bloque libre de `cantidad` asientos más centrado de la fila, o None.
+        Los resultados se memorizan por (máscara, cantidad).
+        """
+        clave = (mascara, cantidad)
+        if clave in self._mejores:
+            return self._mejores[clave]
+        bloque = (1 << cantidad) - 1
+        centro = (self.columnas - cantidad) / 2
+        candidatas = [c for c in range(self.columnas - cantidad + 1) if mascara >> c & bloque == bloque]
+        mejor = min(candidatas, key=lambda c: abs(c - centro), default=None)
+        with self._candado:
+            self._mejores[clave] = mejor
+        return mejor
+
+    def mejores(self, mascaras: list[int], corridas: list[int] | bytearray, cantidad: int) -> list[int] | None:
+        """
+        Números de los `cantidad` asientos contiguos con mejor puntaje, o None si no hay.
+
+        Args:
+            mascaras: Máscara de asientos libres por fila.
+            corridas: Corrida libre más larga por fila (descarta filas sin espacio sin mirarlas).
+        """
+        if not 1 <= cantidad <= self.columnas:
+            return None
+        mejor = None
+        for fila in range(self.filas):
+            if corridas[fila] < cantidad:
+                continue
+            columna = self.mejor_columna(mascaras[fila], cantidad)
+            puntaje = self.puntaje(fila, columna, cantidad)
+            if mejor is None or puntaje < mejor[0]:
+                mejor = (puntaje, fila, columna)
+        if mejor is None:
+            return None
+        _, fila, columna = mejor
+        primero = self.numero(fila, columna)
+        return list(range(primero, primero + cantidad))
+
+
+DISTRIBUCION = DistribucionSala()
@@ -1,5 +1,24 @@
-from .bridge import WebApp, VentaAbstract
-from .composite import FoodCombo, IndividualItem
+import base64
+from datetime import date, datetime, time
+from html import escape
+from urllib.parse import quote
+
+from .bridge import RegistroCanales, VentaAbstract, canales as registro_canales
+from .cache import CacheVersionado
+from .catalogo import POR_PAGINA, CatalogoFunciones, Funcion, tipo_de_sala
+from .composite import FoodCombo
+from .concesion import CatalogoConcesion, concesion as catalogo_concesion
+from .diario import DiarioVentas
+from .distribucion import DistribucionSala
+from .inventario import LIBRE, OCUPADO, InventarioAsientos
+from .inventario_compartido import (DiarioCompartido, ExistenciasCompartidas, GestorRetencionesCompartido,
+                                    InventarioCompartido)
+from .metricas import asientos_vendidos, combos_vendidos, cronometrado
+from .pagos import ProcesadorPagos, procesador_pagos
+from .precios import MotorPrecios
+from .retenciones import GestorRetenciones
+from .tickets import FORMATOS, formatear_precio, renderizador
+from .ventas import FORMATOS_EXPORTACION, RegistroVentas
 
 """
 Módulo facade: Provee una interfaz simplificada para interactuar con la lógica del sistema de cine.
@@ -8,153 +27,781 @@ la generación y emisión de tickets, la validación de asientos y pagos, y el m
 Utiliza patrones de diseño (Composite y Bridge) para estructurar la venta y combinaciones de productos.
 """
 
+INTENTOS_MEJORES_ASIENTOS = 3  # Búsquedas al retener los mejores asientos si otro comprador se adelanta
+MARGEN_CONFIRMACION = 5  # Segundos que una retención sigue vigente después del tiempo máximo de cobro
+AGRUPACIONES_REPORTE = ("funcion", "sala", "combo")
+
 class CineFacade:
-    def __init__(self):
+    def __init__(self, pagos: ProcesadorPagos | None = None, diario: DiarioVentas | DiarioCompartido | None = None,
+                 inventario: InventarioAsientos | InventarioCompartido | None = None,
+                 canales: RegistroCanales | None = None, concesion: CatalogoConcesion | None = None):
         # Inicializa datos básicos de la función cinematográfica, estados de asientos y menú de combos.
         self.pelicula = "Avengers"
         self.hora = "18:00"
         self.sala = "Sala IMAX"
-        self.asientos_ocupados = set()
-        self.estado_asientos = {}
-        self.menu_combos = self.crear_menu_combos()
+        self.sala_id = self.sala.replace(" ", "_")
+        # Con un InventarioCompartido el estado de asientos y retenciones, las ventas y las
+        # existencias de la confitería viven en SQLite y son los mismos para todos los procesos;
+        # si no, se guardan en memoria del proceso.
+        self.inventario = inventario or InventarioAsientos()
+        if isinstance(self.inventario, InventarioCompartido):
+            self.retenciones = GestorRetencionesCompartido(self.inventario)
+        else:
+            self.retenciones = GestorRetenciones(self.inventario)
+        self.pagos = pagos or procesador_pagos
+        # Canales de venta compartidos (Bridge): el web emite los tickets de la respuesta y los
+        # canales en cola (correo, sms, kiosco) los entregan después en segundo plano
+        self.canales = canales or registro_canales
+        self._venta_web = VentaAbstract(self.canales.obtener("web"))
+        # Catálogo de funciones de la cartelera; la función por defecto conserva su clave histórica
+        self.catalogo = CatalogoFunciones()
+        self.catalogo.agregar(self.pelicula, self.sala, datetime.combine(date.today(), time.fromisoformat(self.hora)),
+                              id=self.hora)
+        # Precios de las entradas: reglas compiladas en una tabla (ver models/precios.py)
+        self.precios = MotorPrecios(DistribucionSala.para(self.inventario.capacidad))
+        # Catálogo único de la confitería (combos por id y existencias), compartido con el controlador
+        self.concesion = concesion or catalogo_concesion
+        if isinstance(self.inventario, InventarioCompartido):
+            self.concesion.compartir_existencias(ExistenciasCompartidas(self.inventario))
+        # Versiones de los datos que alimentan las respuestas cacheadas
+        self.version_cartelera = 0
+        self.version_catalogo = 0
+        self._cache = CacheVersionado("facade")
+        self._fragmentos = CacheVersionado("fragmentos")  # HTML de cada función de la cartelera
+        # Registro columnar de las ventas para los reportes de gerencia (se reconstruye con el diario)
+        self.ventas = RegistroVentas(self.inventario.capacidad)
+        # Diario durable de ventas (opcional): recupera el estado al arrancar. Con estado
+        # compartido las ventas se guardan siempre en la base común
+        self.combos_vendidos: dict[str, int] = {}
+        self.diario = None
+        if diario is None and isinstance(self.inventario, InventarioCompartido):
+            diario = DiarioCompartido(self.inventario)
+        if diario is not None:
+            self.adjuntar_diario(diario)
 
-    def crear_menu_combos(self) -> list[FoodCombo]:
+    @property
+    def menu_combos(self) -> list[FoodCombo]:
+        """Combos de la confitería (árboles del patrón Composite), en el orden del catálogo."""
+        return [combo for _, combo in self.concesion.combos()]
+
+    def generar_cartelera_html(self, pagina: int = 1, por_pagina: int = POR_PAGINA,
+                               desde: datetime | None = None, **filtros) -> str:
         """
-        Crea y configura el menú de combos aplicando el patrón Composite.
+        Genera el HTML de una página de la cartelera.
+        
+        Cada función se renderiza una sola vez como un fragmento HTML cacheado con su versión;
+        una página es la concatenación de los fragmentos de sus funciones más la paginación,
+        y también se cachea hasta que cambie el catálogo o se llame a invalidar_cartelera.
         
-        Genera:
-            - Combo Individual: Incluye gaseosa y palomitas.
-            - Combo Dúo: Combina un Combo Individual y nachos.
-            - Combo Max: Combina un Combo Dúo y hotdog.
+        Args:
+            pagina: Número de página (desde 1).
+            por_pagina: Funciones por página.
+            desde: Mostrar solo funciones que empiezan desde esta fecha y hora.
+            filtros: pelicula, sala_id, tipo o fecha (ver CatalogoFunciones.buscar).
             
         Returns:
-            Lista de FoodCombo disponibles para la compra de combos.
+            Cadena HTML con las funciones de la página.
         """
-        # Crear ítems individuales
-        gaseosa = IndividualItem("Gaseosa", 6.0)
-        palomitas = IndividualItem("Palomitas", 8.0)
-        nachos = IndividualItem("Nachos", 7.5)
-        hotdog = IndividualItem("Hot Dog", 9.0)
-
-        # Crear combos
-        combo_individual = FoodCombo("Combo Individual", -2.0)
-        combo_individual.add_item(gaseosa)
-        combo_individual.add_item(palomitas)
-
-        combo_duo = FoodCombo("Combo Dúo", -3.5)
-        combo_duo.add_item(combo_individual)
-        combo_duo.add_item(nachos)
+        clave = ("cartelera", pagina, por_pagina, desde, tuple(sorted(filtros.items())))
+        return self._cache.obtener(clave, (self.version_cartelera, self.catalogo.version),
+                                   lambda: self._renderizar_cartelera(pagina, por_pagina, desde, filtros))
 
-        combo_max = FoodCombo("Combo Max", -4.0)
-        combo_max.add_item(combo_duo)
-        combo_max.add_item(hotdog)
+    def _renderizar_cartelera(self, pagina: int, por_pagina: int, desde: datetime | None, filtros: dict) -> str:
+        funciones, total = self.catalogo.pagina(pagina, por_pagina, desde, **filtros)
+        fragmentos = [self._fragmentos.obtener((funcion.sala_id, funcion.id),
+                                               (self.version_cartelera, funcion.version),
+                                               lambda funcion=funcion: self._renderizar_funcion(funcion))
+                      for funcion in funciones]
+        paginas = max(1, -(-total // por_pagina))
+        if paginas > 1:
+            fragmentos.append(self._renderizar_paginacion(pagina, paginas))
+        return "".join(fragmentos)
 
-        return [combo_individual, combo_duo, combo_max]
-
-    def generar_cartelera_html(self) -> str:
-        """
-        Genera el HTML para la cartelera de la función.
-        
-        Reemplaza espacios en el nombre de la sala para formar la URL correcta, e inserta
-        los detalles de película, sala y hora, junto con un botón para acceder a la compra.
-        
-        Returns:
-            Cadena HTML con la información de la función.
-        """
-        sala_id = self.sala.replace(" ", "_")
+    def _renderizar_funcion(self, funcion: Funcion) -> str:
         return f"""
         <div class='funcion card mb-3'>
             <div class='card-body'>
-                <h4 class='card-title'>{self.pelicula}</h4>
-                <p class='card-text'>Sala: {self.sala} | Hora: {self.hora}</p>
-                <a href='/sala/{sala_id}' class='btn btn-primary btn-comprar'>
+                <h4 class='card-title'>{escape(funcion.pelicula)}</h4>
+                <p class='card-text'>Sala: {escape(funcion.sala)} | Hora: {funcion.inicio:%H:%M}</p>
+                <a href='/sala/{quote(funcion.sala_id)}?funcion={quote(funcion.id)}' class='btn btn-primary btn-comprar'>
                     Comprar
                 </a>
             </div>
         </div>
         """
 
-    def verificar_disponibilidad(self, asientos: list) -> tuple[bool, str]:
+    def _renderizar_paginacion(self, pagina: int, paginas: int) -> str:
+        # Enlaces a la primera, la última y las páginas vecinas de la actual
+        numeros = sorted({1, paginas, *range(max(1, pagina - 2), min(paginas, pagina + 2) + 1)})
+        enlaces = []
+        for anterior, numero in zip([0] + numeros, numeros):
+            if numero - anterior > 1:
+                enlaces.append("<li class='page-item disabled'><span class='page-link'>…</span></li>")
+            enlaces.append(f"<li class='page-item{' active' if numero == pagina else ''}'>"
+                           f"<a class='page-link' href='/?pagina={numero}'>{numero}</a></li>")
+        return f"<nav><ul class='pagination justify-content-center'>{''.join(enlaces)}</ul></nav>"
+
+    def agregar_funcion(self, pelicula: str, sala: str, inicio: datetime, id: str | None = None) -> Funcion:
+        """Agrega una función a la cartelera; su clave en el inventario es `id` o '<AAAA-MM-DD HH:MM>'."""
+        return self.catalogo.agregar(pelicula, sala, inicio, id=id)
+
+    def buscar_funciones(self, desde: datetime | None = None, hasta: datetime | None = None,
+                         **filtros) -> list[Funcion]:
+        """Busca funciones por rango de inicio y atributos (ver CatalogoFunciones.buscar)."""
+        return self.catalogo.buscar(desde, hasta, **filtros)
+
+    def _resolver_funcion(self, sala_id: str | None, funcion: str | None) -> tuple[str, str]:
+        """Completa sala y función con los valores de la función por defecto."""
+        return sala_id or self.sala_id, funcion or self.hora
+
+    def _validar_funcion(self, sala_id: str, funcion: str) -> str:
+        """Retorna un mensaje de error si la función no está en la cartelera (solo esas se venden)."""
+        if not isinstance(sala_id, str) or not isinstance(funcion, str):
+            return "La sala y la función deben ser texto"
+        if self.catalogo.obtener(sala_id, funcion) is None:
+            return f"La función {funcion} de {sala_id} no existe"
+        return ""
+
+    def _numeros_asientos(self, sala_id: str, asientos: list) -> tuple[list[int], str]:
+        """
+        Traduce los identificadores de asiento a números dentro de la sala.
+
+        Returns:
+            Tupla con la lista de números y un mensaje de error (vacío si todos son válidos).
+        """
+        numeros = []
+        for asiento in asientos:
+            try:
+                numeros.append(self.inventario.numero_asiento(sala_id, asiento))
+            except ValueError as e:
+                return [], str(e)
+        return numeros, ""
+
+    def _registrar_asientos(self, sala_id: str, funcion: str, numeros: list[int], estado: str,
+                            precios: list[int]):
+        """Registra en el diario y en el registro de ventas una venta (OCUPADO) o su reversión (LIBRE)."""
+        if not numeros:
+            return
+        instante = datetime.now().timestamp()
+
+        def aplicar():
+            if estado == OCUPADO:
+                asientos_vendidos.incrementar(cantidad=len(numeros))
+            self.ventas.registrar_entradas(sala_id, funcion, numeros, precios, 1 if estado == OCUPADO else -1,
+                                           instante=instante)
+
+        if self.diario is None:
+            aplicar()
+            return
+        self.diario.registrar({"tipo": "asientos", "sala": sala_id, "funcion": funcion, "numeros": list(numeros),
+                               "estado": estado, "precios": list(precios), "instante": instante}, aplicar)
+
+    def validar_entregas(self, entregas: dict | None) -> str:
+        """Retorna un mensaje de error si algún canal de entrega no existe o no entrega en cola."""
+        if not entregas:
+            return ""
+        if not isinstance(entregas, dict):
+            return "Entregas inválidas"
+        for nombre in entregas:
+            if not self.canales.es_en_cola(nombre):
+                return f"Canal de entrega no disponible: {nombre}"
+        return ""
+
+    def entregar_venta(self, datos: dict, entregas: dict | None):
+        """
+        Encola la venta en los canales de entrega indicados (canal -> destino) sin esperarlos.
+
+        Se llama con la venta ya confirmada: una entrega fallida no la revierte.
+        """
+        for nombre, destino in (entregas or {}).items():
+            VentaAbstract(self.canales.obtener(nombre)).realizar_venta(dict(datos, destino=destino))
+
+    def _datos_entradas(self, sala_id: str, funcion: str, asientos: list[str], precios: list[int]) -> dict:
+        return {"sala": sala_id, "funcion": funcion, "asientos": list(asientos), "precio": list(precios),
+                "total": sum(precios)}
+
+    def _inicio_funcion(self, sala_id: str, funcion: str) -> tuple[str, datetime]:
+        """
+        Tipo de sala e inicio con que se cotiza una función. Las claves que no están en el
+        catálogo se cotizan con el tipo deducido de la sala y la fecha u hora de la clave (o la
+        hora de la función por defecto, si la clave no la tiene).
+        """
+        registrada = self.catalogo.obtener(sala_id, funcion)
+        if registrada is not None:
+            return registrada.tipo, registrada.inicio
+        try:
+            inicio = datetime.fromisoformat(funcion)
+        except ValueError:
+            try:
+                inicio = datetime.combine(date.today(), time.fromisoformat(funcion))
+            except ValueError:
+                inicio = datetime.combine(date.today(), time.fromisoformat(self.hora))
+        return tipo_de_sala(sala_id), inicio
+
+    def precios_asientos(self, sala_id: str, funcion: str, numeros: list[int],
+                         tipo_venta: str = "regular") -> list[int]:
+        """Precio de cada asiento según la ocupación actual de la función (una indexación de la tabla)."""
+        tipo, inicio = self._inicio_funcion(sala_id, funcion)
+        vendidos = len(self.inventario.ocupados(sala_id, funcion))
+        return self.precios.cotizar(tipo, inicio, vendidos, numeros, tipo_venta).tolist()
+
+    @cronometrado("facade.cotizar_asientos")
+    def cotizar_asientos(self, asientos: list, sala_id: str | None = None, funcion: str | None = None,
+                         tipo_venta: str = "regular") -> tuple[bool, str, dict]:
+        """
+        Cotiza una selección de asientos con el mismo motor con que se cobran.
+
+        Al retener los asientos, la retención guarda estos precios y son los que se cobran al
+        confirmarla, aunque la ocupación cambie mientras tanto.
+
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error y la cotización: 'sala',
+            'funcion', 'asientos', 'precios' (uno por asiento) y 'total'.
+        """
+        if not self.precios.tipo_venta_valido(tipo_venta):
+            return False, f"Tipo de venta inválido: {tipo_venta}", {}
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        numeros, error = self._numeros_asientos(sala_id, asientos)
+        if error:
+            return False, error, {}
+        precios = self.precios_asientos(sala_id, funcion, numeros, tipo_venta)
+        return True, "", {"sala": sala_id, "funcion": funcion, "asientos": list(asientos),
+                          "precios": precios, "total": sum(precios)}
+
+    @cronometrado("facade.cotizar_funciones")
+    def cotizar_funciones(self, funciones: list[Funcion], tipo_venta: str = "regular") -> tuple[bool, str, list[dict]]:
+        """
+        Cotiza una cuadrícula de funciones (p. ej. una página de la cartelera) en una sola llamada.
+
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error y, por función, 'sala_id', 'id',
+            'desde' (el precio más bajo) y 'filas' (etiqueta de la fila -> precio).
+        """
+        if not self.precios.tipo_venta_valido(tipo_venta):
+            return False, f"Tipo de venta inválido: {tipo_venta}", []
+        if not funciones:
+            return True, "", []
+        vendidos = [len(self.inventario.ocupados(funcion.sala_id, funcion.id)) for funcion in funciones]
+        tabla = self.precios.cotizar_funciones([funcion.tipo for funcion in funciones],
+                                               [funcion.inicio for funcion in funciones], vendidos, tipo_venta)
+        filas = [chr(ord("A") + fila) for fila in range(tabla.shape[1])]
+        return True, "", [{"sala_id": funcion.sala_id, "id": funcion.id, "desde": min(precios),
+                           "filas": dict(zip(filas, precios))}
+                          for funcion, precios in zip(funciones, tabla.tolist())]
+
+    def registrar_venta_combo(self, nombre_combo: str, precio: float, sala_id: str | None = None,
+                              funcion: str | None = None):
+        """
+        Registra la venta de un combo en el diario y, una vez escrita, la contabiliza.
+        
+        Args:
+            nombre_combo: Nombre (o id) del combo vendido.
+            precio: Precio cobrado.
+            sala_id: Sala de la función del comprador, si se conoce.
+            funcion: Horario de la función del comprador, si se conoce (para la tasa de combos
+                por entrada de cada función).
+        """
+        if funcion is not None:
+            sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        instante = datetime.now().timestamp()
+
+        def aplicar():
+            combos_vendidos.incrementar(nombre_combo)
+            self.combos_vendidos[nombre_combo] = self.combos_vendidos.get(nombre_combo, 0) + 1
+            self.ventas.registrar_combo(nombre_combo, precio, sala_id, funcion, instante=instante)
+
+        if self.diario is None:
+            aplicar()
+            return
+        self.diario.registrar({"tipo": "combo", "combo": nombre_combo, "precio": precio, "sala": sala_id,
+                               "funcion": funcion, "instante": instante}, aplicar)
+
+    def adjuntar_diario(self, diario: DiarioVentas | DiarioCompartido):
+        """
+        Recupera las ventas del diario y registra en él las siguientes.
+
+        Debe llamarse antes de la primera venta; permite crear el facade sin abrir archivos y
+        abrir el diario solo al arrancar la aplicación. Un DiarioCompartido no restaura el
+        inventario (ya está en la base): solo el registro de ventas y el conteo de combos.
+        """
+        self.diario = diario
+        if isinstance(diario, DiarioCompartido):
+            diario.reproducir = self._reproducir_venta
+            diario.sincronizar()
+            return
+        self._restaurar_estado()
+        diario.capturar = self._capturar_estado
+
+    def _capturar_estado(self) -> dict:
+        """Estado compacto para la fotografía del diario: mapas de vendidos, conteo de combos y registro de ventas."""
+        return {
+            "mapas": [[sala_id, funcion, base64.b64encode(bits).decode("ascii")]
+                      for sala_id, funcion, bits in self.inventario.exportar()],
+            "combos": dict(self.combos_vendidos),
+            "ventas": self.ventas.empaquetado(),
+        }
+
+    def _restaurar_estado(self):
+        """
+        Reconstruye las ventas (asientos, combos y el registro de los reportes) a partir de la
+        última fotografía y la cola del diario.
+
+        Los diarios anteriores al registro de ventas no guardan precios ni instantes: esas
+        ventas se registran con los precios del motor y el instante del arranque.
+        """
+        snapshot, eventos = self.diario.recuperar()
+        if snapshot:
+            for sala_id, funcion, bits in snapshot.get("mapas", []):
+                self.inventario.restaurar_empaquetado(sala_id, funcion, base64.b64decode(bits))
+            self.combos_vendidos.update(snapshot.get("combos", {}))
+            if "ventas" in snapshot:
+                self.ventas.cargar(snapshot["ventas"])
+            else:
+                for sala_id, funcion, _ in snapshot.get("mapas", []):
+                    numeros = [self.inventario.numero_asiento(sala_id, asiento)
+                               for asiento in self.inventario.ocupados(sala_id, funcion)]
+                    self.ventas.registrar_entradas(sala_id, funcion, numeros,
+                                                   self.precios_asientos(sala_id, funcion, numeros))
+                for combo_id, unidades in snapshot.get("combos", {}).items():
+                    combo = self.concesion.obtener(combo_id)
+                    for _ in range(unidades):
+                        self.ventas.registrar_combo(combo_id, combo.get_price() if combo is not None else 0)
+        for evento in eventos:
+            if evento.get("tipo") == "asientos":
+                self.inventario.restaurar(evento["sala"], evento["funcion"], evento["numeros"],
+                                          evento["estado"] == OCUPADO)
+            self._reproducir_venta(evento)
+
+    def _reproducir_venta(self, evento: dict):
+        """Aplica al registro de ventas y al conteo de combos una venta recuperada o de otro proceso."""
+        if evento.get("tipo") == "asientos":
+            sala_id, funcion, numeros = evento["sala"], evento["funcion"], evento["numeros"]
+            precios = evento.get("precios") or self.precios_asientos(sala_id, funcion, numeros)
+            self.ventas.registrar_entradas(sala_id, funcion, numeros, precios,
+                                           1 if evento["estado"] == OCUPADO else -1,
+                                           instante=evento.get("instante"))
+        elif evento.get("tipo") == "combo":
+            self.combos_vendidos[evento["combo"]] = self.combos_vendidos.get(evento["combo"], 0) + 1
+            self.ventas.registrar_combo(evento["combo"], evento["precio"], evento.get("sala"),
+                                        evento.get("funcion"), instante=evento.get("instante"))
+
+    def _sincronizar_ventas(self):
+        """Con estado compartido, aplica antes de un reporte las ventas de los demás workers."""
+        if isinstance(self.diario, DiarioCompartido):
+            self.diario.sincronizar()
+
+    def verificar_disponibilidad(self, asientos: list, sala_id: str | None = None,
+                                 funcion: str | None = None) -> tuple[bool, str]:
         """
         Verifica la disponibilidad de los asientos solicitados.
         
-        Recorre la lista de asientos y comprueba en el diccionario de estados si se encuentran ocupados.
+        Consulta el mapa de bits de la función en el inventario (O(1) por asiento). Un asiento
+        retenido por otro comprador tampoco está disponible.
         
         Args:
             asientos: Lista de identificadores de asientos a verificar.
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
             
         Returns:
             Una tupla donde el primer valor es un booleano indicando disponibilidad, y el
             segundo un mensaje de error en caso de que el asiento no esté disponible.
         """
-        for asiento in asientos:
-            if asiento in self.estado_asientos and self.estado_asientos[asiento] == "ocupado":
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        numeros, error = self._numeros_asientos(sala_id, asientos)
+        if error:
+            return False, error
+        for asiento, numero in zip(asientos, numeros):
+            if not self.inventario.esta_libre(sala_id, funcion, numero):
                 return False, f"El asiento {asiento} ya no está disponible"
         return True, ""
 
-    def verificar_pago(self, payment_data: dict) -> tuple[bool, str]:
+    @cronometrado("facade.verificar_pago")
+    def verificar_pago(self, payment_data: dict, monto: float = 0.0) -> tuple[bool, str]:
         """
-        Valida los datos de pago recibidos.
+        Cobra el monto indicado a través de la pasarela de pagos.
         
-        Se requieren datos completos y se comparan contra valores de prueba predeterminados.
+        El cobro se ejecuta en el pool del ProcesadorPagos, con límite de concurrencia y
+        tiempo máximo; nunca debe llamarse con un candado de asientos tomado.
         
         Args:
             payment_data: Diccionario con los detalles del pago.
+            monto: Valor a cobrar en COP.
             
         Returns:
             Una tupla donde el primer elemento indica si el pago es válido y el segundo un mensaje de error.
         """
-        if not payment_data:
-            return False, "Datos de pago faltantes"
-            
-        # Validación de tarjeta de prueba
-        if payment_data.get('cardNumber') != '4242424242424242':
-            return False, "Número de tarjeta inválido"
-            
-        if payment_data.get('cardExpiry') != '12/25':
-            return False, "Fecha de expiración inválida"
-            
-        if payment_data.get('cardCvv') != '123':
-            return False, "CVV inválido"
-            
-        return True, ""
+        return self.pagos.cobrar(payment_data, monto)
 
-    def procesar_compra(self, asientos: list, payment_data: dict) -> tuple[bool, str, list]:
+    @cronometrado("facade.procesar_compra")
+    def procesar_compra(self, asientos: list, payment_data: dict, sala_id: str | None = None,
+                        funcion: str | None = None, formato: str = "html",
+                        entregas: dict | None = None, tipo_venta: str = "regular") -> tuple[bool, str, list]:
         """
         Procesa la compra de entradas para los asientos indicados.
         
-        Se verifican primero la disponibilidad de los asientos y la validez de los datos de pago.
-        Si todo es correcto, genera un ticket para cada asiento, actualiza el estado de los mismos,
-        y retorna una lista de tickets generados.
+        Sigue el flujo reservar -> pagar -> confirmar: los asientos se retienen de forma atómica
+        (todos o ninguno), se cobra sin mantener ningún candado, y luego se confirman como
+        vendidos o se liberan si el pago falla. Los tickets se generan en una sola pasada.
         
         Args:
             asientos: Lista de asientos solicitados.
             payment_data: Información del pago.
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            formato: "html" (un ticket por asiento), "lote" (un ticket HTML para todos los
+                asientos) o "json" (ticket estructurado).
+            entregas: Canales de entrega en cola y su destino (p. ej. {"correo": "ana@mail.co"});
+                se encolan después de confirmar la venta y no demoran la respuesta.
+            tipo_venta: "regular", "nino" o "adulto_mayor" (ver models/precios.py).
             
         Returns:
             Una tupla que contiene:
                 - Booleano indicando éxito.
                 - Mensaje de error (vacío si no hay error).
-                - Lista de tickets en formato HTML.
+                - Lista de tickets en el formato solicitado.
         """
-        disponible, error = self.verificar_disponibilidad(asientos)
+        if formato not in FORMATOS:
+            return False, f"Formato de ticket inválido: {formato}", []
+        if not self.precios.tipo_venta_valido(tipo_venta):
+            return False, f"Tipo de venta inválido: {tipo_venta}", []
+        error = self.validar_entregas(entregas)
+        if error:
+            return False, error, []
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        error = self._validar_funcion(sala_id, funcion)
+        if error:
+            return False, error, []
+        disponible, error = self.verificar_disponibilidad(asientos, sala_id, funcion)
         if not disponible:
             return False, error, []
 
-        pago_valido, error = self.verificar_pago(payment_data)
+        # Reserva atómica: otro comprador pudo tomar los asientos después de la verificación
+        numeros, _ = self._numeros_asientos(sala_id, asientos)
+        precios = self.precios_asientos(sala_id, funcion, numeros, tipo_venta)
+        conflicto = self.inventario.retener(sala_id, funcion, numeros)
+        if conflicto is not None:
+            return False, f"El asiento {sala_id}-{conflicto} ya no está disponible", []
+
+        pago_valido, error = self.verificar_pago(payment_data, sum(precios))
+        if not pago_valido:
+            self.inventario.soltar(sala_id, funcion, numeros)
+            return False, error, []
+
+        # La venta queda en el diario antes que en el inventario: si no se puede registrar, los
+        # asientos siguen retenidos y se sueltan
+        try:
+            self._registrar_asientos(sala_id, funcion, numeros, OCUPADO, precios)
+        except Exception as e:
+            self.inventario.soltar(sala_id, funcion, numeros)
+            self.pagos.anular(payment_data, sum(precios))
+            return False, f"Error registrando la venta: {str(e)}", []
+        self.inventario.confirmar(sala_id, funcion, numeros)
+        try:
+            tickets = renderizador.entradas(asientos, precios, formato, sala_id, funcion)
+        except Exception as e:
+            self.inventario.liberar(sala_id, funcion, numeros)
+            self._registrar_asientos(sala_id, funcion, numeros, LIBRE, precios)
+            self.pagos.anular(payment_data, sum(precios))
+            return False, f"Error generando tickets: {str(e)}", []
+        self.entregar_venta(self._datos_entradas(sala_id, funcion, asientos, precios), entregas)
+        return True, "", tickets
+
+    @cronometrado("facade.procesar_compra_lote")
+    def procesar_compra_lote(self, ordenes: list[dict], formato: str = "json") -> list[dict]:
+        """
+        Procesa muchas órdenes de compra (ventas corporativas o de colegios) en bloque.
+        
+        Las órdenes se validan, se agrupan por función y cada grupo se reserva tomando el
+        candado de la función una sola vez. Los cobros se hacen en paralelo y sin candados;
+        luego cada grupo se confirma (o se libera) en otra pasada, y solo entonces se generan
+        los tickets. Los precios se cotizan con la ocupación de cada función antes del lote. Cada
+        orden se resuelve de forma independiente: una orden fallida no afecta a las demás, y
+        ningún asiento queda retenido si el lote se interrumpe.
+        
+        Args:
+            ordenes: Lista de diccionarios con 'asientos', 'payment_data' y opcionalmente
+                'sala', 'funcion', 'entregas' y 'tipo_venta' (ver procesar_compra).
+            formato: Formato de los tickets ("html", "lote" o "json").
+            
+        Returns:
+            Lista con un resultado por orden (en el mismo orden): 'success', 'error',
+            'tickets' y 'total'.
+        """
+        resultados = [{"success": False, "error": "", "tickets": [], "total": 0} for _ in ordenes]
+        if formato not in FORMATOS:
+            for resultado in resultados:
+                resultado["error"] = f"Formato de ticket inválido: {formato}"
+            return resultados
+
+        grupos: dict[tuple[str, str], list[tuple[int, list[int]]]] = {}
+        for indice, orden in enumerate(ordenes):
+            asientos = orden.get("asientos") or []
+            if not asientos:
+                resultados[indice]["error"] = "No se seleccionaron asientos"
+                continue
+            if not self.precios.tipo_venta_valido(orden.get("tipo_venta", "regular")):
+                resultados[indice]["error"] = f"Tipo de venta inválido: {orden.get('tipo_venta')}"
+                continue
+            error = self.validar_entregas(orden.get("entregas"))
+            if error:
+                resultados[indice]["error"] = error
+                continue
+            clave = self._resolver_funcion(orden.get("sala"), orden.get("funcion"))
+            error = self._validar_funcion(*clave)
+            if error:
+                resultados[indice]["error"] = error
+                continue
+            numeros, error = self._numeros_asientos(clave[0], asientos)
+            if error:
+                resultados[indice]["error"] = error
+                continue
+            grupos.setdefault(clave, []).append((indice, numeros))
+
+        # Cotizar: la función (tipo, inicio y vendidos) se consulta una vez por grupo
+        precios: dict[int, list[int]] = {}
+        for (sala_id, funcion), pedidos in grupos.items():
+            tipo, inicio = self._inicio_funcion(sala_id, funcion)
+            vendidos = len(self.inventario.ocupados(sala_id, funcion))
+            for indice, numeros in pedidos:
+                precios[indice] = self.precios.cotizar(tipo, inicio, vendidos, numeros,
+                                                       ordenes[indice].get("tipo_venta", "regular")).tolist()
+
+        # Los asientos se retienen sin una Retencion que los venza: todo lo que no llegue a
+        # confirmarse (pago rechazado o un error a mitad del lote) se suelta en el finally, y sus
+        # cobros aprobados se anulan
+        reservados: list[tuple[str, str, int, list[int]]] = []
+        cobros: list[tuple[bool, str]] = []
+        confirmadas: set[int] = set()
+        try:
+            # Reservar: una pasada con candado por función
+            for (sala_id, funcion), pedidos in grupos.items():
+                conflictos = self.inventario.reservar_lote(sala_id, funcion, [numeros for _, numeros in pedidos],
+                                                           retener=True)
+                for (indice, numeros), conflicto in zip(pedidos, conflictos):
+                    if conflicto is not None:
+                        resultados[indice]["error"] = f"El asiento {sala_id}-{conflicto} ya no está disponible"
+                    else:
+                        reservados.append((sala_id, funcion, indice, numeros))
+
+            # Pagar: todos los cobros en paralelo, sin candados
+            cobros = self.pagos.cobrar_varios([
+                (ordenes[indice].get("payment_data"), sum(precios[indice]))
+                for _, _, indice, _ in reservados
+            ])
+
+            # Confirmar y registrar: una pasada por función con las órdenes pagadas
+            pagadas: dict[tuple[str, str], list[tuple[int, list[int]]]] = {}
+            for (sala_id, funcion, indice, numeros), (pago_valido, error) in zip(reservados, cobros):
+                if pago_valido:
+                    pagadas.setdefault((sala_id, funcion), []).append((indice, numeros))
+                else:
+                    resultados[indice]["error"] = error
+            for (sala_id, funcion), pedidos in pagadas.items():
+                numeros = [numero for _, numeros_orden in pedidos for numero in numeros_orden]
+                try:
+                    self._registrar_asientos(sala_id, funcion, numeros, OCUPADO,
+                                             [precio for indice, _ in pedidos for precio in precios[indice]])
+                except Exception as e:
+                    # Sin confirmar: el finally suelta los asientos y anula los cobros
+                    for indice, _ in pedidos:
+                        resultados[indice]["error"] = f"Error registrando la venta: {str(e)}"
+                    continue
+                self.inventario.confirmar(sala_id, funcion, numeros)
+                confirmadas.update(indice for indice, _ in pedidos)
+        finally:
+            sueltos: dict[tuple[str, str], list[int]] = {}
+            for posicion, (sala_id, funcion, indice, numeros) in enumerate(reservados):
+                if indice in confirmadas:
+                    continue
+                sueltos.setdefault((sala_id, funcion), []).extend(numeros)
+                if posicion < len(cobros) and cobros[posicion][0]:
+                    self.pagos.anular(ordenes[indice].get("payment_data"), sum(precios[indice]))
+            for (sala_id, funcion), numeros in sueltos.items():
+                self.inventario.soltar(sala_id, funcion, numeros)
+
+        # Tickets y entregas, con las ventas ya confirmadas: una orden cuyos tickets fallan se
+        # revierte sola
+        for sala_id, funcion, indice, numeros in reservados:
+            if indice not in confirmadas:
+                continue
+            resultado = resultados[indice]
+            asientos = ordenes[indice]["asientos"]
+            try:
+                resultado["tickets"] = renderizador.entradas(asientos, precios[indice], formato, sala_id, funcion)
+            except Exception as e:
+                self.inventario.liberar(sala_id, funcion, numeros)
+                self._registrar_asientos(sala_id, funcion, numeros, LIBRE, precios[indice])
+                self.pagos.anular(ordenes[indice].get("payment_data"), sum(precios[indice]))
+                resultado["error"] = f"Error generando tickets: {str(e)}"
+                continue
+            resultado["success"] = True
+            resultado["total"] = sum(precios[indice])
+            self.entregar_venta(self._datos_entradas(sala_id, funcion, asientos, precios[indice]),
+                                ordenes[indice].get("entregas"))
+        return resultados
+
+    @cronometrado("facade.retener_asientos")
+    def retener_asientos(self, asientos: list, sala_id: str | None = None, funcion: str | None = None,
+                         ttl: float | None = None, tipo_venta: str = "regular") -> tuple[bool, str, str, list[int]]:
+        """
+        Retiene temporalmente los asientos mientras el usuario completa el pago.
+        
+        Los asientos se cotizan al retenerlos y la retención conserva esos precios: son los que
+        se muestran al pagar y los que se cobran al confirmarla.
+        
+        Args:
+            asientos: Lista de asientos a retener.
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            ttl: Segundos de validez de la retención.
+            tipo_venta: "regular", "nino" o "adulto_mayor".
+            
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error, el id de la retención y el
+            precio de cada asiento.
+        """
+        if not asientos:
+            return False, "No se seleccionaron asientos", "", []
+        if not self.precios.tipo_venta_valido(tipo_venta):
+            return False, f"Tipo de venta inválido: {tipo_venta}", "", []
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        error = self._validar_funcion(sala_id, funcion)
+        if error:
+            return False, error, "", []
+        numeros, error = self._numeros_asientos(sala_id, asientos)
+        if error:
+            return False, error, "", []
+        precios = self.precios_asientos(sala_id, funcion, numeros, tipo_venta)
+        retencion, conflicto = self.retenciones.retener(sala_id, funcion, numeros, ttl, precios)
+        if retencion is None:
+            return False, f"El asiento {sala_id}-{conflicto} ya no está disponible", "", []
+        return True, "", retencion.id, precios
+
+    @cronometrado("facade.mejores_asientos")
+    def mejores_asientos(self, cantidad: int, sala_id: str | None = None,
+                         funcion: str | None = None) -> tuple[bool, str, list[str]]:
+        """
+        Busca los `cantidad` asientos libres contiguos más cercanos al centro de la sala.
+        
+        Args:
+            cantidad: Número de asientos juntos que se necesitan.
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error y los identificadores de los asientos.
+        """
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        error = self._validar_funcion(sala_id, funcion)
+        if error:
+            return False, error, []
+        numeros = self.inventario.mejores_asientos(sala_id, funcion, cantidad)
+        if numeros is None:
+            return False, f"No hay {cantidad} asientos juntos disponibles", []
+        return True, "", [f"{sala_id}-{numero}" for numero in numeros]
+
+    def retener_mejores_asientos(self, cantidad: int, sala_id: str | None = None, funcion: str | None = None,
+                                 ttl: float | None = None,
+                                 tipo_venta: str = "regular") -> tuple[bool, str, str, list[str], list[int]]:
+        """
+        Busca y retiene los mejores `cantidad` asientos contiguos (ventas en taquilla o kiosco).
+        
+        Si otro comprador toma los asientos entre la búsqueda y la retención, se vuelve a buscar.
+        
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error, el id de la retención, los
+            asientos y sus precios.
+        """
+        for _ in range(INTENTOS_MEJORES_ASIENTOS):
+            ok, error, asientos = self.mejores_asientos(cantidad, sala_id, funcion)
+            if not ok:
+                return False, error, "", [], []
+            ok, error, retencion_id, precios = self.retener_asientos(asientos, sala_id, funcion, ttl, tipo_venta)
+            if ok:
+                return True, "", retencion_id, asientos, precios
+        return False, error, "", [], []
+
+    @cronometrado("facade.extender_retencion")
+    def extender_retencion(self, retencion_id: str, ttl: float | None = None) -> tuple[bool, str]:
+        """
+        Renueva el vencimiento de una retención vigente.
+        
+        Returns:
+            Tupla con un booleano de éxito y un mensaje de error.
+        """
+        if self.retenciones.extender(retencion_id, ttl) is None:
+            return False, "La retención no existe o ya venció"
+        return True, ""
+
+    @cronometrado("facade.liberar_retencion")
+    def liberar_retencion(self, retencion_id: str) -> tuple[bool, str]:
+        """
+        Cancela una retención y deja sus asientos disponibles.
+        
+        Returns:
+            Tupla con un booleano de éxito y un mensaje de error.
+        """
+        if not self.retenciones.liberar(retencion_id):
+            return False, "La retención no existe o ya venció"
+        return True, ""
+
+    @cronometrado("facade.confirmar_retencion")
+    def confirmar_retencion(self, retencion_id: str, payment_data: dict, formato: str = "html",
+                            entregas: dict | None = None) -> tuple[bool, str, list]:
+        """
+        Convierte una retención vigente en venta.
+        
+        Se cobran los precios cotizados al retener. Antes de cobrar, la retención se extiende
+        (si hace falta) para que siga vigente durante todo el tiempo que puede tardar el pago; si
+        aun así no se puede confirmar (p. ej. se canceló mientras tanto), el cobro se anula. Si el
+        pago es inválido la retención se conserva para que el usuario pueda reintentar.
+        
+        Args:
+            retencion_id: Id de la retención obtenida con retener_asientos.
+            payment_data: Información del pago.
+            formato: Formato de los tickets ("html", "lote" o "json").
+            entregas: Canales de entrega en cola y su destino (ver procesar_compra).
+            
+        Returns:
+            Una tupla con éxito, mensaje de error y la lista de tickets en el formato solicitado.
+        """
+        if formato not in FORMATOS:
+            return False, f"Formato de ticket inválido: {formato}", []
+        error = self.validar_entregas(entregas)
+        if error:
+            return False, error, []
+        retencion = self.retenciones.asegurar(retencion_id, self.pagos.duracion_maxima + MARGEN_CONFIRMACION)
+        if retencion is None:
+            return False, "La retención no existe o ya venció", []
+
+        # Las retenciones creadas antes de guardar precios se cotizan al confirmar
+        precios = retencion.precios or self.precios_asientos(retencion.sala_id, retencion.funcion, retencion.numeros)
+        pago_valido, error = self.verificar_pago(payment_data, sum(precios))
         if not pago_valido:
             return False, error, []
 
-        tickets = []
+        retencion = self.retenciones.confirmar(retencion_id)
+        if retencion is None:
+            self.pagos.anular(payment_data, sum(precios))
+            return False, "La retención no existe o ya venció", []
+
         try:
-            for asiento in asientos:
-                ticket = self.comprar_entrada(asiento, "regular")
-                tickets.append(ticket)
-                self.asientos_ocupados.add(asiento)
-                self.estado_asientos[asiento] = "ocupado"  # Marcar asiento como ocupado
-            return True, "", tickets
+            self._registrar_asientos(retencion.sala_id, retencion.funcion, retencion.numeros, OCUPADO, precios)
         except Exception as e:
+            self.inventario.liberar(retencion.sala_id, retencion.funcion, retencion.numeros)
+            self.pagos.anular(payment_data, sum(precios))
+            return False, f"Error registrando la venta: {str(e)}", []
+        asientos = retencion.asientos()
+        try:
+            tickets = renderizador.entradas(asientos, precios, formato, retencion.sala_id, retencion.funcion)
+        except Exception as e:
+            self.inventario.liberar(retencion.sala_id, retencion.funcion, retencion.numeros)
+            self._registrar_asientos(retencion.sala_id, retencion.funcion, retencion.numeros, LIBRE, precios)
+            self.pagos.anular(payment_data, sum(precios))
             return False, f"Error generando tickets: {str(e)}", []
+        self.entregar_venta(self._datos_entradas(retencion.sala_id, retencion.funcion, asientos, precios), entregas)
+        return True, "", tickets
 
     def emitir_ticket(self, datos: dict) -> str:
         """
@@ -168,30 +815,31 @@ class CineFacade:
         Returns:
             Cadena HTML que representa el ticket virtual.
         """
-        return f"""
-        <div class='ticket-web'>
-            <h3>🎟️ Ticket Virtual</h3>
-            <p>Asiento: {datos['asiento']}</p>
-            <p>Precio: ${datos['precio']}</p>
-            <img src='/static/qr.png' width='100'>
-        </div>
-        """
+        return renderizador.entrada(datos)
 
     def comprar_entrada(self, asiento: str, tipo_venta: str) -> str:
         """
-        Genera un ticket individual para un asiento específico.
+        Genera un ticket individual para un asiento de la función por defecto.
         
-        Utiliza un precio base, que se formatea en moneda COP, y llama a emitir_ticket para generar el HTML.
+        El precio lo da el motor de precios (sala, horario, ocupación, fila y tipo de venta), se
+        formatea en moneda COP y se llama a emitir_ticket para generar el HTML.
         
         Args:
             asiento: Identificador del asiento.
-            tipo_venta: Tipo de venta (e.g. "regular"). Actualmente no se usa para lógica adicional.
+            tipo_venta: Tipo de venta ("regular", "nino" o "adulto_mayor").
             
         Returns:
             Cadena HTML representando el ticket de compra.
+            
+        Raises:
+            ValueError: Si el asiento o el tipo de venta no son válidos.
         """
-        precio_base = 15000  # Precio de entrada en COP
-        return self.emitir_ticket({"asiento": asiento, "precio": self._format_price(precio_base)})
+        if not self.precios.tipo_venta_valido(tipo_venta):
+            raise ValueError(f"Tipo de venta inválido: {tipo_venta}")
+        sala_id, funcion = self._resolver_funcion(None, None)
+        numero = self.inventario.numero_asiento(sala_id, asiento)
+        precio = self.precios_asientos(sala_id, funcion, [numero], tipo_venta)[0]
+        return self.emitir_ticket({"asiento": asiento, "precio": self._format_price(precio)})
 
     def _format_price(self, price: float) -> str:
         """
@@ -203,48 +851,141 @@ class CineFacade:
         Returns:
             Cadena con el precio formateado, separando miles con puntos.
         """
-        return "{:,.0f}".format(price).replace(",", ".")
+        return formatear_precio(price)
 
-    def obtener_asientos_ocupados(self) -> dict:
+    def obtener_asientos_ocupados(self, sala_id: str | None = None, funcion: str | None = None) -> bytes:
         """
-        Retorna el estado actual de los asientos.
+        Retorna el estado de ocupación de una función en forma empaquetada.
         
-        Cada asiento tiene un estado asignado (por ejemplo, "ocupado").
+        Args:
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            
+        Returns:
+            Mapa de bits donde el bit i del byte j corresponde al asiento 8*j + i + 1.
+        """
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        return self.inventario.empaquetado(sala_id, funcion)
+
+    def listar_asientos_ocupados(self, sala_id: str | None = None, funcion: str | None = None) -> list[str]:
+        """
+        Retorna los identificadores de los asientos ocupados de una función.
+        
+        Args:
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            
+        Returns:
+            Lista de identificadores con el formato '<sala_id>-<n>'.
+        """
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        return self.inventario.ocupados(sala_id, funcion)
+
+    def listar_asientos_retenidos(self, sala_id: str | None = None, funcion: str | None = None) -> list[str]:
+        """
+        Retorna los identificadores de los asientos retenidos (no vendidos) de una función.
+        
+        Args:
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            
+        Returns:
+            Lista de identificadores con el formato '<sala_id>-<n>'.
+        """
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        self.retenciones.purgar(sala_id, funcion)
+        return self.inventario.retenidos(sala_id, funcion)
+
+    @cronometrado("facade.estado_asientos")
+    def estado_asientos(self, sala_id: str | None = None, funcion: str | None = None,
+                        desde: int | None = None) -> dict:
+        """
+        Retorna el estado versionado de los asientos de una función.
         
+        Args:
+            sala_id: Sala de la función (por defecto la sala de la cartelera).
+            funcion: Horario de la función (por defecto el de la cartelera).
+            desde: Última versión conocida por el cliente; si se indica, se intenta
+                responder solo con los asientos que cambiaron desde entonces.
+            
         Returns:
-            Diccionario mapeando cada asiento a su estado.
+            Diccionario con 'version' y, o bien 'ocupados' y 'retenidos' (estado completo),
+            o bien 'cambios' (asiento -> "ocupado" | "retenido" | "libre").
         """
-        return self.estado_asientos
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        self.retenciones.purgar(sala_id, funcion)
+        return self.inventario.estado(sala_id, funcion, desde)
 
-    def comprar_combo(self, nombre_combo: str, payment_data: dict) -> tuple[bool, str]:
+    def esperar_cambios_asientos(self, sala_id: str | None, funcion: str | None, version: int,
+                                 timeout: float) -> int:
+        """
+        Espera hasta que la función tenga una versión posterior a `version` o venza `timeout`.
+        
+        Returns:
+            La versión actual de la función.
+        """
+        sala_id, funcion = self._resolver_funcion(sala_id, funcion)
+        return self.inventario.esperar_cambios(sala_id, funcion, version, timeout)
+
+    @cronometrado("facade.comprar_combo")
+    def comprar_combo(self, nombre_combo: str, payment_data: dict, entregas: dict | None = None,
+                      sala_id: str | None = None, funcion: str | None = None) -> tuple[bool, str]:
         """
         Procesa la compra de un combo alimenticio.
         
-        Verifica primero la validez del pago, busca el combo en el menú y,
-        utilizando el patrón Bridge, realiza la venta que genera un ticket.
+        Busca el combo en el catálogo, aparta las existencias de todo su árbol, cobra su
+        precio (devolviendo las existencias si el pago falla) y, utilizando el patrón Bridge,
+        realiza la venta que genera un ticket por el canal web y la encola en los
+        canales de entrega indicados.
         
         Args:
-            nombre_combo: Nombre del combo a comprar.
+            nombre_combo: Id o nombre del combo a comprar.
             payment_data: Información del pago.
+            entregas: Canales de entrega en cola y su destino (ver procesar_compra).
+            sala_id: Sala de la función del comprador, si se conoce.
+            funcion: Horario de la función del comprador, si se conoce.
             
         Returns:
             Tupla con un booleano de éxito y el ticket en HTML o un mensaje de error.
         """
-        pago_valido, error = self.verificar_pago(payment_data)
-        if not pago_valido:
+        combo_id = self.concesion.resolver(nombre_combo)
+        if combo_id is None:
+            return False, f"Combo '{nombre_combo}' no disponible."
+        combo = self.concesion.obtener(combo_id)
+        error = self.validar_entregas(entregas)
+        if error:
             return False, error
+        if sala_id or funcion:
+            error = self._validar_funcion(*self._resolver_funcion(sala_id, funcion))
+            if error:
+                return False, error
 
-        combo = next((c for c in self.menu_combos if c.name == nombre_combo), None)
-        if not combo:
-            return False, f"Combo '{nombre_combo}' no disponible."
+        disponible, error = self.concesion.reservar(combo_id)
+        if not disponible:
+            return False, error
+        pago_valido, error = self.verificar_pago(payment_data, combo.get_price())
+        if not pago_valido:
+            self.concesion.devolver(combo_id)
+            return False, error
 
-        canal = WebApp()
-        venta = VentaAbstract(canal)
-        ticket = venta.realizar_venta({
+        datos = {
             "combo": combo.name,
             "descripcion": combo.get_description(),
             "precio": combo.get_price()
-        })
+        }
+        try:
+            ticket = self._venta_web.realizar_venta(datos)
+        except Exception as e:
+            self.concesion.devolver(combo_id)
+            self.pagos.anular(payment_data, combo.get_price())
+            return False, f"Error generando el ticket: {str(e)}"
+        try:
+            self.registrar_venta_combo(combo_id, combo.get_price(), sala_id, funcion)
+        except Exception as e:
+            self.concesion.devolver(combo_id)
+            self.pagos.anular(payment_data, combo.get_price())
+            return False, f"Error registrando la venta: {str(e)}"
+        self.entregar_venta(datos, entregas)
 
         return True, ticket
 
@@ -252,13 +993,64 @@ class CineFacade:
         """
         Retorna una representación completa del menú de combos.
         
-        Cada entrada del menú incluye nombre, descripción y precio del combo.
+        Cada entrada del menú incluye id, nombre, descripción, precio del combo y si está
+        agotado. La lista se cachea hasta que se llame a invalidar_catalogo o un combo se agote
+        o se reponga, y no debe modificarse.
         
         Returns:
             Lista de diccionarios con la información de cada combo.
         """
-        return [{
-            "nombre": combo.name,
-            "descripcion": combo.get_description(),
-            "precio": combo.get_price()
-        } for combo in self.menu_combos]
\ No newline at end of file
+        return self._cache.obtener("menu_completo", (self.version_catalogo, self.concesion.version), lambda: [{
+            "id": combo_id,
+            "nombre": detalle["nombre"],
+            "descripcion": detalle["descripcion"],
+            "precio": detalle["precio"],
+            "agotado": detalle["agotado"]
+        } for combo_id, detalle in self.concesion.menu().items()])
+
+    @cronometrado("facade.reporte_ventas")
+    def reporte_ventas(self, agrupacion: str = "funcion", desde: datetime | None = None,
+                       hasta: datetime | None = None) -> tuple[bool, str, dict]:
+        """
+        Reporte de ocupación e ingresos de las ventas del periodo [desde, hasta).
+
+        Args:
+            agrupacion: "funcion", "sala" o "combo" (ver RegistroVentas.por_funcion, por_sala y
+                por_combo).
+            desde: Solo ventas desde este momento.
+            hasta: Solo ventas anteriores a este momento.
+
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error y el reporte: 'resumen' (totales)
+            y 'filas'.
+        """
+        if agrupacion not in AGRUPACIONES_REPORTE:
+            return False, f"Agrupación inválida: {agrupacion}", {}
+        self._sincronizar_ventas()
+        inicio = desde.timestamp() if desde is not None else None
+        fin = hasta.timestamp() if hasta is not None else None
+        filas = getattr(self.ventas, f"por_{agrupacion}")(inicio, fin)
+        return True, "", {"resumen": self.ventas.resumen(inicio, fin), "filas": filas}
+
+    def exportar_ventas(self, formato: str = "csv", desde: datetime | None = None,
+                        hasta: datetime | None = None) -> tuple[bool, str, object]:
+        """
+        Exportación de las ventas del periodo, fila por fila.
+
+        Returns:
+            Tupla con un booleano de éxito, un mensaje de error y un generador de fragmentos de
+            texto (CSV o NDJSON) para enviar en streaming.
+        """
+        if formato not in FORMATOS_EXPORTACION:
+            return False, f"Formato de exportación inválido: {formato}", None
+        self._sincronizar_ventas()
+        return True, "", self.ventas.exportar(formato, desde.timestamp() if desde is not None else None,
+                                              hasta.timestamp() if hasta is not None else None)
+
+    def invalidar_cartelera(self):
+        """Indica que la cartelera cambió; las respuestas cacheadas que dependen de ella se regeneran."""
+        self.version_cartelera += 1
+
+    def invalidar_catalogo(self):
+        """Indica que el menú de combos cambió; las respuestas cacheadas que dependen de él se regeneran."""
+        self.version_catalogo += 1
\ No newline at end of file
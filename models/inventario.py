@@ -0,0 +1,457 @@
+"""
+Módulo inventario:
+Mantiene el estado de ocupación de los asientos de cada función (sala + horario).
+Cada función se representa con un mapa de bits compacto (un bit por asiento) sobre una
+distribución fija de sala, de modo que las consultas de estado son O(1) y la memoria
+crece solo con el número de funciones que realmente tienen ventas.
+
+Las reservas son atómicas (todo o nada) y se serializan con candados por franjas: cada
+función se asigna a una franja según su hash, así que compras de salas distintas no compiten
+por el mismo candado.
+
+Cada mapa lleva además una versión monótona y un registro acotado de cambios recientes, para
+que los clientes puedan pedir solo lo que cambió desde la última versión que conocen y
+esperar cambios sin sondear.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .distribucion import COLUMNAS, FILAS, DistribucionSala
+from .metricas import espera_candados
+
+ASIENTOS_POR_SALA = FILAS * COLUMNAS  # Distribución fija: 4 filas de 8 asientos (ver models/distribucion.py)
+FRANJAS_CANDADOS = 64
+CAMBIOS_REGISTRADOS = 256  # Cambios por función disponibles para respuestas delta
+
+LIBRE = "libre"
+OCUPADO = "ocupado"
+RETENIDO = "retenido"
+
+
+def _bit_activo(bits: bytearray, numero: int) -> bool:
+    indice = numero - 1
+    return bool(bits[indice >> 3] & (1 << (indice & 7)))
+
+
+def _activar_bit(bits: bytearray, numero: int):
+    indice = numero - 1
+    bits[indice >> 3] |= 1 << (indice & 7)
+
+
+def _apagar_bit(bits: bytearray, numero: int):
+    indice = numero - 1
+    bits[indice >> 3] &= ~(1 << (indice & 7)) & 0xFF
+
+
+def _numeros_activos(bits: bytearray) -> list[int]:
+    numeros = []
+    for posicion, byte in enumerate(bits):
+        while byte:
+            bajo = byte & -byte
+            numeros.append((posicion << 3) + bajo.bit_length())
+            byte ^= bajo
+    return numeros
+
+
+class MapaAsientos:
+    """
+    Mapas de bits con el estado de una función: asientos vendidos y asientos retenidos.
+
+    Un asiento está libre cuando no está ni vendido ni retenido. `version` aumenta con cada
+    lote de cambios registrado con `registrar`.
+
+    Además mantiene, por fila de la distribución de la sala, la máscara de asientos libres y la
+    corrida libre más larga; se actualizan solo para la fila del asiento que cambia y permiten
+    buscar asientos contiguos sin recorrer la sala (ver `mejores_asientos`).
+    """
+
+    __slots__ = ("capacidad", "_bits", "_retenidos", "version", "_cambios", "distribucion", "_libres",
+                 "_corridas")
+
+    def __init__(self, capacidad: int = ASIENTOS_POR_SALA):
+        self.capacidad = capacidad
+        self._bits = bytearray((capacidad + 7) // 8)
+        self._retenidos = bytearray((capacidad + 7) // 8)
+        self.version = 0
+        self._cambios: deque[tuple[int, int, str]] = deque(maxlen=CAMBIOS_REGISTRADOS)
+        self.distribucion = DistribucionSala.para(capacidad)
+        self._libres = [0] * self.distribucion.filas
+        self._corridas = bytearray(self.distribucion.filas)
+        self._indexar()
+
+    def _indexar(self):
+        """Recalcula las máscaras de libres y las corridas de todas las filas."""
+        distribucion = self.distribucion
+        ocupados = int.from_bytes(self._bits, "little") | int.from_bytes(self._retenidos, "little")
+        libres = ~ocupados & ((1 << self.capacidad) - 1)
+        for fila in range(distribucion.filas):
+            mascara = libres >> (fila * distribucion.columnas) & distribucion.mascara_completa
+            self._libres[fila] = mascara
+            self._corridas[fila] = distribucion.corrida_maxima(mascara)
+
+    def _actualizar_fila(self, numero: int):
+        fila, columna = self.distribucion.fila_columna(numero)
+        if self.esta_libre(numero):
+            self._libres[fila] |= 1 << columna
+        else:
+            self._libres[fila] &= ~(1 << columna)
+        self._corridas[fila] = self.distribucion.corrida_maxima(self._libres[fila])
+
+    def esta_ocupado(self, numero: int) -> bool:
+        """Indica si el asiento (1..capacidad) está vendido."""
+        return _bit_activo(self._bits, numero)
+
+    def esta_retenido(self, numero: int) -> bool:
+        """Indica si el asiento (1..capacidad) está retenido temporalmente."""
+        return _bit_activo(self._retenidos, numero)
+
+    def esta_libre(self, numero: int) -> bool:
+        return not (_bit_activo(self._bits, numero) or _bit_activo(self._retenidos, numero))
+
+    def ocupar(self, numero: int):
+        _activar_bit(self._bits, numero)
+        self._actualizar_fila(numero)
+
+    def liberar(self, numero: int):
+        _apagar_bit(self._bits, numero)
+        self._actualizar_fila(numero)
+
+    def retener(self, numero: int):
+        _activar_bit(self._retenidos, numero)
+        self._actualizar_fila(numero)
+
+    def soltar(self, numero: int):
+        _apagar_bit(self._retenidos, numero)
+        self._actualizar_fila(numero)
+
+    def mejores_asientos(self, cantidad: int) -> list[int] | None:
+        """Los `cantidad` asientos libres contiguos más centrados, o None si no hay (O(filas))."""
+        return self.distribucion.mejores(self._libres, self._corridas, cantidad)
+
+    def primer_conflicto(self, numeros: list[int]) -> int | None:
+        """Retorna el primer asiento no libre (o repetido) de la lista, o None si todos están libres."""
+        vistos = set()
+        for numero in numeros:
+            if numero in vistos or not self.esta_libre(numero):
+                return numero
+            vistos.add(numero)
+        return None
+
+    def ocupados(self) -> list[int]:
+        """Retorna los números de asiento vendidos en orden ascendente."""
+        return _numeros_activos(self._bits)
+
+    def retenidos(self) -> list[int]:
+        """Retorna los números de asiento retenidos en orden ascendente."""
+        return _numeros_activos(self._retenidos)
+
+    def empaquetado(self) -> bytes:
+        """Retorna una copia del mapa de vendidos (bit i del byte j = asiento 8*j + i + 1)."""
+        return bytes(self._bits)
+
+    def empaquetado_retenidos(self) -> bytes:
+        """Retorna una copia del mapa de retenidos."""
+        return bytes(self._retenidos)
+
+    def cargar(self, bits: bytes, retenidos: bytes | None = None):
+        """Reemplaza el mapa de vendidos (y opcionalmente el de retenidos) por uno empaquetado."""
+        self._bits[:] = bits
+        if retenidos is not None:
+            self._retenidos[:] = retenidos
+        self._indexar()
+
+    def registrar(self, numeros: list[int], estado: str):
+        """Registra un lote de cambios como una nueva versión del mapa."""
+        self.version += 1
+        self._cambios.extend((self.version, numero, estado) for numero in numeros)
+
+    def cambios_desde(self, version: int) -> dict[int, str] | None:
+        """
+        Retorna el último estado de cada asiento modificado después de `version`.
+
+        Returns:
+            Diccionario número -> estado, o None si el registro ya no cubre esa versión
+            (el cliente debe pedir el estado completo).
+        """
+        if version == self.version:
+            return {}
+        # Versiones desconocidas (p. ej. de otro proceso) o fuera del registro
+        if not 0 <= version < self.version:
+            return None
+        if len(self._cambios) == self._cambios.maxlen and version < self._cambios[0][0]:
+            return None
+        cambios = {}
+        for v, numero, estado in reversed(self._cambios):
+            if v <= version:
+                break
+            cambios.setdefault(numero, estado)
+        return cambios
+
+
+def estado_mapa(sala_id: str, mapa: MapaAsientos, desde: int | None = None,
+                cambios: dict[int, str] | None = None) -> dict:
+    """
+    Construye la respuesta de estado de una función (ver InventarioAsientos.estado).
+
+    Args:
+        cambios: Cambios desde `desde` ya calculados por el llamador; si no se indican se
+            obtienen del registro del mapa.
+    """
+    if desde is not None:
+        if cambios is None:
+            cambios = mapa.cambios_desde(desde)
+        if cambios is not None:
+            return {"version": mapa.version,
+                    "cambios": {f"{sala_id}-{n}": e for n, e in sorted(cambios.items())}}
+    return {"version": mapa.version,
+            "ocupados": [f"{sala_id}-{n}" for n in mapa.ocupados()],
+            "retenidos": [f"{sala_id}-{n}" for n in mapa.retenidos()]}
+
+
+class InventarioAsientos:
+    """
+    Inventario de asientos indexado por (sala, función).
+
+    Los mapas se crean de forma perezosa al reservar o retener: una función sin ventas no ocupa
+    memoria, y las consultas (ver `consultar`) nunca crean mapas.
+    Las modificaciones se hacen bajo el candado de la franja de la función; el candado es una
+    Condition, de modo que quien espera cambios se despierta al registrarse uno.
+    """
+
+    def __init__(self, capacidad: int = ASIENTOS_POR_SALA, franjas: int = FRANJAS_CANDADOS):
+        self.capacidad = capacidad
+        self._mapas: dict[tuple[str, str], MapaAsientos] = {}
+        self._vacio = MapaAsientos(capacidad)  # Estado de las funciones sin mapa; nunca se modifica
+        self._candados = [threading.Condition() for _ in range(franjas)]
+
+    def candado(self, sala_id: str, funcion: str) -> threading.Condition:
+        """Retorna el candado de la franja a la que pertenece la función."""
+        return self._candados[hash((sala_id, funcion)) % len(self._candados)]
+
+    @contextmanager
+    def _bloquear(self, sala_id: str, funcion: str):
+        """Toma el candado de la función registrando el tiempo de espera."""
+        candado = self.candado(sala_id, funcion)
+        inicio = time.perf_counter()
+        with candado:
+            espera_candados.observar(time.perf_counter() - inicio)
+            yield candado
+
+    def _registrar(self, candado: threading.Condition, mapa: MapaAsientos, numeros: list[int], estado: str):
+        # Debe llamarse con el candado tomado
+        if numeros:
+            mapa.registrar(numeros, estado)
+            candado.notify_all()
+
+    def mapa(self, sala_id: str, funcion: str) -> MapaAsientos:
+        """Retorna el mapa de la función, creándolo si aún no existe."""
+        clave = (sala_id, funcion)
+        mapa = self._mapas.get(clave)
+        if mapa is None:
+            mapa = self._mapas.setdefault(clave, MapaAsientos(self.capacidad))
+        return mapa
+
+    def consultar(self, sala_id: str, funcion: str) -> MapaAsientos:
+        """Retorna el mapa de la función para leerlo, sin crearlo: una función sin mapa está toda libre."""
+        mapa = self._mapas.get((sala_id, funcion))
+        return self._vacio if mapa is None else mapa
+
+    def numero_asiento(self, sala_id: str, asiento: str) -> int:
+        """
+        Convierte un identificador de asiento ('<sala_id>-<n>') en su número dentro de la sala.
+
+        Raises:
+            ValueError: Si el identificador no pertenece a la sala o está fuera de la distribución.
+        """
+        prefijo, _, numero = str(asiento).rpartition("-")
+        if prefijo != sala_id or not numero.isdigit():
+            raise ValueError(f"El asiento {asiento} no pertenece a {sala_id}")
+        numero = int(numero)
+        if not 1 <= numero <= self.capacidad:
+            raise ValueError(f"El asiento {asiento} no existe en {sala_id}")
+        return numero
+
+    def esta_ocupado(self, sala_id: str, funcion: str, numero: int) -> bool:
+        mapa = self._mapas.get((sala_id, funcion))
+        return mapa is not None and mapa.esta_ocupado(numero)
+
+    def esta_libre(self, sala_id: str, funcion: str, numero: int) -> bool:
+        mapa = self._mapas.get((sala_id, funcion))
+        return mapa is None or mapa.esta_libre(numero)
+
+    def mejores_asientos(self, sala_id: str, funcion: str, cantidad: int) -> list[int] | None:
+        """Números de los `cantidad` asientos libres contiguos más centrados, o None si no hay."""
+        with self.candado(sala_id, funcion):
+            return self.consultar(sala_id, funcion).mejores_asientos(cantidad)
+
+    def reservar(self, sala_id: str, funcion: str, numeros: list[int]) -> int | None:
+        """
+        Ocupa todos los asientos indicados o ninguno.
+
+        Returns:
+            None si la reserva se realizó, o el número del primer asiento no disponible
+            (ocupado o repetido en la solicitud).
+        """
+        with self._bloquear(sala_id, funcion) as candado:
+            mapa = self.mapa(sala_id, funcion)
+            conflicto = mapa.primer_conflicto(numeros)
+            if conflicto is not None:
+                return conflicto
+            for numero in numeros:
+                mapa.ocupar(numero)
+            self._registrar(candado, mapa, numeros, OCUPADO)
+        return None
+
+    def reservar_lote(self, sala_id: str, funcion: str, pedidos: list[list[int]],
+                      retener: bool = False) -> list[int | None]:
+        """
+        Reserva varios pedidos de la misma función tomando el candado una sola vez.
+
+        Cada pedido es todo o nada por separado: un pedido con conflicto no afecta a los demás.
+        Con `retener=True` los asientos quedan retenidos (pendientes de pago) en vez de vendidos.
+
+        Returns:
+            Por cada pedido, None si se reservó o el número del primer asiento no disponible.
+        """
+        resultados = []
+        reservados = []
+        with self._bloquear(sala_id, funcion) as candado:
+            mapa = self.mapa(sala_id, funcion)
+            for numeros in pedidos:
+                conflicto = mapa.primer_conflicto(numeros)
+                if conflicto is None:
+                    for numero in numeros:
+                        if retener:
+                            mapa.retener(numero)
+                        else:
+                            mapa.ocupar(numero)
+                    reservados.extend(numeros)
+                resultados.append(conflicto)
+            self._registrar(candado, mapa, reservados, RETENIDO if retener else OCUPADO)
+        return resultados
+
+    def retener(self, sala_id: str, funcion: str, numeros: list[int]) -> int | None:
+        """
+        Retiene temporalmente todos los asientos indicados o ninguno.
+
+        Returns:
+            None si la retención se realizó, o el número del primer asiento no disponible.
+        """
+        with self._bloquear(sala_id, funcion) as candado:
+            mapa = self.mapa(sala_id, funcion)
+            conflicto = mapa.primer_conflicto(numeros)
+            if conflicto is not None:
+                return conflicto
+            for numero in numeros:
+                mapa.retener(numero)
+            self._registrar(candado, mapa, numeros, RETENIDO)
+        return None
+
+    def soltar(self, sala_id: str, funcion: str, numeros: list[int]):
+        """Libera asientos retenidos (retención vencida o cancelada)."""
+        with self._bloquear(sala_id, funcion) as candado:
+            mapa = self._mapas.get((sala_id, funcion))
+            if mapa is not None:
+                for numero in numeros:
+                    mapa.soltar(numero)
+                self._registrar(candado, mapa, numeros, LIBRE)
+
+    def confirmar(self, sala_id: str, funcion: str, numeros: list[int]):
+        """Convierte asientos retenidos en vendidos."""
+        with self._bloquear(sala_id, funcion) as candado:
+            mapa = self.mapa(sala_id, funcion)
+            for numero in numeros:
+                mapa.soltar(numero)
+                mapa.ocupar(numero)
+            self._registrar(candado, mapa, numeros, OCUPADO)
+
+    def liberar(self, sala_id: str, funcion: str, numeros: list[int]):
+        """Libera los asientos indicados (por ejemplo, al revertir una compra)."""
+        with self._bloquear(sala_id, funcion) as candado:
+            mapa = self._mapas.get((sala_id, funcion))
+            if mapa is not None:
+                for numero in numeros:
+                    mapa.liberar(numero)
+                self._registrar(candado, mapa, numeros, LIBRE)
+
+    def ocupados(self, sala_id: str, funcion: str) -> list[str]:
+        """Retorna los identificadores de los asientos ocupados de la función."""
+        mapa = self._mapas.get((sala_id, funcion))
+        if mapa is None:
+            return []
+        return [f"{sala_id}-{numero}" for numero in mapa.ocupados()]
+
+    def retenidos(self, sala_id: str, funcion: str) -> list[str]:
+        """Retorna los identificadores de los asientos retenidos de la función."""
+        mapa = self._mapas.get((sala_id, funcion))
+        if mapa is None:
+            return []
+        return [f"{sala_id}-{numero}" for numero in mapa.retenidos()]
+
+    def empaquetado(self, sala_id: str, funcion: str) -> bytes:
+        """Retorna el mapa de bits de la función (todo ceros si no hay ventas)."""
+        mapa = self._mapas.get((sala_id, funcion))
+        if mapa is None:
+            return bytes((self.capacidad + 7) // 8)
+        return mapa.empaquetado()
+
+    def version(self, sala_id: str, funcion: str) -> int:
+        mapa = self._mapas.get((sala_id, funcion))
+        return 0 if mapa is None else mapa.version
+
+    def estado(self, sala_id: str, funcion: str, desde: int | None = None) -> dict:
+        """
+        Retorna el estado de la función de forma consistente con su versión.
+
+        Args:
+            desde: Última versión conocida por el cliente. Si el registro de cambios la cubre,
+                solo se retornan los asientos modificados desde entonces.
+
+        Returns:
+            {"version", "ocupados", "retenidos"} con el estado completo, o
+            {"version", "cambios"} con el estado de cada asiento modificado.
+        """
+        with self.candado(sala_id, funcion):
+            mapa = self._mapas.get((sala_id, funcion))
+            if mapa is None:
+                if desde == 0:
+                    return {"version": 0, "cambios": {}}
+                return {"version": 0, "ocupados": [], "retenidos": []}
+            return estado_mapa(sala_id, mapa, desde)
+
+    def esperar_cambios(self, sala_id: str, funcion: str, version: int, timeout: float) -> int:
+        """
+        Bloquea hasta que la versión de la función supere `version` o venza `timeout`.
+
+        Returns:
+            La versión actual de la función.
+        """
+        with self._bloquear(sala_id, funcion) as candado:
+            candado.wait_for(lambda: self.version(sala_id, funcion) > version, timeout)
+            return self.version(sala_id, funcion)
+
+    def exportar(self) -> list[tuple[str, str, bytes]]:
+        """Retorna (sala, función, mapa de vendidos) de cada función con ventas."""
+        exportado = []
+        for (sala_id, funcion) in list(self._mapas):
+            with self.candado(sala_id, funcion):
+                exportado.append((sala_id, funcion, self._mapas[(sala_id, funcion)].empaquetado()))
+        return exportado
+
+    def restaurar(self, sala_id: str, funcion: str, numeros: list[int], vendido: bool = True):
+        """Marca asientos como vendidos (o libres) sin validar ni versionar; para recuperar estado."""
+        with self.candado(sala_id, funcion):
+            mapa = self.mapa(sala_id, funcion)
+            for numero in numeros:
+                if vendido:
+                    mapa.ocupar(numero)
+                else:
+                    mapa.liberar(numero)
+
+    def restaurar_empaquetado(self, sala_id: str, funcion: str, bits: bytes):
+        """Carga el mapa de vendidos de una función desde su forma empaquetada."""
+        with self.candado(sala_id, funcion):
+            self.mapa(sala_id, funcion).cargar(bits)
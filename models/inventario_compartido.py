@@ -0,0 +1,493 @@
+"""
+Módulo inventario_compartido:
+Inventario de asientos y retenciones compartido entre varios procesos (p. ej. los workers de
+gunicorn) mediante una base SQLite en modo WAL.
+
+Cada función es una fila con sus mapas de bits de vendidos y retenidos y una versión. Toda
+modificación es un read-modify-write dentro de una transacción `BEGIN IMMEDIATE`, que SQLite
+serializa entre procesos: la fila solo cambia si nadie la modificó desde que se leyó, y la
+versión aumenta en uno (compare-and-set). En modo WAL las lecturas no bloquean a las
+escrituras, así que las consultas de estado escalan con el número de workers.
+
+Expone la misma interfaz que InventarioAsientos y GestorRetenciones, de modo que CineFacade
+puede usar cualquiera de los dos. La misma base guarda las ventas (DiarioCompartido) y las
+existencias de la confitería (ExistenciasCompartidas), para que los reportes y el stock cubran
+a todos los workers.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+from .inventario import (ASIENTOS_POR_SALA, CAMBIOS_REGISTRADOS, LIBRE, OCUPADO, RETENIDO,
+                         MapaAsientos, estado_mapa)
+from .metricas import espera_candados
+from .retenciones import TTL_MAXIMO, TTL_RETENCION, Retencion
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mapas (
+    sala TEXT NOT NULL,
+    funcion TEXT NOT NULL,
+    vendidos BLOB NOT NULL,
+    retenidos BLOB NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (sala, funcion)
+);
+CREATE TABLE IF NOT EXISTS cambios (
+    sala TEXT NOT NULL,
+    funcion TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    numero INTEGER NOT NULL,
+    estado TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cambios_funcion ON cambios (sala, funcion, version);
+CREATE TABLE IF NOT EXISTS retenciones (
+    id TEXT PRIMARY KEY,
+    sala TEXT NOT NULL,
+    funcion TEXT NOT NULL,
+    numeros TEXT NOT NULL,
+    vence REAL NOT NULL,
+    precios TEXT
+);
+CREATE INDEX IF NOT EXISTS retenciones_vence ON retenciones (vence);
+CREATE TABLE IF NOT EXISTS ventas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    evento TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS existencias (
+    item TEXT PRIMARY KEY,
+    unidades INTEGER NOT NULL
+);
+"""
+
+INTERVALO_SONDEO = 0.25  # Segundos entre consultas al esperar cambios de otro proceso (por observador)
+
+
+class InventarioCompartido:
+    def __init__(self, ruta: str, capacidad: int = ASIENTOS_POR_SALA):
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self._local = threading.local()
+        # El esquema se crea con una conexión propia que se cierra enseguida: las conexiones de
+        # trabajo se abren recién en cada proceso (después del fork) y en cada hilo
+        conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None)
+        try:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.executescript(ESQUEMA)
+            # Bases creadas antes de que las retenciones guardaran sus precios
+            columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(retenciones)")}
+            if "precios" not in columnas:
+                conexion.execute("ALTER TABLE retenciones ADD COLUMN precios TEXT")
+        finally:
+            conexion.close()
+
+    def _conexion(self) -> sqlite3.Connection:
+        """
+        Una conexión por hilo y por proceso, abierta de forma perezosa. Un hijo creado con fork
+        hereda las variables del hilo que lo creó (p. ej. si el proceso padre calentó la
+        aplicación): la conexión heredada no se usa y el hijo abre la suya.
+        """
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    @contextmanager
+    def _transaccion(self):
+        conexion = self._conexion()
+        inicio = time.perf_counter()
+        conexion.execute("BEGIN IMMEDIATE")  # Espera el candado de escritura de la base
+        espera_candados.observar(time.perf_counter() - inicio)
+        try:
+            yield conexion
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+        conexion.execute("COMMIT")
+
+    def _leer(self, conexion: sqlite3.Connection, sala_id: str, funcion: str) -> MapaAsientos:
+        mapa = MapaAsientos(self.capacidad)
+        fila = conexion.execute(
+            "SELECT vendidos, retenidos, version FROM mapas WHERE sala = ? AND funcion = ?",
+            (sala_id, funcion)).fetchone()
+        if fila is not None:
+            mapa.cargar(fila[0], fila[1])
+            mapa.version = fila[2]
+        return mapa
+
+    def _guardar(self, conexion: sqlite3.Connection, sala_id: str, funcion: str, mapa: MapaAsientos,
+                 numeros: list[int], estado: str):
+        # Debe llamarse dentro de una transacción, después de modificar `mapa`
+        if not numeros:
+            return
+        mapa.version += 1
+        conexion.execute(
+            "INSERT INTO mapas (sala, funcion, vendidos, retenidos, version) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (sala, funcion) DO UPDATE SET vendidos = excluded.vendidos, "
+            "retenidos = excluded.retenidos, version = excluded.version",
+            (sala_id, funcion, mapa.empaquetado(), mapa.empaquetado_retenidos(), mapa.version))
+        conexion.executemany(
+            "INSERT INTO cambios (sala, funcion, version, numero, estado) VALUES (?, ?, ?, ?, ?)",
+            [(sala_id, funcion, mapa.version, numero, estado) for numero in numeros])
+        conexion.execute(
+            "DELETE FROM cambios WHERE sala = ? AND funcion = ? AND version <= ?",
+            (sala_id, funcion, mapa.version - CAMBIOS_REGISTRADOS))
+
+    def _marcar(self, sala_id: str, funcion: str, numeros: list[int], estado: str,
+                validar: bool, retenidos: bool = False) -> int | None:
+        with self._transaccion() as conexion:
+            return self._marcar_en(conexion, sala_id, funcion, numeros, estado, validar, retenidos)
+
+    def _marcar_en(self, conexion: sqlite3.Connection, sala_id: str, funcion: str, numeros: list[int],
+                   estado: str, validar: bool, retenidos: bool = False) -> int | None:
+        """
+        Cambia el estado de los asientos con la misma semántica que InventarioAsientos: OCUPADO
+        confirma (suelta la retención y vende), RETENIDO retiene, y LIBRE quita la venta (liberar)
+        o, con `retenidos=True`, solo la retención (soltar).
+        """
+        mapa = self._leer(conexion, sala_id, funcion)
+        if validar:
+            conflicto = mapa.primer_conflicto(numeros)
+            if conflicto is not None:
+                return conflicto
+        for numero in numeros:
+            if estado == OCUPADO:
+                mapa.soltar(numero)
+                mapa.ocupar(numero)
+            elif estado == RETENIDO:
+                mapa.retener(numero)
+            elif retenidos:
+                mapa.soltar(numero)
+            else:
+                mapa.liberar(numero)
+        self._guardar(conexion, sala_id, funcion, mapa, numeros, estado)
+        return None
+
+    def numero_asiento(self, sala_id: str, asiento: str) -> int:
+        """Ver InventarioAsientos.numero_asiento."""
+        prefijo, _, numero = str(asiento).rpartition("-")
+        if prefijo != sala_id or not numero.isdigit():
+            raise ValueError(f"El asiento {asiento} no pertenece a {sala_id}")
+        numero = int(numero)
+        if not 1 <= numero <= self.capacidad:
+            raise ValueError(f"El asiento {asiento} no existe en {sala_id}")
+        return numero
+
+    def esta_ocupado(self, sala_id: str, funcion: str, numero: int) -> bool:
+        return self._leer(self._conexion(), sala_id, funcion).esta_ocupado(numero)
+
+    def esta_libre(self, sala_id: str, funcion: str, numero: int) -> bool:
+        return self._leer(self._conexion(), sala_id, funcion).esta_libre(numero)
+
+    def mejores_asientos(self, sala_id: str, funcion: str, cantidad: int) -> list[int] | None:
+        return self._leer(self._conexion(), sala_id, funcion).mejores_asientos(cantidad)
+
+    def reservar(self, sala_id: str, funcion: str, numeros: list[int]) -> int | None:
+        return self._marcar(sala_id, funcion, numeros, OCUPADO, validar=True)
+
+    def reservar_lote(self, sala_id: str, funcion: str, pedidos: list[list[int]],
+                      retener: bool = False) -> list[int | None]:
+        """Ver InventarioAsientos.reservar_lote: una sola transacción para todos los pedidos."""
+        estado = RETENIDO if retener else OCUPADO
+        resultados = []
+        reservados = []
+        with self._transaccion() as conexion:
+            mapa = self._leer(conexion, sala_id, funcion)
+            for numeros in pedidos:
+                conflicto = mapa.primer_conflicto(numeros)
+                if conflicto is None:
+                    for numero in numeros:
+                        if retener:
+                            mapa.retener(numero)
+                        else:
+                            mapa.ocupar(numero)
+                    reservados.extend(numeros)
+                resultados.append(conflicto)
+            self._guardar(conexion, sala_id, funcion, mapa, reservados, estado)
+        return resultados
+
+    def retener(self, sala_id: str, funcion: str, numeros: list[int]) -> int | None:
+        return self._marcar(sala_id, funcion, numeros, RETENIDO, validar=True)
+
+    def soltar(self, sala_id: str, funcion: str, numeros: list[int]):
+        self._marcar(sala_id, funcion, numeros, LIBRE, validar=False, retenidos=True)
+
+    def confirmar(self, sala_id: str, funcion: str, numeros: list[int]):
+        self._marcar(sala_id, funcion, numeros, OCUPADO, validar=False)
+
+    def liberar(self, sala_id: str, funcion: str, numeros: list[int]):
+        self._marcar(sala_id, funcion, numeros, LIBRE, validar=False)
+
+    def ocupados(self, sala_id: str, funcion: str) -> list[str]:
+        return [f"{sala_id}-{n}" for n in self._leer(self._conexion(), sala_id, funcion).ocupados()]
+
+    def retenidos(self, sala_id: str, funcion: str) -> list[str]:
+        return [f"{sala_id}-{n}" for n in self._leer(self._conexion(), sala_id, funcion).retenidos()]
+
+    def empaquetado(self, sala_id: str, funcion: str) -> bytes:
+        return self._leer(self._conexion(), sala_id, funcion).empaquetado()
+
+    def version(self, sala_id: str, funcion: str) -> int:
+        fila = self._conexion().execute(
+            "SELECT version FROM mapas WHERE sala = ? AND funcion = ?", (sala_id, funcion)).fetchone()
+        return 0 if fila is None else fila[0]
+
+    def estado(self, sala_id: str, funcion: str, desde: int | None = None) -> dict:
+        """Ver InventarioAsientos.estado; los cambios se leen de la tabla `cambios`."""
+        conexion = self._conexion()
+        conexion.execute("BEGIN")  # Lectura consistente del mapa y sus cambios
+        try:
+            mapa = self._leer(conexion, sala_id, funcion)
+            cambios = None
+            if desde is not None and 0 <= desde <= mapa.version:
+                filas = conexion.execute(
+                    "SELECT version, numero, estado FROM cambios WHERE sala = ? AND funcion = ? "
+                    "AND version > ? ORDER BY version", (sala_id, funcion, desde)).fetchall()
+                # El registro cubre `desde` solo si conserva todas las versiones posteriores
+                if desde == mapa.version or (filas and filas[0][0] == desde + 1):
+                    cambios = {numero: estado for _, numero, estado in filas}
+            if cambios is None:
+                return estado_mapa(sala_id, mapa)
+            return estado_mapa(sala_id, mapa, desde, cambios)
+        finally:
+            conexion.execute("COMMIT")
+
+    def esperar_cambios(self, sala_id: str, funcion: str, version: int, timeout: float) -> int:
+        """Sondea la versión hasta que supere `version` o venza `timeout` (otros procesos no notifican)."""
+        limite = time.monotonic() + timeout
+        actual = self.version(sala_id, funcion)
+        while actual <= version and time.monotonic() < limite:
+            time.sleep(INTERVALO_SONDEO)
+            actual = self.version(sala_id, funcion)
+        return actual
+
+    def exportar(self) -> list[tuple[str, str, bytes]]:
+        return [tuple(fila) for fila in self._conexion().execute("SELECT sala, funcion, vendidos FROM mapas")]
+
+    def restaurar(self, sala_id: str, funcion: str, numeros: list[int], vendido: bool = True):
+        self._marcar(sala_id, funcion, numeros, OCUPADO if vendido else LIBRE, validar=False)
+
+    def restaurar_empaquetado(self, sala_id: str, funcion: str, bits: bytes):
+        with self._transaccion() as conexion:
+            mapa = self._leer(conexion, sala_id, funcion)
+            mapa.cargar(bits)
+            self._guardar(conexion, sala_id, funcion, mapa, mapa.ocupados(), OCUPADO)
+
+
+class GestorRetencionesCompartido:
+    """
+    Retenciones guardadas en la misma base que el inventario, para que una retención creada
+    en un worker pueda confirmarse en otro. Los vencimientos usan un índice por fecha, así que
+    purgar cuesta O(vencidas) igual que la rueda temporal de GestorRetenciones.
+    """
+
+    def __init__(self, inventario: InventarioCompartido, reloj=time.time):
+        self.inventario = inventario
+        self._reloj = reloj
+
+    def _ttl(self, ttl: float | None) -> float:
+        return min(max(float(ttl or TTL_RETENCION), 1.0), TTL_MAXIMO)
+
+    def _purgar(self, conexion: sqlite3.Connection, ahora: float):
+        vencidas = conexion.execute(
+            "SELECT id, sala, funcion, numeros FROM retenciones WHERE vence <= ?", (ahora,)).fetchall()
+        for retencion_id, sala_id, funcion, numeros in vencidas:
+            conexion.execute("DELETE FROM retenciones WHERE id = ?", (retencion_id,))
+            self.inventario._marcar_en(conexion, sala_id, funcion, json.loads(numeros), LIBRE, validar=False,
+                                       retenidos=True)
+
+    def _fila(self, conexion: sqlite3.Connection, retencion_id: str) -> Retencion | None:
+        fila = conexion.execute(
+            "SELECT sala, funcion, numeros, vence, precios FROM retenciones WHERE id = ?",
+            (retencion_id,)).fetchone()
+        if fila is None:
+            return None
+        retencion = Retencion(fila[0], fila[1], json.loads(fila[2]), fila[3],
+                              None if fila[4] is None else json.loads(fila[4]))
+        retencion.id = retencion_id
+        return retencion
+
+    def purgar(self, sala_id: str | None = None, funcion: str | None = None):
+        """Libera las retenciones vencidas de todas las funciones (el índice por fecha las ubica)."""
+        ahora = self._reloj()
+        # Consulta previa sin transacción de escritura: el caso común es que no haya vencidas
+        if self.inventario._conexion().execute(
+                "SELECT 1 FROM retenciones WHERE vence <= ? LIMIT 1", (ahora,)).fetchone() is None:
+            return
+        with self.inventario._transaccion() as conexion:
+            self._purgar(conexion, ahora)
+
+    def retener(self, sala_id: str, funcion: str, numeros: list[int], ttl: float | None = None,
+                precios: list[int] | None = None) -> tuple[Retencion | None, int | None]:
+        with self.inventario._transaccion() as conexion:
+            ahora = self._reloj()
+            self._purgar(conexion, ahora)
+            conflicto = self.inventario._marcar_en(conexion, sala_id, funcion, numeros, RETENIDO, validar=True)
+            if conflicto is not None:
+                return None, conflicto
+            retencion = Retencion(sala_id, funcion, list(numeros), ahora + self._ttl(ttl), precios)
+            conexion.execute(
+                "INSERT INTO retenciones (id, sala, funcion, numeros, vence, precios) VALUES (?, ?, ?, ?, ?, ?)",
+                (retencion.id, sala_id, funcion, json.dumps(retencion.numeros), retencion.vence,
+                 None if precios is None else json.dumps(precios)))
+            return retencion, None
+
+    def obtener(self, retencion_id: str) -> Retencion | None:
+        retencion = self._fila(self.inventario._conexion(), retencion_id)
+        if retencion is None or retencion.vence <= self._reloj():
+            return None
+        return retencion
+
+    def extender(self, retencion_id: str, ttl: float | None = None) -> Retencion | None:
+        with self.inventario._transaccion() as conexion:
+            ahora = self._reloj()
+            self._purgar(conexion, ahora)
+            retencion = self._fila(conexion, retencion_id)
+            if retencion is None:
+                return None
+            retencion.vence = ahora + self._ttl(ttl)
+            conexion.execute("UPDATE retenciones SET vence = ? WHERE id = ?", (retencion.vence, retencion_id))
+            return retencion
+
+    def asegurar(self, retencion_id: str, segundos: float) -> Retencion | None:
+        """Ver GestorRetenciones.asegurar."""
+        with self.inventario._transaccion() as conexion:
+            ahora = self._reloj()
+            self._purgar(conexion, ahora)
+            retencion = self._fila(conexion, retencion_id)
+            if retencion is None:
+                return None
+            if retencion.vence < ahora + segundos:
+                retencion.vence = ahora + segundos
+                conexion.execute("UPDATE retenciones SET vence = ? WHERE id = ?", (retencion.vence, retencion_id))
+            return retencion
+
+    def liberar(self, retencion_id: str) -> bool:
+        with self.inventario._transaccion() as conexion:
+            retencion = self._fila(conexion, retencion_id)
+            if retencion is None:
+                return False
+            conexion.execute("DELETE FROM retenciones WHERE id = ?", (retencion_id,))
+            self.inventario._marcar_en(conexion, retencion.sala_id, retencion.funcion, retencion.numeros,
+                                       LIBRE, validar=False, retenidos=True)
+            return True
+
+    def confirmar(self, retencion_id: str) -> Retencion | None:
+        with self.inventario._transaccion() as conexion:
+            self._purgar(conexion, self._reloj())
+            retencion = self._fila(conexion, retencion_id)
+            if retencion is None:
+                return None
+            conexion.execute("DELETE FROM retenciones WHERE id = ?", (retencion_id,))
+            self.inventario._marcar_en(conexion, retencion.sala_id, retencion.funcion, retencion.numeros,
+                                       OCUPADO, validar=False)
+            return retencion
+
+
+class DiarioCompartido:
+    """
+    Ventas guardadas en la misma base que el inventario, en el orden en que se escribieron.
+
+    Cumple el papel de DiarioVentas cuando hay varios workers: cada uno registra sus ventas en
+    la tabla `ventas` y aplica, antes de cada reporte, las que escribieron los demás
+    (sincronizar), así su registro de ventas cubre a todos los workers. Al adjuntarlo se
+    aplican todas, de modo que las ventas sobreviven a los reinicios. No hay fotografías: la
+    tabla crece con las ventas del día.
+    """
+
+    def __init__(self, inventario: InventarioCompartido):
+        self.inventario = inventario
+        # Cambio del estado por cada venta de otro proceso (lo asigna CineFacade.adjuntar_diario)
+        self.reproducir: Callable[[dict], None] | None = None
+        self._ultimo = 0  # Id de la última venta aplicada en este proceso
+        self._propios: dict[int, Callable[[], None] | None] = {}  # Ventas propias aún sin aplicar
+        self._candado = threading.Lock()
+
+    def registrar(self, evento: dict, aplicar: Callable[[], None] | None = None):
+        """
+        Guarda un evento en la base y aplica, en orden, las ventas pendientes (esta incluida).
+
+        Args:
+            aplicar: Cambio del estado de este proceso; se ejecuta solo si el evento quedó escrito.
+
+        Raises:
+            El error de la base si el evento no se pudo escribir: no quedó registrado ni se aplicó.
+        """
+        linea = json.dumps(evento, separators=(",", ":"), ensure_ascii=False)
+        with self._candado:
+            with self.inventario._transaccion() as conexion:
+                venta_id = conexion.execute("INSERT INTO ventas (evento) VALUES (?)", (linea,)).lastrowid
+            self._propios[venta_id] = aplicar
+            self._aplicar_pendientes()
+
+    def sincronizar(self):
+        """Aplica las ventas que otros procesos escribieron desde la última sincronización."""
+        with self._candado:
+            self._aplicar_pendientes()
+
+    def _aplicar_pendientes(self):
+        # Debe llamarse con el candado tomado
+        filas = self.inventario._conexion().execute(
+            "SELECT id, evento FROM ventas WHERE id > ? ORDER BY id", (self._ultimo,)).fetchall()
+        for venta_id, linea in filas:
+            self._ultimo = venta_id
+            if venta_id in self._propios:
+                aplicar = self._propios.pop(venta_id)
+                if aplicar is not None:
+                    aplicar()
+            elif self.reproducir is not None:
+                self.reproducir(json.loads(linea))
+
+
+class ExistenciasCompartidas:
+    """
+    Existencias de la confitería guardadas en la misma base que el inventario. Cada cambio es
+    una transacción que descuenta todas sus unidades o ninguna, así dos workers no pueden
+    vender la misma última unidad.
+    """
+
+    def __init__(self, inventario: InventarioCompartido):
+        self.inventario = inventario
+
+    def _unidades(self, conexion: sqlite3.Connection, items: list[str]) -> dict[str, int]:
+        marcas = ", ".join("?" * len(items))
+        return dict(conexion.execute(
+            f"SELECT item, unidades FROM existencias WHERE item IN ({marcas})", items).fetchall())
+
+    def sembrar(self, existencias: dict[str, int]) -> dict[str, int]:
+        """
+        Agrega los ítems que aún no están en la base (el primer proceso fija el conteo del día)
+        y retorna las unidades guardadas de todos ellos.
+        """
+        with self.inventario._transaccion() as conexion:
+            conexion.executemany("INSERT OR IGNORE INTO existencias (item, unidades) VALUES (?, ?)",
+                                 list(existencias.items()))
+            return self._unidades(conexion, list(existencias))
+
+    def leer(self) -> dict[str, int]:
+        return dict(self.inventario._conexion().execute("SELECT item, unidades FROM existencias").fetchall())
+
+    def mover(self, cambios: dict[str, int]) -> tuple[str | None, dict[str, int]]:
+        """
+        Suma `cambios` (ítem -> unidades, negativas para descontar) si ningún ítem queda en negativo.
+
+        Returns:
+            Tupla con el ítem que no alcanza (None si se aplicaron los cambios) y las unidades
+            actuales de los ítems con conteo.
+        """
+        with self.inventario._transaccion() as conexion:
+            actuales = self._unidades(conexion, list(cambios))
+            for item, unidades in actuales.items():
+                if unidades + cambios[item] < 0:
+                    return item, actuales
+            conexion.executemany("UPDATE existencias SET unidades = unidades + ? WHERE item = ?",
+                                 [(cambios[item], item) for item in actuales])
+            return None, {item: unidades + cambios[item] for item, unidades in actuales.items()}
@@ -0,0 +1,240 @@
+"""
+Módulo metricas:
+Contadores e histogramas de bajo costo para las rutas calientes, expuestos en formato de texto
+de Prometheus (ver la ruta /metrics de app.py).
+
+Cada hilo suma en su propio fragmento de la métrica, así que registrar una observación no toma
+ningún candado compartido; los fragmentos se suman solo cuando alguien consulta /metrics, y el
+de un hilo que termina se pliega en una base común. Las etiquetas tienen cardinalidad acotada
+(operaciones, combos, canales), nunca funciones o asientos. Los
+valores son por proceso: con varios workers, Prometheus debe consultar cada uno.
+"""
+
+import bisect
+import itertools
+import threading
+import time
+import weakref
+from functools import wraps
+
+# Límites de los histogramas de latencia, en segundos
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _etiquetas(nombres: tuple[str, ...], valores: tuple, extra: str = "") -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Centinela:
+    """Objeto por hilo cuya recolección (al terminar el hilo) pliega su fragmento en la base."""
+
+    __slots__ = ("__weakref__",)
+
+
+class _Fragmentada:
+    """
+    Base de las métricas: un diccionario de series por hilo vivo.
+
+    Los fragmentos de los hilos que terminan se suman a un diccionario base, así que la memoria
+    y el costo de consultar /metrics dependen de los hilos vivos y no de todos los que han existido
+    (el servidor de desarrollo crea un hilo por solicitud).
+    """
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._local = threading.local()
+        self._base: dict = {}
+        self._fragmentos: dict[int, dict] = {}
+        self._claves = itertools.count()
+        # Para registrar y plegar fragmentos; reentrante porque un plegado puede ocurrir durante
+        # una recolección en un hilo que ya lo tiene tomado
+        self._candado = threading.RLock()
+
+    def _fragmento(self) -> dict:
+        fragmento = getattr(self._local, "series", None)
+        if fragmento is None:
+            fragmento = {}
+            clave = next(self._claves)
+            with self._candado:
+                self._fragmentos[clave] = fragmento
+            centinela = self._local.centinela = _Centinela()
+            weakref.finalize(centinela, self._plegar, clave)
+            self._local.series = fragmento
+        return fragmento
+
+    def _plegar(self, clave: int):
+        with self._candado:
+            fragmento = self._fragmentos.pop(clave, None)
+            if fragmento:
+                self._sumar(self._base, fragmento)
+
+    def _sumar(self, destino: dict, fragmento: dict):
+        raise NotImplementedError
+
+    def _total(self) -> dict:
+        """Suma de la base y los fragmentos de los hilos vivos."""
+        with self._candado:
+            totales = {}
+            self._sumar(totales, self._base)
+            fragmentos = [dict(fragmento) for fragmento in self._fragmentos.values()]
+        for fragmento in fragmentos:
+            self._sumar(totales, fragmento)
+        return totales
+
+
+class Contador(_Fragmentada):
+    """Contador monótono, opcionalmente con etiquetas."""
+
+    tipo = "counter"
+
+    def incrementar(self, *valores, cantidad: float = 1):
+        fragmento = self._fragmento()
+        fragmento[valores] = fragmento.get(valores, 0) + cantidad
+
+    def _sumar(self, destino: dict, fragmento: dict):
+        for clave, valor in fragmento.items():
+            destino[clave] = destino.get(clave, 0) + valor
+
+    def valores(self) -> dict[tuple, float]:
+        """Suma de todos los hilos por combinación de etiquetas."""
+        return self._total()
+
+    def valor(self, *valores) -> float:
+        return self.valores().get(valores, 0)
+
+    def lineas(self) -> list[str]:
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {valor:g}"
+                for clave, valor in self.valores().items()]
+
+
+class Histograma(_Fragmentada):
+    """Histograma acumulativo con límites fijos, opcionalmente con etiquetas."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = (),
+                 limites: tuple[float, ...] = LIMITES_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = limites
+
+    def observar(self, valor: float, *valores):
+        # Serie por combinación de etiquetas: conteos por cubeta (+Inf al final) y la suma al final
+        fragmento = self._fragmento()
+        serie = fragmento.get(valores)
+        if serie is None:
+            serie = fragmento[valores] = [0] * (len(self.limites) + 1) + [0.0]
+        serie[bisect.bisect_left(self.limites, valor)] += 1
+        serie[-1] += valor
+
+    def medir(self, *valores) -> "_Cronometro":
+        """Context manager que observa la duración del bloque."""
+        return _Cronometro(self, valores)
+
+    def _sumar(self, destino: dict, fragmento: dict):
+        for clave, serie in fragmento.items():
+            total = destino.setdefault(clave, [0] * len(serie))
+            for indice, valor in enumerate(serie):
+                total[indice] += valor
+
+    def lineas(self) -> list[str]:
+        lineas = []
+        for clave, serie in self._total().items():
+            acumulado = 0
+            suma = serie[-1]
+            for limite, conteo in zip(self.limites + (float("inf"),), serie):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                etiquetas = _etiquetas(self.etiquetas, clave, f'le="{le}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {suma:g}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}")
+        return lineas
+
+
+class _Cronometro:
+    __slots__ = ("histograma", "valores", "inicio")
+
+    def __init__(self, histograma: Histograma, valores: tuple):
+        self.histograma = histograma
+        self.valores = valores
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.histograma.observar(time.perf_counter() - self.inicio, *self.valores)
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: dict[str, Contador | Histograma] = {}
+        self._candado = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._candado:
+            return self._metricas.setdefault(metrica.nombre, metrica)
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()) -> Contador:
+        """Retorna el contador `nombre`, creándolo si no existe."""
+        return self._metricas.get(nombre) or self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = (),
+                   limites: tuple[float, ...] = LIMITES_LATENCIA) -> Histograma:
+        """Retorna el histograma `nombre`, creándolo si no existe."""
+        return self._metricas.get(nombre) or self._registrar(Histograma(nombre, ayuda, etiquetas, limites))
+
+    def exponer(self) -> str:
+        """Texto de exposición de Prometheus (versión 0.0.4) con todas las métricas."""
+        with self._candado:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in metricas:
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            lineas.extend(metrica.lineas())
+        return "\n".join(lineas) + "\n"
+
+
+# Registro compartido por toda la aplicación
+metricas = RegistroMetricas()
+
+duracion_operaciones = metricas.histograma(
+    "cine_operacion_duracion_segundos", "Duración de las operaciones del facade y el controlador.",
+    ("operacion",))
+espera_candados = metricas.histograma(
+    "cine_candado_asientos_espera_segundos", "Tiempo de espera para tomar el candado de una función.",
+    limites=(0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+asientos_vendidos = metricas.contador(
+    "cine_asientos_vendidos_total", "Asientos vendidos.")
+combos_vendidos = metricas.contador(
+    "cine_combos_vendidos_total", "Combos vendidos por combo.", ("combo",))
+pagos_anulados = metricas.contador(
+    "cine_pagos_anulados_total", "Cobros aprobados anulados por motivo y resultado.", ("motivo", "resultado"))
+tickets_entregados = metricas.contador(
+    "cine_tickets_entregados_total", "Tickets de los canales en cola por canal y resultado.", ("canal", "resultado"))
+consultas_cache = metricas.contador(
+    "cine_cache_consultas_total", "Consultas a las caches de respuestas por resultado.", ("cache", "resultado"))
+
+
+def cronometrado(operacion: str):
+    """Decorador que registra la duración de cada llamada en cine_operacion_duracion_segundos."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                duracion_operaciones.observar(time.perf_counter() - inicio, operacion)
+        return envoltura
+    return decorador
@@ -0,0 +1,176 @@
+"""
+Módulo pagos:
+Etapa de pago desacoplada del flujo de compra.
+
+Una PasarelaPago realiza el cobro (en producción, una llamada de red a un procesador de
+pagos). El ProcesadorPagos la ejecuta en un pool de hilos con un límite de cobros
+concurrentes y un tiempo máximo por cobro, de modo que un procesador lento no deja sin
+trabajadores a la aplicación. Las compras siguen el flujo reservar -> pagar -> confirmar o
+revertir, sin mantener ningún candado de asientos mientras el pago está en curso.
+
+Un cobro aprobado cuya venta no llega a confirmarse (la retención se perdió, o el cobro
+respondió después de vencer su tiempo de espera) se anula con PasarelaPago.anular, para que
+nunca quede un cargo sin asientos.
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from .metricas import pagos_anulados
+
+TARJETA_PRUEBA = {"cardNumber": "4242424242424242", "cardExpiry": "12/25", "cardCvv": "123"}
+ANULACIONES_CONCURRENTES = 4  # Hilos propios de las anulaciones, separados de los cobros
+
+logger = logging.getLogger(__name__)
+
+
+class PasarelaPago(ABC):
+    @abstractmethod
+    def cobrar(self, payment_data: dict, monto: float) -> tuple[bool, str]:
+        """
+        Cobra `monto` con los datos de pago indicados.
+
+        Returns:
+            Tupla con un booleano de éxito y un mensaje de error.
+        """
+        pass
+
+    @abstractmethod
+    def anular(self, payment_data: dict, monto: float) -> tuple[bool, str]:
+        """
+        Anula (o reembolsa) un cobro aprobado de `monto` con esos datos de pago.
+
+        Returns:
+            Tupla con un booleano de éxito y un mensaje de error.
+        """
+        pass
+
+
+class PasarelaSimulada(PasarelaPago):
+    """Pasarela local que acepta solo la tarjeta de prueba y simula la latencia de red."""
+
+    def __init__(self, latencia: float = 0.0):
+        self.latencia = latencia
+
+    def cobrar(self, payment_data: dict, monto: float) -> tuple[bool, str]:
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        if not payment_data:
+            return False, "Datos de pago faltantes"
+
+        # Validación de tarjeta de prueba
+        if str(payment_data.get('cardNumber', '')).strip() != TARJETA_PRUEBA['cardNumber']:
+            return False, "Número de tarjeta inválido"
+
+        if str(payment_data.get('cardExpiry', '')).strip() != TARJETA_PRUEBA['cardExpiry']:
+            return False, "Fecha de expiración inválida"
+
+        if str(payment_data.get('cardCvv', '')).strip() != TARJETA_PRUEBA['cardCvv']:
+            return False, "CVV inválido"
+
+        return True, ""
+
+    def anular(self, payment_data: dict, monto: float) -> tuple[bool, str]:
+        if self.latencia:
+            time.sleep(self.latencia)
+        return True, ""
+
+
+class ProcesadorPagos:
+    """
+    Ejecuta los cobros de una pasarela en segundo plano.
+
+    Args:
+        pasarela: Implementación de PasarelaPago.
+        max_concurrentes: Cobros simultáneos permitidos (tamaño del pool).
+        timeout: Segundos máximos de espera por cobro.
+        anulaciones: Hilos del pool de anulaciones.
+    """
+
+    def __init__(self, pasarela: PasarelaPago, max_concurrentes: int = 16, timeout: float = 10.0,
+                 anulaciones: int = ANULACIONES_CONCURRENTES):
+        self.pasarela = pasarela
+        self.timeout = timeout
+        self._cupos = threading.BoundedSemaphore(max_concurrentes)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrentes, thread_name_prefix="pagos")
+        self._anulaciones = ThreadPoolExecutor(max_workers=anulaciones, thread_name_prefix="anulaciones")
+
+    @property
+    def duracion_maxima(self) -> float:
+        """Segundos que puede tardar cobrar(): la espera de un cupo más la espera del resultado."""
+        return 2 * self.timeout
+
+    def iniciar_cobro(self, payment_data: dict, monto: float) -> Future | None:
+        """
+        Envía un cobro al pool sin esperar su resultado.
+
+        Returns:
+            Un Future con el resultado (ok, error), o None si no hubo cupo dentro del timeout.
+        """
+        if not self._cupos.acquire(timeout=self.timeout):
+            return None
+        try:
+            futuro = self._executor.submit(self.pasarela.cobrar, payment_data, monto)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        futuro.cobro = (payment_data, monto)
+        return futuro
+
+    def esperar(self, futuro: Future | None, timeout: float | None = None) -> tuple[bool, str]:
+        """
+        Espera el resultado de un cobro iniciado con iniciar_cobro.
+
+        Un cobro que excede el tiempo se reporta como fallido: si aún no empezó se cancela, y si
+        la pasarela lo aprueba después, se anula en cuanto responde.
+        """
+        if futuro is None:
+            return False, "El sistema de pagos está saturado, intente de nuevo"
+        try:
+            return futuro.result(timeout=self.timeout if timeout is None else timeout)
+        except FuturesTimeoutError:
+            if not futuro.cancel():
+                futuro.add_done_callback(self._anular_tardio)
+            return False, "El pago excedió el tiempo de espera"
+        except Exception as e:
+            return False, f"Error procesando el pago: {str(e)}"
+
+    def _anular_tardio(self, futuro: Future):
+        if futuro.exception() is None and futuro.result()[0]:
+            self.anular(*futuro.cobro, motivo="tiempo_agotado")
+
+    def anular(self, payment_data: dict, monto: float, motivo: str = "venta_no_confirmada"):
+        """
+        Anula en segundo plano un cobro aprobado cuya venta no se confirmó.
+
+        Se ejecuta en un pool propio, sin los cupos de los cobros: una anulación nunca espera
+        detrás de los cobros en curso.
+        """
+        def anular():
+            try:
+                ok, error = self.pasarela.anular(payment_data, monto)
+            except Exception as e:
+                ok, error = False, str(e)
+            pagos_anulados.incrementar(motivo, "ok" if ok else "error")
+            if not ok:
+                logger.error("No se pudo anular un cobro de %s (%s): %s", monto, motivo, error)
+
+        self._anulaciones.submit(anular)
+
+    def cobrar(self, payment_data: dict, monto: float) -> tuple[bool, str]:
+        """Cobra y espera el resultado (con límite de concurrencia y timeout)."""
+        return self.esperar(self.iniciar_cobro(payment_data, monto))
+
+    def cobrar_varios(self, cobros: list[tuple[dict, float]]) -> list[tuple[bool, str]]:
+        """Lanza varios cobros en paralelo y retorna sus resultados en el mismo orden."""
+        futuros = [self.iniciar_cobro(payment_data, monto) for payment_data, monto in cobros]
+        return [self.esperar(futuro) for futuro in futuros]
+
+
+# Procesador compartido por toda la aplicación
+procesador_pagos = ProcesadorPagos(PasarelaSimulada())
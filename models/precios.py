@@ -0,0 +1,168 @@
+"""
+Módulo precios:
+Motor de precios de las entradas basado en reglas.
+
+El precio de una entrada depende del tipo de sala, el día de la semana, la hora de inicio de
+la función, la ocupación de la función (en tramos de 10 %), la fila del asiento y el tipo de
+venta (regular, niño, adulto mayor). Las reglas (p. ej. "IMAX x1.6", "martes x0.7", "fila
+preferida +2000") no se evalúan en cada compra: al crear el motor, o al cambiar sus reglas, se
+compilan en una tabla de NumPy con el precio final de cada combinación de esas dimensiones
+(unas 100 mil celdas). Cotizar es indexar la tabla, y cotizar una selección de asientos o la
+cuadrícula de muchas funciones es una sola indexación vectorizada.
+
+Las reglas se aplican en orden sobre el precio base: cada una multiplica por su `factor` y
+suma su `suma` en las celdas que cumplen todas sus condiciones. El resultado se redondea a
+REDONDEO pesos.
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from .catalogo import TIPOS_SALA
+from .distribucion import DistribucionSala
+
+PRECIO_BASE = 15000  # Entrada regular en sala 2D, en COP
+REDONDEO = 100
+TRAMOS_OCUPACION = 10  # Tramo = porcentaje de asientos vendidos // 10 (el último incluye 90-100 %)
+TIPOS = TIPOS_SALA + ("2D",)
+TIPOS_VENTA = ("regular", "nino", "adulto_mayor")
+DIMENSIONES = ("tipo", "dia", "hora", "ocupacion", "fila", "tipo_venta")
+
+
+class ReglaPrecio:
+    """
+    Ajuste de precio para las combinaciones que cumplen todas sus condiciones.
+
+    Args:
+        nombre: Descripción de la regla.
+        factor: Multiplicador del precio.
+        suma: Pesos que se suman después de multiplicar.
+        condiciones: Valores admitidos por dimensión; una dimensión sin condición admite todos.
+            tipo: tipos de sala (TIPOS); dia: 0 (lunes) a 6; hora: 0 a 23; ocupacion: tramos
+            0 a TRAMOS_OCUPACION - 1; fila: filas desde 0; tipo_venta: TIPOS_VENTA.
+    """
+
+    __slots__ = ("nombre", "factor", "suma", "condiciones")
+
+    def __init__(self, nombre: str, factor: float = 1.0, suma: int = 0, **condiciones):
+        desconocidas = set(condiciones) - set(DIMENSIONES)
+        if desconocidas:
+            raise ValueError(f"Dimensiones de precio desconocidas: {', '.join(sorted(desconocidas))}")
+        self.nombre = nombre
+        self.factor = factor
+        self.suma = suma
+        self.condiciones = {dimension: list(valores) for dimension, valores in condiciones.items()}
+
+
+def reglas_predeterminadas(distribucion: DistribucionSala) -> list[ReglaPrecio]:
+    """Tarifas de la cadena: tipo de sala, matiné, martes, fin de semana, ocupación, fila preferida y descuentos."""
+    return [
+        ReglaPrecio("Sala IMAX", 1.6, tipo=["IMAX"]),
+        ReglaPrecio("Sala 4DX", 1.8, tipo=["4DX"]),
+        ReglaPrecio("Sala VIP", 2.0, tipo=["VIP"]),
+        ReglaPrecio("Sala 3D", 1.2, tipo=["3D"]),
+        ReglaPrecio("Matiné (antes de las 15:00)", 0.8, hora=range(0, 15)),
+        ReglaPrecio("Martes de cine", 0.7, dia=[1]),
+        ReglaPrecio("Fin de semana", 1.1, dia=[5, 6]),
+        ReglaPrecio("Alta ocupación (70 % o más)", 1.1, ocupacion=range(7, TRAMOS_OCUPACION)),
+        ReglaPrecio("Fila preferida", suma=2000, fila=[distribucion.fila_preferida]),
+        ReglaPrecio("Niño", 0.8, tipo_venta=["nino"]),
+        ReglaPrecio("Adulto mayor", 0.7, tipo_venta=["adulto_mayor"]),
+    ]
+
+
+class MotorPrecios:
+    """
+    Tabla de precios compilada a partir de reglas.
+
+    Args:
+        distribucion: Distribución de las salas (define las filas y la fila de cada asiento).
+        reglas: Reglas en orden de aplicación (por defecto, reglas_predeterminadas).
+        base: Precio antes de aplicar las reglas.
+    """
+
+    def __init__(self, distribucion: DistribucionSala, reglas: list[ReglaPrecio] | None = None,
+                 base: int = PRECIO_BASE):
+        self.distribucion = distribucion
+        self.base = base
+        self.capacidad = distribucion.capacidad
+        self.forma = (len(TIPOS), 7, 24, TRAMOS_OCUPACION, distribucion.filas, len(TIPOS_VENTA))
+        # Fila (desde 0) de cada asiento: posición numero - 1
+        self._fila_de_asiento = np.arange(self.capacidad, dtype=np.intp) // distribucion.columnas
+        self._codigos = {
+            "tipo": {tipo: i for i, tipo in enumerate(TIPOS)},
+            "tipo_venta": {tipo: i for i, tipo in enumerate(TIPOS_VENTA)},
+        }
+        self._candado = threading.Lock()
+        self.version = 0
+        self.reglas: list[ReglaPrecio] = []
+        self._tabla = np.empty(0, dtype=np.int64)
+        self.configurar(reglas_predeterminadas(distribucion) if reglas is None else reglas)
+
+    def configurar(self, reglas: list[ReglaPrecio]):
+        """Reemplaza las reglas y recompila la tabla; las cotizaciones en curso usan la anterior."""
+        tabla = np.full(self.forma, float(self.base))
+        for regla in reglas:
+            celdas = np.ix_(*(self._indices(dimension, tamano, regla.condiciones.get(dimension))
+                              for dimension, tamano in zip(DIMENSIONES, self.forma)))
+            tabla[celdas] = tabla[celdas] * regla.factor + regla.suma
+        compilada = (np.round(tabla / REDONDEO) * REDONDEO).astype(np.int64)
+        with self._candado:
+            self.reglas = list(reglas)
+            self._tabla = compilada
+            self.version += 1
+
+    def _indices(self, dimension: str, tamano: int, valores: list | None) -> np.ndarray:
+        if valores is None:
+            return np.arange(tamano)
+        codigos = self._codigos.get(dimension)
+        if codigos is not None:
+            return np.array([codigos[valor] for valor in valores if valor in codigos], dtype=np.intp)
+        return np.array([valor for valor in valores if 0 <= valor < tamano], dtype=np.intp)
+
+    def tramo(self, vendidos):
+        """Tramo de ocupación para `vendidos` asientos vendidos (entero o arreglo)."""
+        return np.minimum(np.asarray(vendidos) * TRAMOS_OCUPACION // self.capacidad, TRAMOS_OCUPACION - 1)
+
+    def tipo_venta_valido(self, tipo_venta: str) -> bool:
+        return isinstance(tipo_venta, str) and tipo_venta in self._codigos["tipo_venta"]
+
+    def cotizar(self, tipo: str, inicio: datetime, vendidos: int, numeros, tipo_venta: str = "regular") -> np.ndarray:
+        """
+        Precio de cada asiento de una función.
+
+        Args:
+            tipo: Tipo de sala (un tipo desconocido se cotiza como "2D").
+            inicio: Fecha y hora de inicio de la función.
+            vendidos: Asientos vendidos de la función.
+            numeros: Números de asiento (1..capacidad).
+            tipo_venta: Uno de TIPOS_VENTA.
+
+        Returns:
+            Arreglo con el precio de cada asiento, en el orden de `numeros`.
+        """
+        tramo = min(vendidos * TRAMOS_OCUPACION // self.capacidad, TRAMOS_OCUPACION - 1)
+        # Precios por fila de la función: una vista de la tabla, indexada luego por asiento
+        por_fila = self._tabla[self._codigos["tipo"].get(tipo, len(TIPOS) - 1), inicio.weekday(), inicio.hour,
+                               tramo, :, self._codigos["tipo_venta"][tipo_venta]]
+        return por_fila[self._fila_de_asiento[np.asarray(numeros, dtype=np.intp) - 1]]
+
+    def cotizar_funciones(self, tipos: list[str], inicios: list[datetime], vendidos: list[int],
+                          tipo_venta: str = "regular") -> np.ndarray:
+        """
+        Precios de varias funciones en una sola indexación.
+
+        Returns:
+            Arreglo de forma (funciones, filas) con el precio de cada fila de cada función.
+        """
+        codigos = self._codigos["tipo"]
+        return self._tabla[
+            np.array([codigos.get(tipo, len(TIPOS) - 1) for tipo in tipos], dtype=np.intp)[:, None],
+            np.array([inicio.weekday() for inicio in inicios], dtype=np.intp)[:, None],
+            np.array([inicio.hour for inicio in inicios], dtype=np.intp)[:, None],
+            self.tramo(np.array(vendidos, dtype=np.intp))[:, None],
+            np.arange(self.forma[4])[None, :],
+            self._codigos["tipo_venta"][tipo_venta],
+        ]
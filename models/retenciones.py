@@ -0,0 +1,231 @@
+"""
+Módulo retenciones:
+Gestiona retenciones temporales (leases) de asientos mientras el usuario completa el pago.
+
+Los vencimientos se organizan en una rueda temporal: cada retención se ubica en la ranura
+del segundo en que vence, y al avanzar el reloj solo se visitan las ranuras transcurridas.
+Así, expirar retenciones cuesta O(vencidas) y no requiere recorrer todos los asientos.
+"""
+
+import threading
+import time
+import uuid
+
+from .inventario import FRANJAS_CANDADOS, InventarioAsientos
+
+TTL_RETENCION = 300  # Segundos que dura una retención si no se indica otro valor
+TTL_MAXIMO = 900
+FRANJAS_RETENCIONES = FRANJAS_CANDADOS  # Mismo reparto de funciones que los candados del inventario
+
+
+class Retencion:
+    """Retención de un grupo de asientos de una función, con los precios cotizados al retener."""
+
+    __slots__ = ("id", "sala_id", "funcion", "numeros", "vence", "precios")
+
+    def __init__(self, sala_id: str, funcion: str, numeros: list[int], vence: float,
+                 precios: list[int] | None = None):
+        self.id = uuid.uuid4().hex
+        self.sala_id = sala_id
+        self.funcion = funcion
+        self.numeros = numeros
+        self.vence = vence
+        self.precios = precios  # Precio de cada asiento, fijo mientras la retención esté vigente
+
+    def asientos(self) -> list[str]:
+        return [f"{self.sala_id}-{numero}" for numero in self.numeros]
+
+
+class RuedaTemporal:
+    """
+    Rueda temporal con ranuras de `resolucion` segundos.
+
+    Una entrada que vence más allá del horizonte de la rueda (ranuras * resolución) se
+    conserva en su ranura y se vuelve a evaluar en la siguiente vuelta.
+    """
+
+    def __init__(self, ranuras: int = 1024, resolucion: float = 1.0, ahora: float = 0.0):
+        self.resolucion = resolucion
+        self._ranuras: list[dict[str, float]] = [{} for _ in range(ranuras)]
+        self._tick = int(ahora // resolucion)
+
+    def _ranura(self, vence: float) -> dict[str, float]:
+        # Nunca se ubica en una ranura ya procesada
+        tick = max(int(vence // self.resolucion), self._tick)
+        return self._ranuras[tick % len(self._ranuras)]
+
+    def agregar(self, clave: str, vence: float):
+        self._ranura(vence)[clave] = vence
+
+    def quitar(self, clave: str, vence: float):
+        self._ranura(vence).pop(clave, None)
+
+    def avanzar(self, ahora: float) -> list[str]:
+        """Avanza la rueda hasta `ahora` y retorna las claves vencidas."""
+        vencidas = []
+        objetivo = int(ahora // self.resolucion)
+        # Si pasó más de una vuelta completa basta con revisar cada ranura una vez
+        inicio = max(self._tick, objetivo - len(self._ranuras) + 1)
+        for tick in range(inicio, objetivo + 1):
+            ranura = self._ranuras[tick % len(self._ranuras)]
+            if not ranura:
+                continue
+            for clave, vence in list(ranura.items()):
+                if vence <= ahora:
+                    del ranura[clave]
+                    vencidas.append(clave)
+        self._tick = objetivo
+        return vencidas
+
+
+class _Franja:
+    """Retenciones y rueda temporal de un grupo de funciones, con su propio candado."""
+
+    __slots__ = ("candado", "retenciones", "rueda")
+
+    def __init__(self, ahora: float):
+        self.candado = threading.Lock()
+        self.retenciones: dict[str, Retencion] = {}
+        self.rueda = RuedaTemporal(ahora=ahora)
+
+
+class GestorRetenciones:
+    """
+    Crea, extiende, libera y confirma retenciones sobre un InventarioAsientos.
+
+    Las retenciones se reparten en franjas por función, igual que los candados del inventario:
+    cada franja tiene su candado, su diccionario y su rueda temporal, así que retener, confirmar
+    o consultar una función no compite con las demás. El id de una retención empieza con su
+    franja ('<franja>-<uuid>') para ubicarla sin recorrer las franjas.
+    """
+
+    def __init__(self, inventario: InventarioAsientos, reloj=time.monotonic, franjas: int = FRANJAS_RETENCIONES):
+        self.inventario = inventario
+        self._reloj = reloj
+        ahora = reloj()
+        self._franjas = [_Franja(ahora) for _ in range(franjas)]
+
+    def _ttl(self, ttl: float | None) -> float:
+        return min(max(float(ttl or TTL_RETENCION), 1.0), TTL_MAXIMO)
+
+    def _franja_funcion(self, sala_id: str, funcion: str) -> int:
+        return hash((sala_id, funcion)) % len(self._franjas)
+
+    def _franja(self, retencion_id: str) -> _Franja | None:
+        prefijo, _, _ = str(retencion_id).partition("-")
+        try:
+            indice = int(prefijo, 16)
+        except ValueError:
+            return None
+        return self._franjas[indice] if 0 <= indice < len(self._franjas) else None
+
+    def _purgar(self, franja: _Franja, ahora: float):
+        # Debe llamarse con el candado de la franja tomado
+        for clave in franja.rueda.avanzar(ahora):
+            retencion = franja.retenciones.pop(clave)
+            self.inventario.soltar(retencion.sala_id, retencion.funcion, retencion.numeros)
+
+    def purgar(self, sala_id: str | None = None, funcion: str | None = None):
+        """Libera los asientos de las retenciones vencidas de la función (o de todas las funciones)."""
+        if sala_id is not None and funcion is not None:
+            franjas = [self._franjas[self._franja_funcion(sala_id, funcion)]]
+        else:
+            franjas = self._franjas
+        for franja in franjas:
+            with franja.candado:
+                self._purgar(franja, self._reloj())
+
+    def retener(self, sala_id: str, funcion: str, numeros: list[int], ttl: float | None = None,
+                precios: list[int] | None = None) -> tuple[Retencion | None, int | None]:
+        """
+        Retiene los asientos durante `ttl` segundos, con los precios cotizados de cada uno.
+
+        Returns:
+            Tupla con la retención creada (o None) y el número del asiento en conflicto (o None).
+        """
+        indice = self._franja_funcion(sala_id, funcion)
+        franja = self._franjas[indice]
+        with franja.candado:
+            ahora = self._reloj()
+            self._purgar(franja, ahora)
+            conflicto = self.inventario.retener(sala_id, funcion, numeros)
+            if conflicto is not None:
+                return None, conflicto
+            retencion = Retencion(sala_id, funcion, list(numeros), ahora + self._ttl(ttl), precios)
+            retencion.id = f"{indice:x}-{retencion.id}"
+            franja.retenciones[retencion.id] = retencion
+            franja.rueda.agregar(retencion.id, retencion.vence)
+            return retencion, None
+
+    def obtener(self, retencion_id: str) -> Retencion | None:
+        """Retorna la retención vigente con ese id, o None si no existe o ya venció."""
+        franja = self._franja(retencion_id)
+        if franja is None:
+            return None
+        with franja.candado:
+            self._purgar(franja, self._reloj())
+            return franja.retenciones.get(retencion_id)
+
+    def _renovar(self, retencion_id: str, vence) -> Retencion | None:
+        # `vence` recibe (ahora, vencimiento actual) y retorna el nuevo vencimiento
+        franja = self._franja(retencion_id)
+        if franja is None:
+            return None
+        with franja.candado:
+            ahora = self._reloj()
+            self._purgar(franja, ahora)
+            retencion = franja.retenciones.get(retencion_id)
+            if retencion is None:
+                return None
+            nuevo = vence(ahora, retencion.vence)
+            if nuevo != retencion.vence:
+                franja.rueda.quitar(retencion.id, retencion.vence)
+                retencion.vence = nuevo
+                franja.rueda.agregar(retencion.id, retencion.vence)
+            return retencion
+
+    def extender(self, retencion_id: str, ttl: float | None = None) -> Retencion | None:
+        """Renueva el vencimiento de una retención vigente a `ttl` segundos desde ahora."""
+        return self._renovar(retencion_id, lambda ahora, _: ahora + self._ttl(ttl))
+
+    def asegurar(self, retencion_id: str, segundos: float) -> Retencion | None:
+        """
+        Garantiza que una retención vigente dure al menos `segundos` más (p. ej. mientras se
+        cobra), sin acortarla si ya vence después.
+
+        Returns:
+            La retención, o None si no existe o ya venció.
+        """
+        return self._renovar(retencion_id, lambda ahora, vence: max(vence, ahora + segundos))
+
+    def liberar(self, retencion_id: str) -> bool:
+        """Cancela una retención y libera sus asientos."""
+        franja = self._franja(retencion_id)
+        if franja is None:
+            return False
+        with franja.candado:
+            retencion = franja.retenciones.pop(retencion_id, None)
+            if retencion is None:
+                return False
+            franja.rueda.quitar(retencion.id, retencion.vence)
+            self.inventario.soltar(retencion.sala_id, retencion.funcion, retencion.numeros)
+            return True
+
+    def confirmar(self, retencion_id: str) -> Retencion | None:
+        """
+        Convierte una retención vigente en venta.
+
+        Returns:
+            La retención confirmada, o None si no existe o ya venció.
+        """
+        franja = self._franja(retencion_id)
+        if franja is None:
+            return None
+        with franja.candado:
+            self._purgar(franja, self._reloj())
+            retencion = franja.retenciones.pop(retencion_id, None)
+            if retencion is None:
+                return None
+            franja.rueda.quitar(retencion.id, retencion.vence)
+            self.inventario.confirmar(retencion.sala_id, retencion.funcion, retencion.numeros)
+            return retencion
@@ -0,0 +1,119 @@
+"""
+Módulo tickets:
+Motor único de renderizado de tickets (entradas y combos).
+
+Las plantillas HTML se compilan una sola vez al importar el módulo: se compactan (sin la
+indentación del código fuente) y se convierten a formato '%', de modo que renderizar un
+ticket es una única operación de formateo. Además del HTML por asiento, se ofrece un modo
+"lote" (un solo bloque HTML para N asientos) y un modo "json" estructurado para clientes y
+kioscos que no necesitan HTML.
+"""
+
+import re
+
+FORMATOS = ("html", "lote", "json")
+
+
+def _compilar(plantilla: str) -> str:
+    """Compacta la plantilla y reemplaza los campos '{campo}' por '%(campo)s'."""
+    compacta = re.sub(r">\s+<", "><", plantilla.strip())
+    return re.sub(r"\{(\w+)\}", r"%(\1)s", compacta.replace("%", "%%"))
+
+
+def formatear_precio(precio: float) -> str:
+    """Formatea un precio en pesos colombianos separando miles con puntos."""
+    return "{:,.0f}".format(precio).replace(",", ".")
+
+
+_ENTRADA = _compilar("""
+    <div class='ticket-web'>
+        <h3>🎟️ Ticket Virtual</h3>
+        <p>Asiento: {asiento}</p>
+        <p>Precio: ${precio}</p>
+        <img src='/static/qr.png' width='100'>
+    </div>
+""")
+
+_LOTE_ENTRADAS = _compilar("""
+    <div class='ticket-web'>
+        <h3>🎟️ Tickets Virtuales</h3>
+        <p>Sala: {sala} | Función: {funcion}</p>
+        <p>Asientos ({cantidad}): {asientos}</p>
+        <p>Precio unitario: ${precio} | Total: ${total}</p>
+        <img src='/static/qr.png' width='100'>
+    </div>
+""")
+
+_COMBO = _compilar("""
+    <div class='ticket-web'>
+        <h3>🍔 Combo Comprado</h3>
+        <p><strong>{combo}</strong></p>
+        <p>Incluye: {descripcion}</p>
+        <p>Precio: ${precio}</p>
+        <img src='/static/qr.png' width='100'>
+    </div>
+""")
+
+
+class RenderizadorTickets:
+    """Renderiza tickets de entradas y combos a partir de las plantillas precompiladas."""
+
+    def entrada(self, datos: dict) -> str:
+        """Ticket HTML de un asiento. `datos` debe tener 'asiento' y 'precio' (ya formateado)."""
+        return _ENTRADA % datos
+
+    def entradas(self, asientos: list[str], precio: float | list[float], formato: str = "html",
+                 sala: str = "", funcion: str = "") -> list:
+        """
+        Renderiza en una sola pasada los tickets de varios asientos.
+
+        Args:
+            asientos: Identificadores de los asientos.
+            precio: Precio unitario (numérico), o lista con el precio de cada asiento.
+            formato: "html" (un ticket HTML por asiento), "lote" (un único ticket HTML para
+                todos los asientos) o "json" (un diccionario compacto para todos los asientos).
+            sala: Sala de la función (usado en los formatos "lote" y "json").
+            funcion: Horario de la función (usado en los formatos "lote" y "json").
+
+        Returns:
+            Lista de tickets (un elemento por asiento en "html", uno solo en los demás formatos).
+        """
+        precios = list(precio) if isinstance(precio, (list, tuple)) else [precio] * len(asientos)
+        uniforme = len(set(precios)) <= 1
+        total = sum(precios)
+        if formato == "json":
+            ticket = {
+                "tipo": "entradas",
+                "sala": sala,
+                "funcion": funcion,
+                "asientos": list(asientos),
+                "precio_unitario": precios[0] if precios and uniforme else None,
+                "total": total,
+            }
+            if not uniforme:
+                ticket["precios"] = precios
+            return [ticket]
+        if formato == "lote":
+            return [_LOTE_ENTRADAS % {
+                "sala": sala,
+                "funcion": funcion,
+                "cantidad": len(asientos),
+                "asientos": ", ".join(asientos),
+                "precio": ", $".join(formatear_precio(p) for p in (precios[:1] if uniforme else precios)),
+                "total": formatear_precio(total),
+            }]
+        if uniforme:
+            precio_formateado = formatear_precio(precios[0]) if precios else ""
+            return [_ENTRADA % {"asiento": asiento, "precio": precio_formateado} for asiento in asientos]
+        return [_ENTRADA % {"asiento": asiento, "precio": formatear_precio(p)} for asiento, p in zip(asientos, precios)]
+
+    def combo(self, datos: dict, formato: str = "html") -> str | dict:
+        """Ticket de un combo con 'combo', 'descripcion' y 'precio'."""
+        if formato == "json":
+            return {"tipo": "combo", "combo": datos["combo"], "descripcion": datos["descripcion"],
+                    "precio": datos["precio"]}
+        return _COMBO % {**datos, "precio": formatear_precio(datos["precio"])}
+
+
+# Instancia compartida: las plantillas no tienen estado
+renderizador = RenderizadorTickets()
@@ -0,0 +1,360 @@
+"""
+Módulo ventas:
+Registro columnar de ventas para los reportes de gerencia (ocupación e ingresos por función,
+por sala y por combo) y su exportación en CSV o NDJSON.
+
+Cada entrada vendida y cada combo es una fila, guardada en arreglos de NumPy por columna
+(función, asiento, combo, unidades, precio, instante) en lugar de diccionarios de Python. Las
+funciones, salas y combos se guardan como códigos enteros que indexan tablas pequeñas de
+nombres. Agregar filas escribe en arreglos con capacidad de sobra (que se duplica al llenarse),
+y los reportes son sumas vectorizadas (np.bincount) sobre las columnas, así que resumir
+millones de ventas toma milisegundos.
+
+Las filas nunca se modifican: una venta revertida se registra como otra fila con unidades = -1.
+Por eso una consulta toma, con el candado, solo el número de filas y vistas de las columnas, y
+agrega sin bloquear a las ventas que llegan mientras tanto.
+
+El registro es por proceso. Con un diario de ventas, sus filas viajan en la fotografía del
+diario (ver `empaquetado` y `cargar`) y las ventas posteriores se reproducen desde el diario al
+arrancar. Con estado compartido cada worker reproduce las ventas de los demás desde la base
+común antes de cada reporte (ver DiarioCompartido). Requiere numpy.
+"""
+
+import base64
+import csv
+import io
+import json
+import threading
+import time
+
+import numpy as np
+
+CAPACIDAD_INICIAL = 4096
+BLOQUE_EXPORTACION = 10000  # Filas por fragmento de la exportación
+SIN_CODIGO = -1             # Función o combo ausente (combo sin función, entrada sin combo)
+FORMATOS_EXPORTACION = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+COLUMNAS_EXPORTACION = ("instante", "sala", "funcion", "asiento", "combo", "unidades", "precio")
+COLUMNAS = ("funcion", "asiento", "combo", "unidades", "precio", "instante")
+
+
+class _Codigos:
+    """Tabla de nombres con su código entero (posición)."""
+
+    def __init__(self):
+        self.nombres: list = []
+        self._codigos: dict = {}
+
+    def codigo(self, nombre) -> int:
+        codigo = self._codigos.get(nombre)
+        if codigo is None:
+            codigo = self._codigos[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return codigo
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+
+class RegistroVentas:
+    """
+    Ventas de entradas y combos en columnas de NumPy.
+
+    Args:
+        capacidad_sala: Asientos por sala, para calcular el porcentaje de ocupación.
+    """
+
+    def __init__(self, capacidad_sala: int, capacidad: int = CAPACIDAD_INICIAL, reloj=time.time):
+        self.capacidad_sala = capacidad_sala
+        self._reloj = reloj
+        self._candado = threading.Lock()
+        self._funciones = _Codigos()   # (sala_id, funcion)
+        self._salas = _Codigos()       # sala_id
+        self._combos = _Codigos()      # id del combo
+        self._sala_de_funcion: list[int] = []
+        self._filas = 0
+        self._funcion = np.empty(capacidad, dtype=np.int32)
+        self._asiento = np.empty(capacidad, dtype=np.int32)
+        self._combo = np.empty(capacidad, dtype=np.int32)
+        self._unidades = np.empty(capacidad, dtype=np.int8)
+        self._precio = np.empty(capacidad, dtype=np.int64)
+        self._instante = np.empty(capacidad, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self._filas
+
+    def _codigo_funcion(self, sala_id: str, funcion: str) -> int:
+        # Debe llamarse con el candado tomado
+        codigo = self._funciones.codigo((sala_id, funcion))
+        if codigo == len(self._sala_de_funcion):
+            self._sala_de_funcion.append(self._salas.codigo(sala_id))
+        return codigo
+
+    def _reservar_filas(self, cantidad: int) -> slice:
+        # Debe llamarse con el candado tomado. Las columnas anteriores siguen siendo válidas para
+        # las consultas en curso: al crecer se copian a arreglos nuevos.
+        inicio, fin = self._filas, self._filas + cantidad
+        if fin > len(self._funcion):
+            capacidad = max(fin, 2 * len(self._funcion))
+            for nombre in COLUMNAS:
+                anterior = getattr(self, f"_{nombre}")
+                nueva = np.empty(capacidad, dtype=anterior.dtype)
+                nueva[:inicio] = anterior[:inicio]
+                setattr(self, f"_{nombre}", nueva)
+        return slice(inicio, fin)
+
+    def registrar_entradas(self, sala_id: str, funcion: str, numeros: list[int], precio: int,
+                           unidades: int = 1, instante: float | None = None):
+        """
+        Registra una fila por asiento vendido (unidades = 1) o por venta revertida (unidades = -1).
+
+        Args:
+            precio: Precio de cada entrada, o lista con el precio de cada asiento.
+        """
+        if not len(numeros):
+            return
+        instante = self._reloj() if instante is None else instante
+        with self._candado:
+            codigo = self._codigo_funcion(sala_id, funcion)
+            filas = self._reservar_filas(len(numeros))
+            self._funcion[filas] = codigo
+            self._asiento[filas] = numeros
+            self._combo[filas] = SIN_CODIGO
+            self._unidades[filas] = unidades
+            self._precio[filas] = precio
+            self._instante[filas] = instante
+            self._filas = filas.stop
+
+    def registrar_combo(self, combo_id: str, precio: int, sala_id: str | None = None,
+                        funcion: str | None = None, unidades: int = 1, instante: float | None = None):
+        """Registra la venta de un combo, asociada a la función del comprador si se conoce."""
+        instante = self._reloj() if instante is None else instante
+        with self._candado:
+            codigo = SIN_CODIGO if sala_id is None or funcion is None else self._codigo_funcion(sala_id, funcion)
+            fila = self._reservar_filas(1).start
+            self._funcion[fila] = codigo
+            self._asiento[fila] = 0
+            self._combo[fila] = self._combos.codigo(combo_id)
+            self._unidades[fila] = unidades
+            self._precio[fila] = precio
+            self._instante[fila] = instante
+            self._filas = fila + 1
+
+    def empaquetado(self) -> dict:
+        """Filas y tablas de nombres serializables a JSON (columnas en base64), para la fotografía del diario."""
+        with self._candado:
+            filas = self._filas
+            return {
+                "funciones": [list(funcion) for funcion in self._funciones.nombres],
+                "combos": list(self._combos.nombres),
+                "columnas": {nombre: base64.b64encode(getattr(self, f"_{nombre}")[:filas].tobytes()).decode("ascii")
+                             for nombre in COLUMNAS},
+            }
+
+    def cargar(self, empaquetado: dict):
+        """Agrega las filas de `empaquetado` (ver empaquetado) después de las existentes."""
+        columnas = {nombre: np.frombuffer(base64.b64decode(empaquetado["columnas"][nombre]),
+                                          dtype=getattr(self, f"_{nombre}").dtype)
+                    for nombre in COLUMNAS}
+        with self._candado:
+            # Los códigos del empaquetado se traducen a los de este registro; SIN_CODIGO (-1)
+            # toma el último valor de cada tabla de traducción
+            funciones = np.array([self._codigo_funcion(sala_id, funcion)
+                                  for sala_id, funcion in empaquetado["funciones"]] + [SIN_CODIGO], dtype=np.int32)
+            combos = np.array([self._combos.codigo(combo) for combo in empaquetado["combos"]] + [SIN_CODIGO],
+                              dtype=np.int32)
+            filas = self._reservar_filas(len(columnas["funcion"]))
+            self._funcion[filas] = funciones[columnas["funcion"]]
+            self._combo[filas] = combos[columnas["combo"]]
+            for nombre in ("asiento", "unidades", "precio", "instante"):
+                getattr(self, f"_{nombre}")[filas] = columnas[nombre]
+            self._filas = filas.stop
+
+    def _columnas(self, desde: float | None, hasta: float | None) -> tuple[dict, list, list, list, np.ndarray]:
+        """
+        Vistas de las columnas (filtradas por instante en [desde, hasta)) y las tablas de nombres.
+        """
+        with self._candado:
+            filas = self._filas
+            columnas = {
+                "funcion": self._funcion[:filas], "asiento": self._asiento[:filas],
+                "combo": self._combo[:filas], "unidades": self._unidades[:filas],
+                "precio": self._precio[:filas], "instante": self._instante[:filas],
+            }
+            funciones = list(self._funciones.nombres)
+            salas = list(self._salas.nombres)
+            combos = list(self._combos.nombres)
+            sala_de_funcion = np.array(self._sala_de_funcion, dtype=np.int32)
+        if desde is not None or hasta is not None:
+            instante = columnas["instante"]
+            filtro = np.ones(filas, dtype=bool)
+            if desde is not None:
+                filtro &= instante >= desde
+            if hasta is not None:
+                filtro &= instante < hasta
+            columnas = {nombre: columna[filtro] for nombre, columna in columnas.items()}
+        return columnas, funciones, salas, combos, sala_de_funcion
+
+    @staticmethod
+    def _sumas(columnas: dict, cantidad: int) -> dict[str, np.ndarray]:
+        """Entradas, ingresos por entradas, combos e ingresos por combos de cada función."""
+        funcion, combo, unidades = columnas["funcion"], columnas["combo"], columnas["unidades"]
+        importe = columnas["precio"] * unidades
+        es_entrada = combo == SIN_CODIGO
+        es_combo = ~es_entrada & (funcion != SIN_CODIGO)
+        return {
+            "entradas": np.bincount(funcion[es_entrada], unidades[es_entrada], minlength=cantidad),
+            "ingresos_entradas": np.bincount(funcion[es_entrada], importe[es_entrada], minlength=cantidad),
+            "combos": np.bincount(funcion[es_combo], unidades[es_combo], minlength=cantidad),
+            "ingresos_combos": np.bincount(funcion[es_combo], importe[es_combo], minlength=cantidad),
+        }
+
+    @staticmethod
+    def _tasa(combos: np.ndarray, entradas: np.ndarray) -> np.ndarray:
+        return np.divide(combos, entradas, out=np.zeros(len(entradas)), where=entradas > 0)
+
+    def por_funcion(self, desde: float | None = None, hasta: float | None = None) -> list[dict]:
+        """
+        Ocupación e ingresos de cada función con ventas.
+
+        Args:
+            desde: Solo ventas desde este instante (segundos desde la época).
+            hasta: Solo ventas anteriores a este instante.
+
+        Returns:
+            Lista de diccionarios con 'sala', 'funcion', 'entradas', 'ocupacion' (%),
+            'ingresos_entradas', 'combos', 'ingresos_combos', 'ingresos' y 'tasa_combos' (combos
+            por entrada vendida), ordenada por sala y función.
+        """
+        columnas, funciones, _, _, _ = self._columnas(desde, hasta)
+        sumas = self._sumas(columnas, len(funciones))
+        ocupacion = sumas["entradas"] * (100 / self.capacidad_sala)
+        ingresos = sumas["ingresos_entradas"] + sumas["ingresos_combos"]
+        tasa = self._tasa(sumas["combos"], sumas["entradas"])
+        activas = np.flatnonzero((sumas["entradas"] != 0) | (sumas["combos"] != 0))
+        reporte = [{
+            "sala": funciones[codigo][0],
+            "funcion": funciones[codigo][1],
+            "entradas": int(sumas["entradas"][codigo]),
+            "ocupacion": round(float(ocupacion[codigo]), 2),
+            "ingresos_entradas": int(sumas["ingresos_entradas"][codigo]),
+            "combos": int(sumas["combos"][codigo]),
+            "ingresos_combos": int(sumas["ingresos_combos"][codigo]),
+            "ingresos": int(ingresos[codigo]),
+            "tasa_combos": round(float(tasa[codigo]), 4),
+        } for codigo in activas.tolist()]
+        return sorted(reporte, key=lambda fila: (fila["sala"], fila["funcion"]))
+
+    def por_sala(self, desde: float | None = None, hasta: float | None = None) -> list[dict]:
+        """
+        Ocupación e ingresos por sala, sumando sus funciones con ventas.
+
+        Returns:
+            Lista de diccionarios con 'sala', 'funciones', 'entradas', 'ocupacion' (% promedio
+            de sus funciones), 'ingresos', 'combos' y 'tasa_combos'.
+        """
+        columnas, funciones, salas, _, sala_de_funcion = self._columnas(desde, hasta)
+        sumas = self._sumas(columnas, len(funciones))
+        activas = (sumas["entradas"] != 0) | (sumas["combos"] != 0)
+        cantidad = len(salas)
+
+        def por_sala(valores):
+            return np.bincount(sala_de_funcion, valores, minlength=cantidad)
+
+        funciones_sala = por_sala(activas.astype(np.int64))
+        entradas = por_sala(sumas["entradas"])
+        combos = por_sala(sumas["combos"])
+        ingresos = por_sala(sumas["ingresos_entradas"] + sumas["ingresos_combos"])
+        ocupacion = np.divide(entradas * 100, funciones_sala * self.capacidad_sala,
+                              out=np.zeros(cantidad), where=funciones_sala > 0)
+        tasa = self._tasa(combos, entradas)
+        return sorted(({
+            "sala": salas[codigo],
+            "funciones": int(funciones_sala[codigo]),
+            "entradas": int(entradas[codigo]),
+            "ocupacion": round(float(ocupacion[codigo]), 2),
+            "ingresos": int(ingresos[codigo]),
+            "combos": int(combos[codigo]),
+            "tasa_combos": round(float(tasa[codigo]), 4),
+        } for codigo in np.flatnonzero(funciones_sala).tolist()), key=lambda fila: fila["sala"])
+
+    def por_combo(self, desde: float | None = None, hasta: float | None = None) -> list[dict]:
+        """
+        Unidades e ingresos de cada combo.
+
+        Returns:
+            Lista de diccionarios con 'combo', 'unidades', 'ingresos' y 'tasa' (unidades por
+            entrada vendida en el mismo periodo), de mayor a menor ingreso.
+        """
+        columnas, _, _, combos, _ = self._columnas(desde, hasta)
+        combo, unidades = columnas["combo"], columnas["unidades"]
+        es_combo = combo != SIN_CODIGO
+        vendidas = np.bincount(combo[es_combo], unidades[es_combo], minlength=len(combos))
+        ingresos = np.bincount(combo[es_combo], (columnas["precio"] * unidades)[es_combo], minlength=len(combos))
+        entradas = int(unidades[~es_combo].sum())
+        reporte = [{
+            "combo": combos[codigo],
+            "unidades": int(vendidas[codigo]),
+            "ingresos": int(ingresos[codigo]),
+            "tasa": round(float(vendidas[codigo]) / entradas, 4) if entradas > 0 else 0.0,
+        } for codigo in np.flatnonzero(vendidas).tolist()]
+        return sorted(reporte, key=lambda fila: -fila["ingresos"])
+
+    def resumen(self, desde: float | None = None, hasta: float | None = None) -> dict:
+        """Totales del periodo: 'entradas', 'combos', 'ingresos' y 'tasa_combos'."""
+        columnas, _, _, _, _ = self._columnas(desde, hasta)
+        es_combo = columnas["combo"] != SIN_CODIGO
+        unidades = columnas["unidades"]
+        entradas = int(unidades[~es_combo].sum())
+        combos = int(unidades[es_combo].sum())
+        return {
+            "entradas": entradas,
+            "combos": combos,
+            "ingresos": int(np.dot(columnas["precio"], unidades.astype(np.int64))),
+            "tasa_combos": round(combos / entradas, 4) if entradas > 0 else 0.0,
+        }
+
+    def exportar(self, formato: str = "csv", desde: float | None = None, hasta: float | None = None,
+                 bloque: int = BLOQUE_EXPORTACION):
+        """
+        Genera la exportación de las filas por fragmentos de texto, sin armar todo el archivo.
+
+        Solo se exportan las filas existentes al empezar. El instante se escribe en ISO 8601 (UTC).
+
+        Args:
+            formato: "csv" (con encabezado) o "ndjson" (un objeto JSON por línea).
+            bloque: Filas por fragmento.
+        """
+        if formato not in FORMATOS_EXPORTACION:
+            raise ValueError(f"Formato de exportación inválido: {formato}")
+        columnas, funciones, salas, combos, sala_de_funcion = self._columnas(desde, hasta)
+        # Tablas de nombres con "" al final: el código SIN_CODIGO (-1) toma ese último valor. En
+        # NDJSON los nombres se codifican en JSON una sola vez, no en cada fila.
+        codificar = json.dumps if formato == "ndjson" else str
+        nombres_sala = np.array([codificar(sala) for sala in salas + [""]],
+                                dtype=object)[np.append(sala_de_funcion, SIN_CODIGO)]
+        nombres_funcion = np.array([codificar(funcion) for _, funcion in funciones] + [codificar("")], dtype=object)
+        nombres_combo = np.array([codificar(combo) for combo in combos + [""]], dtype=object)
+
+        if formato == "csv":
+            yield ",".join(COLUMNAS_EXPORTACION) + "\r\n"
+        for inicio in range(0, len(columnas["funcion"]), bloque):
+            partes = slice(inicio, inicio + bloque)
+            funcion = columnas["funcion"][partes]
+            filas = zip(
+                np.datetime_as_string((columnas["instante"][partes] * 1000).astype("datetime64[ms]"),
+                                      timezone="UTC").tolist(),
+                nombres_sala[funcion].tolist(),
+                nombres_funcion[funcion].tolist(),
+                columnas["asiento"][partes].tolist(),
+                nombres_combo[columnas["combo"][partes]].tolist(),
+                columnas["unidades"][partes].tolist(),
+                columnas["precio"][partes].tolist(),
+            )
+            if formato == "csv":
+                salida = io.StringIO()
+                csv.writer(salida).writerows(filas)
+                yield salida.getvalue()
+            else:
+                yield "".join(f'{{"instante":"{instante}","sala":{sala},"funcion":{funcion},"asiento":{asiento},'
+                              f'"combo":{combo},"unidades":{unidades},"precio":{precio}}}\n'
+                              for instante, sala, funcion, asiento, combo, unidades, precio in filas)
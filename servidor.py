@@ -0,0 +1,249 @@
+"""
+Servidor de producción de CinemaEstructurales.
+
+A diferencia de `python app.py` (modo debug, recarga de plantillas), este lanzador:
+    1. Importa la aplicación y crea el CineFacade una sola vez, antes de crear los procesos
+       (pre-carga): los workers heredan el estado ya construido en lugar de repetirlo.
+    2. Calienta la aplicación: compila todas las plantillas y genera las respuestas cacheadas
+       (cartelera, menú, vista de sala), para que la primera solicitud real no pague ese costo.
+    3. Desactiva la recarga automática de plantillas.
+    4. Atiende con un pool acotado de hilos por proceso y, opcionalmente, varios procesos que
+       comparten el mismo socket.
+Registra la duración de cada fase del arranque en el log y en cine_arranque_segundos.
+
+Con más de un proceso el estado de asientos debe ser compartido (CINE_ESTADO_COMPARTIDO), ya
+que cada proceso tiene su propia memoria; en ese caso las ventas y las existencias de la confitería
+también se guardan en esa base en lugar del diario de un solo proceso. Cada hilo atiende una solicitud a la vez, incluidos los long-poll y los streams SSE de
+asientos (a lo sumo CINE_OBSERVADORES por proceso, ver app.py); las conexiones que no encuentran hilo esperan en una cola de `--cola` lugares y, con la
+cola llena, reciben 503 con Retry-After en lugar de acumularse en memoria.
+
+Uso (desde la raíz del repositorio):
+    python servidor.py [--host 0.0.0.0] [--puerto 8000] [--procesos 1] [--hilos 64] [--cola 64]
+
+Con gunicorn, la misma pre-carga y calentamiento (sus workers se crean con fork después de la
+pre-carga, así que crear_app exige el estado compartido):
+    CINE_ESTADO_COMPARTIDO=/ruta/estado.db gunicorn --preload 'servidor:crear_app()'
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+HILOS = 64
+COLA = 64  # Conexiones aceptadas que esperan un hilo libre; las siguientes reciben 503
+PROCESOS = 1
+VIDA_MINIMA = 5.0  # Segundos; un proceso que termina antes se considera un fallo de arranque
+
+logger = logging.getLogger("servidor")
+
+_CUERPO_SATURADO = b"Servidor saturado\n"
+RESPUESTA_SATURADO = (b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                      b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(_CUERPO_SATURADO), _CUERPO_SATURADO))
+
+
+class ServidorHilos(BaseWSGIServer):
+    """
+    Servidor WSGI que atiende cada conexión en un pool de `hilos` hilos.
+
+    A lo sumo `hilos + cola` conexiones están en el pool (atendidas o esperando un hilo); con
+    el pool saturado, las nuevas se responden con 503 sin pasar por la aplicación.
+    """
+
+    multithread = True
+
+    def __init__(self, host: str, puerto: int, app, hilos: int = HILOS, fd: int | None = None,
+                 cola: int = COLA):
+        super().__init__(host, puerto, app, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="http")
+        self._cupos = threading.BoundedSemaphore(hilos + cola)
+
+    def process_request(self, request, client_address):
+        if not self._cupos.acquire(blocking=False):
+            self._rechazar(request)
+            return
+        self._pool.submit(self._atender, request, client_address)
+
+    def _rechazar(self, request):
+        try:
+            request.sendall(RESPUESTA_SATURADO)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._cupos.release()
+
+    def detener_pool(self):
+        self._pool.shutdown(wait=False)
+
+
+def calentar(modulo_app) -> int:
+    """
+    Compila las plantillas y genera las respuestas cacheadas de las rutas de lectura.
+
+    Returns:
+        Número de solicitudes de calentamiento que respondieron con error.
+    """
+    flask_app = modulo_app.app
+    for nombre in flask_app.jinja_env.list_templates():
+        flask_app.jinja_env.get_template(nombre)
+    rutas = ["/", "/api/menu", "/api/funciones"]
+    if modulo_app.facade is not None:
+        modulo_app.facade.obtener_menu_completo()
+        rutas.append(f"/sala/{modulo_app.facade.sala_id}")
+    errores = 0
+    with flask_app.test_client() as cliente:
+        for ruta in rutas:
+            if cliente.get(ruta).status_code >= 400:
+                logger.warning("Calentamiento: %s respondió con error", ruta)
+                errores += 1
+    return errores
+
+
+def crear_app(procesos: int | None = None):
+    """
+    Importa, configura para producción y calienta la aplicación; retorna el objeto WSGI.
+
+    Args:
+        procesos: Procesos que atenderán la aplicación con servir_procesos o _servir. None
+            cuando otro servidor la usa como fábrica de pre-carga (gunicorn --preload) y crea
+            los workers con fork después: el diario de ventas de un proceso no puede compartirse
+            entre ellos, así que se exige CINE_ESTADO_COMPARTIDO.
+
+    Raises:
+        RuntimeError: Si varios procesos atenderían sin estado compartido.
+    """
+    from models.metricas import metricas
+
+    if procesos != 1 and not os.environ.get("CINE_ESTADO_COMPARTIDO"):
+        raise RuntimeError("con workers creados con fork se requiere CINE_ESTADO_COMPARTIDO "
+                           "(estado de asientos compartido)")
+
+    arranque = metricas.histograma("cine_arranque_segundos", "Duración de las fases del arranque.", ("fase",))
+    t0 = time.perf_counter()
+    import app as modulo_app
+    t1 = time.perf_counter()
+
+    flask_app = modulo_app.app
+    flask_app.config["TEMPLATES_AUTO_RELOAD"] = False
+    flask_app.jinja_env.auto_reload = False
+    flask_app.debug = False
+    if procesos == 1:
+        modulo_app.abrir_diario()
+    calentar(modulo_app)
+    t2 = time.perf_counter()
+
+    arranque.observar(t1 - t0, "importar")
+    arranque.observar(t2 - t1, "calentar")
+    logger.info("Aplicación lista en %.0f ms (importar %.0f ms, calentar %.0f ms)",
+                (t2 - t0) * 1000, (t1 - t0) * 1000, (t2 - t1) * 1000)
+    return flask_app
+
+
+def _salir(*_):
+    raise SystemExit(0)
+
+
+def _servir(flask_app, host: str, puerto: int, hilos: int, cola: int, fd: int | None = None):
+    servidor = ServidorHilos(host, puerto, flask_app, hilos, fd=fd, cola=cola)
+    signal.signal(signal.SIGTERM, _salir)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.detener_pool()
+
+
+def _lanzar_hijo(flask_app, conexion: socket.socket, host: str, puerto: int, hilos: int, cola: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # El padre coordina la detención
+        try:
+            _servir(flask_app, host, puerto, hilos, cola, fd=conexion.fileno())
+        finally:
+            os._exit(0)
+    return pid
+
+
+def servir_procesos(flask_app, host: str, puerto: int, procesos: int, hilos: int, cola: int = COLA):
+    """Crea el socket, lo comparte con `procesos` hijos (fork) y relanza los que terminen."""
+    conexion = socket.create_server((host, puerto), backlog=1024)
+    conexion.set_inheritable(True)
+    hijos = {_lanzar_hijo(flask_app, conexion, host, puerto, hilos, cola): time.monotonic()
+             for _ in range(procesos)}
+    logger.info("Atendiendo en http://%s:%s con %s procesos x %s hilos", host, puerto, procesos, hilos)
+
+    deteniendo = False
+
+    def detener(*_):
+        nonlocal deteniendo
+        deteniendo = True
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+    while hijos:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        inicio = hijos.pop(pid, None)
+        if deteniendo or inicio is None:
+            continue
+        if time.monotonic() - inicio < VIDA_MINIMA:
+            logger.error("El proceso %s terminó al arrancar; se detiene el servidor", pid)
+            detener()
+            continue
+        logger.warning("El proceso %s terminó; se relanza", pid)
+        hijos[_lanzar_hijo(flask_app, conexion, host, puerto, hilos, cola)] = time.monotonic()
+    conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de producción de CinemaEstructurales.")
+    parser.add_argument("--host", default=os.environ.get("CINE_HOST", "0.0.0.0"))
+    parser.add_argument("--puerto", type=int, default=int(os.environ.get("CINE_PUERTO", "8000")))
+    parser.add_argument("--procesos", type=int, default=int(os.environ.get("CINE_PROCESOS", PROCESOS)))
+    parser.add_argument("--hilos", type=int, default=int(os.environ.get("CINE_HILOS", HILOS)))
+    parser.add_argument("--cola", type=int, default=int(os.environ.get("CINE_COLA", COLA)),
+                        help="conexiones que esperan un hilo libre antes de responder 503")
+    args = parser.parse_args()
+    if args.procesos > 1 and not os.environ.get("CINE_ESTADO_COMPARTIDO"):
+        parser.error("con varios procesos se requiere CINE_ESTADO_COMPARTIDO (estado de asientos compartido)")
+    if args.procesos > 1 and not hasattr(os, "fork"):
+        parser.error("varios procesos requieren os.fork; use --procesos 1")
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # El log de acceso muestreado es el de app.py
+    flask_app = crear_app(args.procesos)
+    if args.procesos > 1:
+        servir_procesos(flask_app, args.host, args.puerto, args.procesos, args.hilos, args.cola)
+    else:
+        logger.info("Atendiendo en http://%s:%s con %s hilos", args.host, args.puerto, args.hilos)
+        _servir(flask_app, args.host, args.puerto, args.hilos, args.cola)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@
  * Envía datos de asientos y pago al endpoint '/procesar_compra' y actualiza la interfaz.
  */
 
+// Clave de idempotencia de una compra sin retención (la de una retención viaja en retencionActual)
+let claveCompraDirecta = null;
+
 // Función para procesar la compra
 async function procesarCompra(asientos, paymentData, sala) {
     try {
@@ -14,24 +17,35 @@ async function procesarCompra(asientos, paymentData, sala) {
             throw new Error('Datos de pago incompletos');
         }
 
+        // Los reintentos del mismo intento de compra reutilizan su clave
+        if (!retencionActual && !claveCompraDirecta) claveCompraDirecta = nuevaClaveIdempotencia();
+        const clave = retencionActual ? retencionActual.claveCompra : claveCompraDirecta;
         const response = await fetch('/procesar_compra', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'Idempotency-Key': clave
             },
             body: JSON.stringify({
                 asientos: asientos,
                 payment_data: paymentData,
-                sala: sala
+                sala: sala,
+                funcion: funcionActual || null,
+                retencion_id: retencionActual ? retencionActual.id : null
             })
         });
 
+        if (intentoTerminado(response)) {
+            claveCompraDirecta = null;
+            if (retencionActual) retencionActual.claveCompra = nuevaClaveIdempotencia();
+        }
         const data = await response.json();
         
         if (!data.success) {
             throw new Error(data.error || 'Error procesando la compra');
         }
 
+        retencionActual = null;
         return { 
             success: true, 
             tickets: data.tickets 
@@ -56,21 +70,65 @@ function marcarAsientoComoOcupado(asiento) {
     }
 }
 
+function marcarAsientoComoLibre(asiento) {
+    const seatElement = document.querySelector(`[data-asiento="${asiento}"]`);
+    if (seatElement && seatElement.classList.contains('ocupado')) {
+        seatElement.classList.remove('ocupado');
+        seatElement.disabled = false;
+        seatElement.title = '';
+        seatElement.style.pointerEvents = '';
+        seatElement.style.backgroundColor = '';
+        seatElement.onclick = () => seleccionarAsiento(seatElement);
+    }
+}
+
+let versionAsientos = null;
+
+// Aplica un estado completo ({ocupados, retenidos}) o un delta ({cambios}) recibido del servidor
+function aplicarEstadoAsientos(estado) {
+    const propios = new Set(retencionActual ? retencionActual.asientos : []);
+    let cambios = estado.cambios;
+    if (!cambios) {
+        cambios = {};
+        document.querySelectorAll('.asiento.ocupado').forEach(el => { cambios[el.dataset.asiento] = 'libre'; });
+        estado.ocupados.forEach(asiento => { cambios[asiento] = 'ocupado'; });
+        estado.retenidos.forEach(asiento => { cambios[asiento] = 'retenido'; });
+    }
+
+    // Los asientos retenidos por este usuario no se marcan como ocupados
+    Object.entries(cambios).forEach(([asiento, estadoAsiento]) => {
+        if (estadoAsiento === 'libre') {
+            marcarAsientoComoLibre(asiento);
+        } else if (!propios.has(asiento)) {
+            marcarAsientoComoOcupado(asiento);
+        }
+    });
+    versionAsientos = estado.version;
+}
+
 async function actualizarEstadoAsientos(sala) {
     try {
-        const response = await fetch(`/asientos-ocupados/${sala}`);
-        const asientosOcupados = await response.json();
-        
-        // Actualizar todos los asientos según el estado del servidor
-        asientosOcupados.forEach(asiento => {
-            marcarAsientoComoOcupado(asiento);
-        });
+        const desde = versionAsientos === null ? {} : { since: versionAsientos };
+        const response = await fetch(`/asientos-ocupados/${sala}${consultaFuncion(desde)}`);
+        if (response.status === 304) return; // Sin cambios
+        aplicarEstadoAsientos(await response.json());
     } catch (error) {
         console.error('Error actualizando estado de asientos:', error);
     }
 }
 
-// Función para actualizar periódicamente el estado de los asientos
+// Recibe los cambios por Server-Sent Events; si el navegador no los soporta, o el servidor rechaza
+// el stream (503 con demasiados clientes esperando), consulta cada 5 segundos
 function iniciarActualizacionAutomatica(sala) {
-    setInterval(() => actualizarEstadoAsientos(sala), 5000); // Actualizar cada 5 segundos
+    if (window.EventSource) {
+        const fuente = new EventSource(`/asientos-ocupados/${sala}/stream${consultaFuncion()}`);
+        fuente.onmessage = (evento) => aplicarEstadoAsientos(JSON.parse(evento.data));
+        fuente.onerror = () => {
+            if (fuente.readyState === EventSource.CLOSED) {
+                setInterval(() => actualizarEstadoAsientos(sala), 5000);
+            }
+        };
+        return;
+    }
+    setInterval(() => actualizarEstadoAsientos(sala), 5000);
 }
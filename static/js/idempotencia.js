@@ -0,0 +1,28 @@
+/**
+ * Claves de idempotencia de las compras (encabezado 'Idempotency-Key').
+ * Una clave identifica un intento de compra: se genera una vez (al retener los asientos o al abrir el
+ * formulario de pago) y se reutiliza en los reintentos de ese intento, así el servidor no cobra dos veces.
+ */
+
+// crypto.randomUUID solo existe en contextos seguros (HTTPS o localhost); getRandomValues existe siempre
+function nuevaClaveIdempotencia() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    const bytes = new Uint8Array(16);
+    if (window.crypto && crypto.getRandomValues) {
+        crypto.getRandomValues(bytes);
+    } else {
+        for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+    }
+    bytes[6] = (bytes[6] & 0x0f) | 0x40; // UUID versión 4
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = [...bytes].map(b => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
+// El intento terminó (éxito o rechazo): el siguiente envío es otro intento y necesita otra clave.
+// Con un error 5xx o 429 el servidor no guardó la respuesta y el reintento conserva la clave.
+function intentoTerminado(response) {
+    return response.status < 500 && response.status !== 429;
+}
@@ -4,10 +4,14 @@
  */
 
 document.addEventListener('DOMContentLoaded', () => {
+    // Clave de idempotencia del intento de compra: se crea al abrir el formulario y se reutiliza en los reintentos
+    let claveCombo = null;
+
     // Setup para botones de compra
     document.querySelectorAll('.comprar-combo').forEach(btn => {
         btn.addEventListener('click', () => {
             const comboId = btn.dataset.combo;
+            claveCombo = nuevaClaveIdempotencia();
             document.getElementById('combo-id').value = comboId;
             $('#pagoModal').modal('show');
         });
@@ -35,13 +39,15 @@ document.addEventListener('DOMContentLoaded', () => {
             const response = await fetch('/comprar-combo', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Idempotency-Key': claveCombo
                 },
                 body: JSON.stringify({
                     combo: formData.get('combo'),
                     payment_data: paymentData
                 })
             });
+            if (intentoTerminado(response)) claveCombo = nuevaClaveIdempotencia();
             
             const data = await response.json();
             
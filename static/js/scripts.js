@@ -6,13 +6,33 @@
 let currentStep = 1;
 let selectedSeats = [];
 let occupiedSeats = new Set();
+let salaActual = null;
+let funcionActual = ''; // Clave de la función elegida en la cartelera ('' = función por defecto)
+let retencionActual = null; // { id, asientos, precios, total, claveCompra } mientras el usuario completa el pago
+let cotizacionActual = { asientos: [], precios: [], total: 0 }; // Precios del servidor para la selección
+let consultaCotizacion = 0; // Descarta respuestas de cotizaciones anteriores a la última
+const COLUMNAS_SALA = 8; // Asientos por fila, igual que COLUMNAS en models/distribucion.py
+
+// Nombre del asiento para el público, p. ej. 'B4'
+function etiquetaAsiento(numero) {
+    const fila = String.fromCharCode(65 + Math.floor((numero - 1) / COLUMNAS_SALA));
+    return `${fila}${(numero - 1) % COLUMNAS_SALA + 1}`;
+}
+
+// Query string con la función actual y los parámetros indicados (p. ej. { since: 3 })
+function consultaFuncion(parametros = {}) {
+    const query = new URLSearchParams(parametros);
+    if (funcionActual) query.set('funcion', funcionActual);
+    const texto = query.toString();
+    return texto ? `?${texto}` : '';
+}
 
-// Función para cargar asientos ocupados
+// Función para cargar asientos ocupados (vendidos o retenidos por otros usuarios)
 async function cargarAsientosOcupados(salaId) {
     try {
-        const response = await fetch(`/asientos-ocupados/${salaId}`);
-        const asientos = await response.json();
-        occupiedSeats = new Set(asientos);
+        const response = await fetch(`/asientos-ocupados/${salaId}${consultaFuncion()}`);
+        const estado = await response.json();
+        occupiedSeats = new Set([...estado.ocupados, ...estado.retenidos]);
         return occupiedSeats;
     } catch (error) {
         console.error('Error cargando asientos ocupados:', error);
@@ -20,9 +40,11 @@ async function cargarAsientosOcupados(salaId) {
     }
 }
 
-async function inicializarSala(salaId) {
+async function inicializarSala(salaId, funcion = '') {
     const sala = document.getElementById('sala-cine');
     if (!sala) return;
+    salaActual = salaId;
+    funcionActual = funcion;
 
     // Cargar asientos ocupados primero
     await cargarAsientosOcupados(salaId);
@@ -33,7 +55,9 @@ async function inicializarSala(salaId) {
         const btn = document.createElement('button');
         btn.className = 'asiento';
         btn.dataset.asiento = asientoId;
+        btn.dataset.fila = etiquetaAsiento(i).charAt(0);
         btn.textContent = i;
+        btn.title = etiquetaAsiento(i);
         
         if (occupiedSeats.has(asientoId)) {
             btn.classList.add('ocupado');
@@ -60,32 +84,114 @@ function seleccionarAsiento(btn) {
     } else {
         selectedSeats = selectedSeats.filter(seat => seat !== asiento);
     }
+    actualizarResumenSeleccion();
+}
+
+// Reemplaza la selección por los mejores asientos contiguos libres que sugiera el servidor
+async function seleccionarMejoresAsientos() {
+    const input = document.getElementById('cantidad-mejores');
+    const cantidad = input ? parseInt(input.value, 10) || 1 : 1;
+    try {
+        const response = await fetch(`/mejores-asientos/${salaActual}${consultaFuncion({ cantidad })}`);
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error || 'No hay asientos juntos disponibles');
+        }
+        document.querySelectorAll('.asiento.seleccionado').forEach(el => el.classList.remove('seleccionado'));
+        data.asientos.forEach(asiento => {
+            const btn = document.querySelector(`[data-asiento="${asiento}"]`);
+            if (btn) btn.classList.add('seleccionado');
+        });
+        selectedSeats = [...data.asientos];
+        actualizarResumenSeleccion();
+    } catch (error) {
+        alert(error.message);
+    }
+}
+
+// Cotiza la selección con el motor de precios del servidor (el mismo con que se cobra)
+async function cotizarSeleccion() {
+    const consulta = ++consultaCotizacion;
+    const asientos = [...selectedSeats];
+    if (asientos.length === 0) return { asientos, precios: [], total: 0 };
+    const response = await fetch('/api/cotizar', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ asientos, sala: salaActual, funcion: funcionActual || null })
+    });
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || 'No fue posible cotizar los asientos');
+    }
+    return consulta === consultaCotizacion ? data : null;
+}
 
-    // Actualizar contador y total
+async function actualizarResumenSeleccion() {
     const seatsCount = document.getElementById('seats-count');
     const seatsTotal = document.getElementById('seats-total');
     if (seatsCount) seatsCount.textContent = selectedSeats.length;
-    if (seatsTotal) seatsTotal.textContent = `$${(selectedSeats.length * 15000).toLocaleString('es-CO')} COP`;
+    try {
+        const cotizacion = await cotizarSeleccion();
+        if (!cotizacion) return; // Llegó una selección más reciente
+        cotizacionActual = cotizacion;
+        if (seatsTotal) seatsTotal.textContent = `$${cotizacion.total.toLocaleString('es-CO')} COP`;
+    } catch (error) {
+        console.error('Error cotizando asientos:', error);
+        if (seatsTotal) seatsTotal.textContent = '—';
+    }
 }
 
+// Total a pagar: los precios fijados por la retención, que son los que se cobran
 function calcularTotal() {
-    const precioBase = 15000; // Precio por entrada en COP
-    const total = selectedSeats.length * precioBase;
+    const cotizacion = retencionActual || cotizacionActual;
+    const total = cotizacion.total;
     const totalElement = document.getElementById('total-pagar');
     if (totalElement) {
         const totalFormatted = total.toLocaleString('es-CO');
-        totalElement.textContent = `Total a pagar por ${selectedSeats.length} asiento(s): $${totalFormatted} COP`;
+        totalElement.textContent = `Total a pagar por ${cotizacion.asientos.length} asiento(s): $${totalFormatted} COP`;
     }
     return total;
 }
 
-function siguientePaso() {
+// Retiene en el servidor los asientos seleccionados mientras se completa el pago
+async function retenerAsientos() {
+    const response = await fetch('/retener', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ asientos: selectedSeats, sala: salaActual, funcion: funcionActual || null })
+    });
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || 'No fue posible reservar los asientos');
+    }
+    retencionActual = { id: data.retencion_id, asientos: [...selectedSeats], precios: data.precios, total: data.total,
+                        claveCompra: nuevaClaveIdempotencia() };
+}
+
+async function liberarRetencion() {
+    if (!retencionActual) return;
+    const retencionId = retencionActual.id;
+    retencionActual = null;
+    try {
+        await fetch(`/retener/${retencionId}`, { method: 'DELETE' });
+    } catch (error) {
+        console.error('Error liberando retención:', error);
+    }
+}
+
+async function siguientePaso() {
     if (currentStep === 1 && selectedSeats.length === 0) {
         alert('Por favor selecciona al menos un asiento');
         return;
     }
     
     if (currentStep === 1) {
+        try {
+            await retenerAsientos();
+        } catch (error) {
+            alert(error.message);
+            return;
+        }
         // Actualizar total antes de mostrar form de pago
         calcularTotal();
     }
@@ -97,6 +203,9 @@ function siguientePaso() {
 }
 
 function pasoAnterior() {
+    if (currentStep === 2) {
+        liberarRetencion();
+    }
     document.getElementById(`step-${currentStep}`).classList.add('hidden');
     currentStep--;
     document.getElementById(`step-${currentStep}`).classList.remove('hidden');